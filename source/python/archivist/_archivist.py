@@ -1,6 +1,6 @@
 from __future__ import unicode_literals
 from ben10.filesystem import (CheckIsFile, DeleteFile, ExtendedPathMask, FileAlreadyExistsError,
-    FindFiles)
+    IterFindFiles)
 import os
 import warnings
 
@@ -72,11 +72,15 @@ class Archivist(object):
             The file mode for the archive. Needed to maintain the interface.
             CreateZip only accepts "w".
         '''
-        file_listing = self._ZipFileListing(archive_mapping)
+        file_listing = self._IterZipFileListing(archive_mapping)
 
         import zipfile
         oss = zipfile.ZipFile(archive, mode, zipfile.ZIP_DEFLATED)
+        archive_path = os.path.abspath(archive)
         for i_archive_filename, i_filename in file_listing:
+            # The listing is obtained while writing, so the archive itself may be listed
+            if os.path.abspath(i_filename) == archive_path:
+                continue
             oss.write(i_filename, i_archive_filename)
         oss.close()
 
@@ -97,7 +101,7 @@ class Archivist(object):
             See options on tarfile.open documentation.
             http://docs.python.org/2/library/tarfile.html
         '''
-        file_listing = self._ZipFileListing(archive_mapping)
+        file_listing = self._IterZipFileListing(archive_mapping)
         import tarfile
         oss = tarfile.open(archive, mode)
         for i_archive_filename, i_filename in file_listing:
@@ -148,8 +152,8 @@ class Archivist(object):
         '''
         Extracts a zip filename into the target folder
 
-        :param unicode zip_filename:
-            Path to the archive filename
+        :param unicode|file zip_filename:
+            Path to the archive filename, or a seekable file object with the archive contents
 
         :param unicode target_folder:
             Folder into which contents will be extracted
@@ -207,28 +211,38 @@ class Archivist(object):
             A list of mappings between the directory in the target and the source "extended path
             mask" description.
         '''
+        return list(self._IterZipFileListing(archive_mapping, out_filters))
+
+
+    def _IterZipFileListing(self, archive_mapping, out_filters=()):
+        '''
+        Iterator version of _ZipFileListing: yields the files while the source directories are
+        being traversed.
+
+        .. seealso:: _ZipFileListing
+        '''
         import os.path
 
-        result = []
         for i_zip_path, i_path in archive_mapping:
             tree_recurse, _flat_recurse, dirname, in_filters, i_out_filters = ExtendedPathMask.Split(i_path)
-            filenames = FindFiles(
+            filenames = IterFindFiles(
                 dirname,
                 in_filters=in_filters,
                 out_filters=i_out_filters + list(out_filters),
                 recursive=tree_recurse,
+                include_dirs=False,
             )
-            if len(filenames) == 0:
+            listed = False
+            for i_filename in filenames:
+                listed = True
+                archive_filename = i_filename[len(dirname):]
+                if archive_filename.startswith('/') or archive_filename.startswith('\\'):
+                    archive_filename = archive_filename[1:]
+                archive_filename = os.path.join(i_zip_path, archive_filename)
+                yield (archive_filename, i_filename)
+
+            if not listed:
                 warnings.warn(
                     'NO FILES LISTED in "extended path mask": \'%s\'' % (i_path,),
                     stacklevel=2,
                 )
-            for i_filename in filenames:
-                if not os.path.isdir(i_filename):
-                    archive_filename = i_filename[len(dirname):]
-                    if archive_filename.startswith('/') or archive_filename.startswith('\\'):
-                        archive_filename = archive_filename[1:]
-                    archive_filename = os.path.join(i_zip_path, archive_filename)
-                    result.append((archive_filename, i_filename))
-
-        return result
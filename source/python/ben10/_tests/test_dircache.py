@@ -64,6 +64,35 @@ class Test(object):
         assert not IsFile(embed_data['cache_dir/alpha/new_file.txt'])
 
 
+    def testDownloadRemoteArchiveStreaming(self, embed_data, monkeypatch):
+        '''
+        Remote archives are extracted while downloaded, without a temporary copy of the archive.
+        '''
+        from ben10 import dircache
+        from ben10.filesystem import GetFileContents
+        from ben10.phony_http_server import PhonyHTTPServer
+
+        def CopyFile(*args, **kwargs):
+            raise AssertionError('Archive should not be copied')
+        monkeypatch.setattr(dircache, 'CopyFile', CopyFile)
+
+        zip_contents = GetFileContents(embed_data['remotes/alpha.zip'], binary=True)
+        server, port = PhonyHTTPServer.CreateAndStart()
+        server.http_get_callback = lambda path: zip_contents
+        try:
+            dir_cache = DirCache(
+                'http://127.0.0.1:%d/remotes/alpha.zip' % port,
+                None,
+                embed_data['cache_dir'],
+            )
+            dir_cache.CreateCache()
+        finally:
+            server.stop()
+
+        assert IsFile(embed_data['cache_dir/alpha/file.txt'])
+        assert IsFile(embed_data['cache_dir/alpha/sub-dir/sub-file.txt'])
+
+
     @pytest.mark.symlink
     def testCreateLocal(self, dir_cache, embed_data):
         '''
@@ -1,8 +1,9 @@
 # coding: UTF-8
 from __future__ import unicode_literals
 from ben10.debug import StripDebugRefs
-from ben10.execute import (DEFAULT_ENCODING, EnvironmentContextManager, Execute, ExecuteNoWait,
-    ExecutePython, GetSubprocessOutput, GetSubprocessOutputChecked, PrintEnvironment)
+from ben10.execute import (DEFAULT_ENCODING, EnvironmentContextManager, Execute, Execute2,
+    ExecuteLines, ExecuteNoWait, ExecutePython, GetSubprocessOutput, GetSubprocessOutputChecked,
+    GetSubprocessOutputSpooled, PrintEnvironment)
 from ben10.foundation.exceptions import ExceptionToUnicode
 from ben10.foundation.string import Dedent
 from txtout.txtout import TextOutput
@@ -253,3 +254,184 @@ class Test(object):
     def testGetSubprocessOutputCheckedSuccess(self, embed_data):
         command_line = [sys.executable, embed_data.GetDataFilename('testPythonExecute.py_')]
         assert StripDebugRefs(GetSubprocessOutputChecked(command_line), end_only=False).strip() == "testPythonExecute: Hello, world!"
+
+
+    @pytest.mark.parametrize('read_size', [1, 2, 1024])
+    def testExecuteOutputLines(self, read_size):
+        '''
+        The lines passed to the callback, reading the output in chunks of different sizes (to split
+        eols and multi-byte characters between chunks).
+        '''
+        def GetLines(output, clean_eol):
+            command_line = [sys.executable, '-c', "import sys; sys.stdout.write(b'%s')" % output]
+            lines = []
+            with mock.patch('ben10.execute._READ_SIZE', read_size):
+                result = Execute(
+                    command_line,
+                    output_callback=lines.append,
+                    output_encoding='utf-8',
+                    clean_eol=clean_eol,
+                )
+            assert result == lines
+            return lines
+
+        output = r'a\r\nb\rc\r\r\nd\n\n\xc3\xa7\xc3\xa3o\r\ne'
+        assert GetLines(output, True) == ['a', 'b\rc', 'd', '', 'ção', 'e']
+        assert GetLines(output, False) == ['a\r\n', 'b\r', 'c\r', '\r\n', 'd\n', '\n', 'ção\r\n']
+
+        output = r'\rx\r\r'
+        assert GetLines(output, True) == ['\rx']
+        assert GetLines(output, False) == ['\r', 'x\r']
+
+        # Invalid bytes are replaced
+        output = r'\xff\xc3\n\xc3'
+        assert GetLines(output, True) == ['\ufffd\ufffd', '\ufffd']
+        assert GetLines(output, False) == ['\ufffd\ufffd\n']
+
+
+    def testExecuteLines(self):
+        command_line = [
+            sys.executable, '-c', 'import sys; print "alpha"; print "bravo"; sys.exit(3)']
+        return_codes = []
+        lines = ExecuteLines(command_line, return_code_callback=return_codes.append)
+        assert next(lines) == 'alpha'
+        assert return_codes == []
+        assert list(lines) == ['bravo']
+        assert return_codes == [3]
+
+        # Stopping the iteration kills the process
+        command_line = [
+            sys.executable, '-c', 'import time\nwhile True:\n  print "alpha"\n  time.sleep(0.01)']
+        with mock.patch('subprocess.Popen.kill', autospec=True, side_effect=subprocess.Popen.kill) as kill:
+            lines = ExecuteLines(command_line, return_code_callback=return_codes.append)
+            assert next(lines) == 'alpha'
+            lines.close()
+        assert kill.call_count == 1
+        assert return_codes == [3]
+
+
+    def testExecuteMaxOutputLines(self):
+        command_line = [sys.executable, '-c', 'for i in range(100): print i']
+        lines = []
+        assert Execute(command_line, output_callback=lines.append, max_output_lines=3) == \
+            ['97', '98', '99']
+        assert lines == [unicode(i) for i in xrange(100)]
+
+        assert Execute2(command_line, max_output_lines=2) == (['98', '99'], 0)
+
+
+    def testGetSubprocessOutputSpooled(self):
+        command_line = [
+            sys.executable, '-c', 'import sys; sys.stdout.write(b"a\\xc3\\xa7\\xc3\\xa3o\\n" * 1000); sys.exit(2)']
+
+        output, retcode = GetSubprocessOutputSpooled(command_line, encoding='utf-8')
+        with output:
+            assert retcode == 2
+            assert not output.stream._rolled  # Small output is kept in memory
+            assert list(output) == ['ação\n'] * 1000
+
+        output, retcode = GetSubprocessOutputSpooled(
+            command_line, binary=True, max_memory_size=1000)
+        with output:
+            assert retcode == 2
+            assert output._rolled  # Written to disk
+            assert output.read() == b'a\xc3\xa7\xc3\xa3o\n' * 1000
+
+
+    def testGetEnviron(self):
+        from ben10.execute import COPY_FROM_ENVIRONMENT, _GetEnviron
+
+        with EnvironmentContextManager({'testGetEnviron' : 'alpha'}, update=True):
+            result = _GetEnviron()
+            assert result['testGetEnviron'] == b'alpha'
+            assert _GetEnviron() is result  # Reused
+
+            result = _GetEnviron(extra_environ={'testGetEnvironExtra' : 'bravo'})
+            assert result['testGetEnvironExtra'] == b'bravo'
+            assert _GetEnviron(extra_environ={'testGetEnvironExtra' : 'bravo'}) is result
+            assert _GetEnviron(extra_environ={'testGetEnvironExtra' : 'charlie'}) is not result
+
+            # Changes in os.environ are always used
+            os.environ['testGetEnviron'] = 'delta'
+            assert _GetEnviron()['testGetEnviron'] == b'delta'
+
+            environ = {'testGetEnviron' : COPY_FROM_ENVIRONMENT, 'testGetEnvironMissing' : COPY_FROM_ENVIRONMENT}
+            assert _GetEnviron(environ) == {b'testGetEnviron' : b'delta'}
+            assert environ == {'testGetEnviron' : 'delta'}
+
+            os.environ['testGetEnviron'] = 'echo'
+            environ = {'testGetEnviron' : COPY_FROM_ENVIRONMENT}
+            assert _GetEnviron(environ, {'testGetEnvironExtra' : 'bravo'}) == \
+                {b'testGetEnviron' : b'echo', b'testGetEnvironExtra' : b'bravo'}
+
+
+    def testGetEnvironPerformance__flaky(self):
+        '''
+        _GetEnviron (and the same with an extra environment) with 200 more variables in os.environ.
+
+        Results 2026-10-18 (results cached by the environment contents)
+        ---------------------------------------------------------
+        os.environ 2.40us, extra environ 2.78us
+        ---------------------------------------------------------
+
+        Results < 2026-10-18
+        ---------------------------------------------------------
+        os.environ 58.79us, extra environ 58.56us
+        ---------------------------------------------------------
+        '''
+        from ben10.execute import _GetEnviron
+
+        def Time(func, *args):
+            start = time.time()
+            for _i in xrange(count):
+                func(*args)
+            return (time.time() - start) / count
+
+        PRINT_PERFORMANCE = False
+        count = 10000
+        environ = {'testGetEnvironPerformance%d' % i : '/path/%d' % i for i in xrange(200)}
+        with EnvironmentContextManager(environ, update=True):
+            timing = [
+                ('os.environ', Time(_GetEnviron)),
+                ('extra environ', Time(_GetEnviron, None, {'PYTHONIOENCODING' : 'utf-8'})),
+            ]
+
+        if PRINT_PERFORMANCE:
+            print ', '.join('%s %.2fus' % (name, seconds * 1e6) for name, seconds in timing)
+
+
+    def testExecutePerformance__flaky(self):
+        '''
+        Execute of a child printing 100k lines (7MB).
+
+        Results 2026-10-18 (chunks with an incremental decoder)
+        ---------------------------------------------------------
+        clean_eol=True 0.031s, clean_eol=False 0.062s
+        ---------------------------------------------------------
+
+        Results < 2026-10-18 (readline or read(1))
+        ---------------------------------------------------------
+        clean_eol=True 0.750s, clean_eol=False 2.181s
+        ---------------------------------------------------------
+        '''
+        PRINT_PERFORMANCE = False
+        count = 100000
+        command_line = [
+            sys.executable,
+            '-c',
+            'import sys; sys.stdout.write((\'%s\\r\\n\' + \'%s\\r\' * 2) * %d)' % ('x' * 68, 'y' * 68, count // 3),
+        ]
+
+        # Lines are split only on \n with clean_eol, and the last '\r' is dropped without it.
+        expected_lines = {True : count // 3 + 1, False : count // 3 * 3 - 1}
+
+        timing = []
+        for clean_eol in (True, False):
+            start = time.time()
+            output = Execute(command_line, clean_eol=clean_eol)
+            timing.append(('clean_eol=%s' % clean_eol, time.time() - start))
+            assert len(output) == expected_lines[clean_eol]
+
+        if PRINT_PERFORMANCE:
+            print ', '.join('%s %.3fs' % i for i in timing)
+
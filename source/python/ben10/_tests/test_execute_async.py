@@ -0,0 +1,83 @@
+from __future__ import unicode_literals
+from ben10.execute import ProcessOpen
+from ben10.execute_async import Execute2Async, GetSubprocessOutputAsync, WaitProcessAsync
+import multiprocessing
+import os
+import pytest
+import sys
+import time
+
+
+
+#===================================================================================================
+# Test
+#===================================================================================================
+class Test(object):
+
+    def testExecute2Async(self, embed_data):
+        # Each process creates a file when it starts and waits for the "release" file, so all of
+        # them must be running at the same time (and none of them finishes before the release)
+        data_dir = embed_data.GetDataDirectory()
+        command_line = [
+            sys.executable,
+            '-c',
+            'import os, sys, time\n'
+            'open(os.path.join(sys.argv[1], "started_" + sys.argv[2]), "w").close()\n'
+            'while not os.path.exists(os.path.join(sys.argv[1], "release")):\n'
+            '    time.sleep(0.01)\n'
+            'print "alpha"\n'
+            'sys.exit(2)\n',
+            data_dir,
+        ]
+
+        lines = []
+        callback_results = []
+        results = [
+            Execute2Async(
+                command_line + ['%d' % i],
+                output_callback=lines.append,
+                callback=callback_results.append,
+            )
+            for i in xrange(5)
+        ]
+        assert not results[0].ready()
+        with pytest.raises(multiprocessing.TimeoutError):
+            results[0].get(timeout=0.01)
+
+        # Executed concurrently
+        started = [os.path.join(data_dir, 'started_%d' % i) for i in xrange(5)]
+        timeout = time.time() + 60
+        while not all(os.path.exists(i) for i in started):
+            assert time.time() < timeout
+            time.sleep(0.01)
+        assert not any(i.ready() for i in results)
+        open(os.path.join(data_dir, 'release'), 'w').close()
+
+        assert [i.get() for i in results] == [(['alpha'], 2)] * 5
+        assert results[0].successful()
+        assert lines == ['alpha'] * 5
+        assert callback_results == [(['alpha'], 2)] * 5
+
+
+    def testGetSubprocessOutputAsync(self):
+        result = GetSubprocessOutputAsync(
+            [sys.executable, '-c', 'import sys; sys.stdout.write(b"\\xc3\\xa7")'],
+            encoding='utf-8',
+        )
+        assert result.get() == ('\xe7', 0)
+
+        # Errors are raised by get
+        result = GetSubprocessOutputAsync('missing_executable_for_testGetSubprocessOutputAsync')
+        result.wait()
+        assert not result.successful()
+        with pytest.raises(RuntimeError) as e:
+            result.get()
+        assert 'missing_executable_for_testGetSubprocessOutputAsync' in unicode(e.value)
+
+
+    def testWaitProcessAsync(self):
+        popen = ProcessOpen([sys.executable, '-c', 'import sys; print "alpha"; sys.exit(3)'])
+        result = WaitProcessAsync(popen)
+        output, _stderr = result.get()
+        assert output.strip() == b'alpha'
+        assert popen.returncode == 3
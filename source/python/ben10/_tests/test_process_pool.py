@@ -0,0 +1,186 @@
+from __future__ import unicode_literals
+from ben10.execute import Execute
+from ben10.process_pool import ProcessPool
+import pytest
+import sys
+import time
+
+
+
+#===================================================================================================
+# Test
+#===================================================================================================
+class Test(object):
+
+    def testProcessPool(self):
+        command_lines = [
+            [sys.executable, '-c', 'import sys; print "alpha %d"; print "bravo"; sys.exit(%d)' % (i, i)]
+            for i in xrange(5)
+        ]
+        lines = []
+        return_codes = []
+        pool = ProcessPool(max_processes=2)
+        results = pool.Execute(
+            command_lines,
+            output_callback=lambda index, line: lines.append((index, line)),
+            return_code_callback=lambda index, returncode: return_codes.append((index, returncode)),
+        )
+        assert results == [(['alpha %d' % i, 'bravo'], i) for i in xrange(5)]
+        assert sorted(lines) == sorted(
+            [(i, 'alpha %d' % i) for i in xrange(5)] + [(i, 'bravo') for i in xrange(5)])
+        assert sorted(return_codes) == [(i, i) for i in xrange(5)]
+
+        # The lines of each process are delivered in order
+        for i in xrange(5):
+            assert [line for index, line in lines if index == i] == ['alpha %d' % i, 'bravo']
+
+        assert pool.Execute([]) == []
+
+        command_lines = [[sys.executable, '-c', 'for i in range(10): print i']]
+        assert pool.Execute(command_lines, max_output_lines=2) == [(['8', '9'], 0)]
+
+
+    def testMaxProcesses(self):
+        command_lines = [
+            [sys.executable, '-c', 'import time; print "start"; time.sleep(0.2)']
+        ] * 6
+
+        running = [0]
+        max_running = [0]
+
+        def OnOutput(index, line):
+            running[0] += 1
+            max_running[0] = max(max_running[0], running[0])
+
+        def OnReturnCode(index, returncode):
+            running[0] -= 1
+
+        start = time.time()
+        pool = ProcessPool(max_processes=3)
+        results = pool.Execute(
+            command_lines, output_callback=OnOutput, return_code_callback=OnReturnCode)
+        assert results == [(['start'], 0)] * 6
+        assert max_running[0] == 3
+        assert time.time() - start >= 0.4  # At least 2 rounds
+
+
+    def testTimeout(self):
+        command_lines = [
+            [sys.executable, '-c', 'print "fast"'],
+            [sys.executable, '-c', 'import sys, time; print "slow"; sys.stdout.flush(); time.sleep(30)'],
+        ]
+        start = time.time()
+        pool = ProcessPool(timeout=1.0)
+        assert pool.Execute(command_lines) == [(['fast'], 0), (['slow'], None)]
+        assert time.time() - start < 10
+
+
+    @pytest.mark.skipif('sys.platform == "win32"')
+    def testTimeoutWithChildProcesses(self):
+        # The output pipes are kept open by the "sleep" processes after "sh" finishes (or is killed)
+        command_lines = [
+            ['sh', '-c', 'echo finished; sleep 30 &'],
+            ['sh', '-c', 'echo killed; sleep 30 & wait'],
+            ['sh', '-c', 'echo ok'],
+        ]
+        start = time.time()
+        pool = ProcessPool(timeout=1.0)
+        assert pool.Execute(command_lines) == [(['finished'], None), (['killed'], None), (['ok'], 0)]
+        assert time.time() - start < 10
+
+
+    def testConcurrentExecute(self):
+        import threading
+
+        pool = ProcessPool(max_processes=2)
+        results = {}
+
+        def Run(i):
+            command_lines = [
+                [sys.executable, '-c', 'import time; time.sleep(0.1); print "%d %d"' % (i, j)]
+                for j in xrange(3)
+            ]
+            results[i] = pool.Execute(command_lines)
+
+        threads = [threading.Thread(target=Run, args=(i,)) for i in xrange(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == {i: [(['%d %d' % (i, j)], 0) for j in xrange(3)] for i in xrange(4)}
+
+        # Cancel stops all the calls in progress
+        started = threading.Semaphore(0)
+        command_lines = [
+            [sys.executable, '-c', 'import sys, time; print 1; sys.stdout.flush(); time.sleep(30)']
+        ]
+        threads = [
+            threading.Thread(
+                target=pool.Execute,
+                args=(command_lines,),
+                kwargs={'output_callback' : lambda index, line: started.release()},
+            )
+            for _i in xrange(2)
+        ]
+        start = time.time()
+        for thread in threads:
+            thread.start()
+        started.acquire()
+        started.acquire()
+        pool.Cancel()
+        for thread in threads:
+            thread.join()
+        assert time.time() - start < 10
+
+
+    def testCancel(self):
+        command_lines = [
+            [sys.executable, '-c', 'import sys, time; print %d; sys.stdout.flush(); time.sleep(30)' % i]
+            for i in xrange(4)
+        ]
+        pool = ProcessPool(max_processes=2)
+        pool.Cancel()  # Nothing to cancel
+
+        def OnOutput(index, line):
+            if index == 1:
+                pool.Cancel()
+
+        start = time.time()
+        results = pool.Execute(command_lines, output_callback=OnOutput)
+        assert time.time() - start < 10
+
+        # Processes 0 and 1 were killed (0 may not have printed yet), 2 and 3 never started
+        assert results[1:] == [(['1'], None), ([], None), ([], None)]
+        assert results[0][1] is None
+
+
+    def testProcessPoolPerformance__flaky(self):
+        '''
+        Executes 100 short python processes, which just print or wait 20ms before printing (as
+        processes waiting for the network or disk).
+
+        Results 2026-10-18 (1 cpu)
+        ---------------------------------------------------------
+        print: Execute 0.406s, ProcessPool(1) 0.329s, ProcessPool(4) 0.385s, ProcessPool(8) 0.393s
+        wait: Execute 2.640s, ProcessPool(1) 2.687s, ProcessPool(4) 0.722s, ProcessPool(8) 0.475s
+        ---------------------------------------------------------
+        '''
+        PRINT_PERFORMANCE = False
+        count = 100
+        for name, code in [('print', 'print %d'), ('wait', 'import time; time.sleep(0.02); print %d')]:
+            command_lines = [[sys.executable, '-S', '-c', code % i] for i in xrange(count)]
+
+            start = time.time()
+            for command_line in command_lines:
+                Execute(command_line)
+            timing = [('Execute', time.time() - start)]
+
+            for max_processes in (1, 4, 8):
+                start = time.time()
+                results = ProcessPool(max_processes=max_processes).Execute(command_lines)
+                timing.append(('ProcessPool(%d)' % max_processes, time.time() - start))
+                assert results == [(['%d' % i], 0) for i in xrange(count)]
+
+            if PRINT_PERFORMANCE:
+                print '%s: %s' % (name, ', '.join('%s %.3fs' % i for i in timing))
@@ -307,13 +307,19 @@ class DirCache(DirCacheLocal):
             Path to a remote directory where cache archives are stored
 
         :param bool invalidate_cache:
-            If True, invalidates the current cached list of remote cache files for `remote_dir`.
+            If True, invalidates the current cached list of remote cache files for `remote_dir`
+            (including the listing kept by the remote metadata cache, for ftp directories).
             Note that this cache is automatically updated when `CreateRemote` and `DeleteRemote` are
             called.
 
         :return list(unicode):
             List of cache filenames in `remote_dir`
         '''
+        if invalidate_cache:
+            from ben10.filesystem._filesystem_remote import GetRemoteMetadataCache
+            from urlparse import urlparse
+            GetRemoteMetadataCache().Invalidate(urlparse(remote_dir))
+
         if invalidate_cache or remote_dir not in cls._REMOTE_CACHE_DIRS:
             cls._REMOTE_CACHE_DIRS[remote_dir] = ListFiles(remote_dir) or []
         return cls._REMOTE_CACHE_DIRS[remote_dir]
@@ -397,12 +403,30 @@ class DirCache(DirCacheLocal):
         '''
         Internal method that actually downloads the remote resource.
 
-        :param unicode extract_dir:
-            A temporary directory where to extract archive remote resources.
+        Local archives are extracted in place, and remote archives are extracted while they are
+        downloaded (see ben10.filesystem._filesystem_remote.RemoteRangeFile). The archive is only
+        copied into a temporary directory when the server does not support range requests.
 
         :param unicode target_dir:
             The final destination of the remote resource.
         '''
+        from urlparse import urlparse
+        remote_url = urlparse(self.remote)
+
+        if remote_url.scheme not in ('ftp', 'http', 'https'):
+            Archivist().ExtractArchive(self.remote, target_dir)
+            return
+
+        from ben10.filesystem._filesystem_remote import RemoteRangeFile
+        try:
+            remote_file = RemoteRangeFile(remote_url)
+        except IOError:
+            pass  # No range requests: download the archive
+        else:
+            with remote_file:
+                Archivist().ExtractZip(remote_file, target_dir)
+            return
+
         with CreateTemporaryDirectory() as tmp_dir:
             tmp_archive = os.path.join(tmp_dir, self.remote_filename)
             CopyFile(self.remote, tmp_archive)
@@ -4,14 +4,17 @@ from ben10.foundation.reraise import Reraise
 from ben10.foundation.string import SafeSplit
 from ben10.foundation.types_ import CheckType
 from ben10.foundation.uname import GetExecutableDir
+from collections import deque
 from cStringIO import StringIO
 from multiprocessing.process import current_process
 from txtout.txtout import TextOutput
 import locale
 import os
+import re
 import shlex
 import subprocess
 import sys
+import threading
 
 
 
@@ -190,6 +193,7 @@ def Execute(
         ignore_auto_quote=False,
         clean_eol=True,
         pipe_stdout=True,
+        max_output_lines=None,
     ):
     '''
     Executes a shell command
@@ -264,10 +268,77 @@ def Execute(
         callback. If False, stdout will be dumped directly to the console (preserving color),
         and the callback will not be called.
 
+    :param int max_output_lines:
+        If given, only the last `max_output_lines` lines of the output are returned (and kept in
+        memory), the callback is still called with all the lines.
+        To process the output without keeping it in memory, see :py:func:`ExecuteLines`.
+
     :rtype: list(unicode)
     :returns:
         Returns the process execution output as a list of strings.
     '''
+    if max_output_lines is None:
+        result = []
+    else:
+        result = deque(maxlen=max_output_lines)
+
+    lines = ExecuteLines(
+        command_line,
+        cwd=cwd,
+        environ=environ,
+        extra_environ=extra_environ,
+        input=input,
+        output_encoding=output_encoding,
+        output_encoding_errors=output_encoding_errors,
+        return_code_callback=return_code_callback,
+        shell=shell,
+        ignore_auto_quote=ignore_auto_quote,
+        clean_eol=clean_eol,
+        pipe_stdout=pipe_stdout,
+    )
+    for line in lines:
+        if output_callback:
+            output_callback(line)
+        result.append(line)
+
+    return list(result)
+
+
+
+#===================================================================================================
+# ExecuteLines
+#===================================================================================================
+def ExecuteLines(
+        command_line,
+        cwd=None,
+        environ=None,
+        extra_environ=None,
+        input=None,  # @ReservedAssignment
+        output_encoding=None,
+        output_encoding_errors=None,
+        return_code_callback=None,
+        shell=False,
+        ignore_auto_quote=False,
+        clean_eol=True,
+        pipe_stdout=True,
+    ):
+    '''
+    Executes a shell command, yielding the output lines as they are generated (without keeping them
+    in memory):
+
+        for line in ExecuteLines(['make', 'all']):
+            if 'error' in line:
+                ...
+
+    Use the same parameters as Execute, except output_callback and max_output_lines.
+
+    The process is started when the first line is requested. If the iteration is stopped before the
+    end of the output (i.e. the generator is closed), the process is killed.
+
+    :rtype: iterator(unicode)
+    :returns:
+        The lines of the process output (see Execute@clean_eol).
+    '''
     output_encoding = output_encoding or DEFAULT_ENCODING
     output_encoding_errors = output_encoding_errors or DEFAULT_ENCODING_ERRORS
 
@@ -282,7 +353,6 @@ def Execute(
     )
 
     try:
-        result = []
         if popen.stdin:
             if input:
                 try:
@@ -295,39 +365,17 @@ def Execute(
 
         if popen.stdout:
             # TODO: BEN-31: Refactor System.Execute and derivates (git, scons, etc)
-            if clean_eol:  # Read one line at the time, and remove EOLs
-                for line in iter(popen.stdout.readline, b""):
-                    line = line.rstrip(b'\n\r')
-                    line = line.decode(output_encoding, errors=output_encoding_errors)
-                    if output_callback:
-                        output_callback(line)
-                    result.append(line)
-            else:  # Read one char at a time, to keep \r and \n
-                current_line = b''
-                carriage = False
-                for char in iter(lambda: popen.stdout.read(1), b""):
-
-                    # Check if last line was \r, if not, print what we have
-                    if char != b'\n' and carriage:
-                        carriage = False
-                        current_line = current_line.decode(output_encoding, errors=output_encoding_errors)
-                        if output_callback:
-                            output_callback(current_line)
-                        result.append(current_line)
-                        current_line = b''
-
-                    current_line += char
-
-                    if char == b'\r':
-                        carriage = True
-
-                    if char == b'\n':
-                        current_line = current_line.decode(output_encoding, errors=output_encoding_errors)
-                        if output_callback:
-                            output_callback(current_line)
-                        result.append(current_line)
-                        carriage = False
-                        current_line = b''
+            chunks = _IterOutputChunks(popen.stdout, output_encoding, output_encoding_errors, clean_eol)
+            for lines in chunks:
+                for line in lines:
+                    yield line
+
+    except GeneratorExit:
+        # The output is not wanted anymore: don't leave the process running (or blocked writing)
+        if popen.poll() is None:
+            popen.kill()
+        popen.wait()
+        raise
 
     finally:
         if popen.stdout:
@@ -337,7 +385,77 @@ def Execute(
     if return_code_callback:
         return_code_callback(popen.returncode)
 
-    return result
+
+
+# Maximum number of bytes read from the process output at a time
+_READ_SIZE = 64 * 1024
+
+# A line ending with \r\n, \r or \n (as in clean_eol=False)
+_LINE_RE = re.compile('[^\r\n]*(?:\r\n|\r|\n)')
+
+def _IterOutputChunks(stream, encoding, encoding_errors, clean_eol):
+    '''
+    Reads the lines of a process output, yielding the lines completed by each chunk read as soon as
+    the chunk is read.
+
+    The output is read in chunks of the bytes available (instead of byte by byte) and decoded by an
+    incremental decoder, so it only works for encodings where \r and \n are single bytes (the same
+    as the ascii ones), as all the locale encodings.
+
+    :param file stream:
+        The process output.
+
+    :param unicode encoding:
+        See Execute@output_encoding.
+
+    :param unicode encoding_errors:
+        See Execute@output_encoding_errors.
+
+    :param bool clean_eol:
+        If True, lines end only at \n and are yielded without the eols (\r and \n), and the last
+        line is yielded even when it has no eol.
+        If False, lines end at \r\n, \r or \n and are yielded with their eols, and the last line
+        is discarded when it has no eol (or ends with \r).
+
+    :rtype: iterator(list(unicode))
+    '''
+    import codecs
+    import errno
+
+    decoder = codecs.getincrementaldecoder(encoding)(encoding_errors)
+    fileno = stream.fileno()
+    pending = ''
+    while True:
+        try:
+            data = os.read(fileno, _READ_SIZE)
+        except OSError, e:
+            if e.errno == errno.EINTR:
+                continue
+            raise
+
+        text = pending + decoder.decode(data, final=not data)
+
+        if clean_eol:
+            lines = text.split('\n')
+            pending = lines.pop()
+            if not data and pending:
+                lines.append(pending)
+            lines = [line.rstrip('\r') for line in lines]
+
+        else:
+            if not data:
+                return
+
+            # A final \r may be the first half of a \r\n, so its line waits for the next chunk.
+            complete = text[:-1] if text.endswith('\r') else text
+            end = max(complete.rfind('\n'), complete.rfind('\r')) + 1
+            pending = text[end:]
+            lines = _LINE_RE.findall(complete[:end])
+
+        if lines:
+            yield lines
+        if not data:
+            return
 
 
 
@@ -356,6 +474,7 @@ def Execute2(
         ignore_auto_quote=False,
         clean_eol=True,
         pipe_stdout=True,
+        max_output_lines=None,
     ):
     '''
     Executes a shell command.
@@ -387,6 +506,7 @@ def Execute2(
         ignore_auto_quote=ignore_auto_quote,
         clean_eol=clean_eol,
         pipe_stdout=pipe_stdout,
+        max_output_lines=max_output_lines,
     )
 
     return (output, return_code[0])
@@ -503,6 +623,75 @@ def GetSubprocessOutputChecked(command_line, *args, **kwargs):
     return output
 
 
+# Default for GetSubprocessOutputSpooled@max_memory_size
+DEFAULT_MAX_MEMORY_SIZE = 1024 * 1024
+
+def GetSubprocessOutputSpooled(
+        command_line,
+        cwd=None,
+        environ=None,
+        extra_environ=None,
+        shell=False,
+        ignore_auto_quote=False,
+        binary=False,
+        encoding=None,
+        encoding_errors=None,
+        max_memory_size=DEFAULT_MAX_MEMORY_SIZE,
+    ):
+    '''
+    Same as GetSubprocessOutput, but the output is returned in a temporary file, which is kept in
+    memory only while it is smaller than `max_memory_size` (so the memory used doesn't depend on the
+    amount of output generated by the process):
+
+        output, retcode = GetSubprocessOutputSpooled(['make', 'all'])
+        with output:
+            for line in output:
+                ...
+
+    :param int max_memory_size:
+        The maximum size (in bytes) of the output kept in memory, after which it is written to a
+        temporary file in disk.
+
+    :return tuple(file, int):
+        Returns the sub-process output (merging stdout and stderr), positioned at its start, and the
+        return code.
+        Unless `binary` is True, the output file returns unicode (decoded with `encoding`).
+        The temporary file is removed when the output file is closed.
+    '''
+    import codecs
+    import shutil
+    import tempfile
+
+    encoding = encoding or DEFAULT_ENCODING
+    encoding_errors = encoding_errors or DEFAULT_ENCODING_ERRORS
+
+    popen = ProcessOpen(
+        command_line,
+        cwd=cwd,
+        environ=environ,
+        extra_environ=extra_environ,
+        shell=shell,
+        ignore_auto_quote=ignore_auto_quote,
+        pipe_stdout=True,
+    )
+    output = tempfile.SpooledTemporaryFile(max_memory_size)
+    try:
+        popen.stdin.close()
+        try:
+            shutil.copyfileobj(popen.stdout, output, _READ_SIZE)
+        finally:
+            popen.stdout.close()
+        retcode = popen.wait()
+    except:
+        output.close()
+        raise
+
+    output.seek(0)
+    if not binary:
+        output = codecs.getreader(encoding)(output, encoding_errors)
+    return output, retcode
+
+
 def ProcessOpen(
         command_line,
         cwd=None,
@@ -749,9 +938,16 @@ def _GetEnviron(environ=None, extra_environ=None):
 
         This combines `environ` and `extra_environ` and converts all strings to bytes (subprocess
         does not accept unicode).
+
+        The result is shared by the calls with the same environment (see _environ_cache), so it
+        must not be changed.
     '''
+    if extra_environ:
+        # Make sure we don't have any placeholder (COPY_FROM_ENVIRON) in the final dictionary.
+        assert COPY_FROM_ENVIRONMENT not in extra_environ.values()
+
     if environ is None:
-        environ = os.environ.copy()
+        environ = _GetOsEnvironDict()
     else:
         for i_name, i_value in environ.items():
             if i_value is COPY_FROM_ENVIRONMENT:
@@ -761,15 +957,49 @@ def _GetEnviron(environ=None, extra_environ=None):
                 else:
                     environ[i_name] = env_value
 
-    if extra_environ:
-        # Make sure we don't have any placeholder (COPY_FROM_ENVIRON) in the final dictionary.
-        assert COPY_FROM_ENVIRONMENT not in extra_environ.values()
-        environ.update(extra_environ)
+        if extra_environ:
+            environ.update(extra_environ)
+            extra_environ = None
+
+    extra_environ = extra_environ or {}
+
+    with _environ_cache_lock:
+        for cached_environ, cached_extra_environ, result in _environ_cache:
+            if cached_environ == environ and cached_extra_environ == extra_environ:
+                return result
+
+    result = dict(environ)
+    result.update(extra_environ)
 
     # subprocess does not accept unicode strings in the environment
-    environ = {bytes(key) : bytes(value) for key, value in environ.iteritems()}
+    result = {bytes(key) : bytes(value) for key, value in result.iteritems()}
+
+    with _environ_cache_lock:
+        _environ_cache.appendleft((dict(environ), dict(extra_environ), result))
+
+    return result
+
 
-    return environ
+# The last environments created by _GetEnviron, as (environ, extra_environ, result): converting
+# all the variables to bytes is slow, and usually many processes are executed with the same
+# environment (comparing the contents is a lot faster). Changes in os.environ (or in the given
+# dicts) make their contents different, so they never return outdated results.
+_ENVIRON_CACHE_SIZE = 8
+_environ_cache = deque(maxlen=_ENVIRON_CACHE_SIZE)
+_environ_cache_lock = threading.Lock()
+
+def _GetOsEnvironDict():
+    '''
+    :rtype: dict(bytes, bytes)
+    :returns:
+        The dict with the current os.environ contents (not a copy: must not be changed).
+    '''
+    environ = os.environ
+    environ = getattr(environ, 'original_environ', environ)  # BytesOnlyEnvironWrapper
+    result = getattr(environ, 'data', environ)
+    if not isinstance(result, dict):
+        result = environ.copy()
+    return result
 
 
 
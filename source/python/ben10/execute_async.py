@@ -0,0 +1,184 @@
+from __future__ import unicode_literals
+'''
+Asynchronous versions of the functions in ben10.execute.
+
+Each call starts the process and returns immediately an AsyncExecuteResult, so many processes can
+be executed concurrently from a single thread:
+
+    results = [GetSubprocessOutputAsync(['git', 'status'], cwd=i) for i in repositories]
+    for result in results:
+        output, retcode = result.get()
+
+The processes are waited for (and their output read) by one thread per call.
+'''
+from ben10.execute import Execute2, GetSubprocessOutput
+import sys
+import threading
+
+
+
+#===================================================================================================
+# AsyncExecuteResult
+#===================================================================================================
+class AsyncExecuteResult(object):
+    '''
+    The result of an asynchronous execution, with the same interface as the results of
+    multiprocessing.pool.Pool.apply_async.
+    '''
+
+    def __init__(self, callback=None):
+        '''
+        :param callable callback:
+            Called with the result when the execution succeeds (in the thread executing it, before
+            the result is ready).
+        '''
+        self._callback = callback
+        self._event = threading.Event()
+        self._value = None
+        self._exc_info = None
+
+
+    def ready(self):
+        '''
+        :rtype: bool
+        :returns:
+            If the execution finished.
+        '''
+        return self._event.is_set()
+
+
+    def successful(self):
+        '''
+        :rtype: bool
+        :returns:
+            If the execution finished without raising an error.
+
+        :raises AssertionError:
+            If the execution didn't finish yet.
+        '''
+        assert self.ready()
+        return self._exc_info is None
+
+
+    def wait(self, timeout=None):
+        '''
+        Waits until the execution finishes (or the timeout expires).
+
+        :param float timeout:
+            In seconds.
+        '''
+        self._event.wait(timeout)
+
+
+    def get(self, timeout=None):
+        '''
+        :param float timeout:
+            In seconds.
+
+        :returns:
+            The result of the execution.
+
+        :raises multiprocessing.TimeoutError:
+            If the execution didn't finish before the timeout.
+
+        Errors raised by the execution are raised here.
+        '''
+        self.wait(timeout)
+        if not self.ready():
+            from multiprocessing import TimeoutError
+            raise TimeoutError()
+
+        if self._exc_info is not None:
+            raise self._exc_info[0], self._exc_info[1], self._exc_info[2]
+        return self._value
+
+
+    def _Run(self, function, args, kwargs):
+        try:
+            self._value = function(*args, **kwargs)
+        except:
+            self._exc_info = sys.exc_info()
+
+        # Same as multiprocessing: the callback is called before the result is ready
+        try:
+            if self._exc_info is None and self._callback is not None:
+                self._callback(self._value)
+        finally:
+            self._event.set()
+
+
+
+def _ExecuteAsync(function, args, kwargs, callback):
+    '''
+    :rtype: AsyncExecuteResult
+    :returns:
+        The result of calling function(*args, **kwargs) in a new thread.
+    '''
+    result = AsyncExecuteResult(callback)
+    thread = threading.Thread(target=result._Run, args=(function, args, kwargs))
+    thread.daemon = True
+    thread.start()
+    return result
+
+
+
+#===================================================================================================
+# Execute2Async
+#===================================================================================================
+def Execute2Async(command_line, callback=None, **kwargs):
+    '''
+    Same as ben10.execute.Execute2 (accepting the same parameters), but returns immediately.
+
+    .. note:: The output callback is called in the thread executing the process.
+
+    :param callable callback:
+        Called with the result of Execute2 when the execution finishes without errors.
+
+    :rtype: AsyncExecuteResult
+    :returns:
+        The result of Execute2: tuple(list(unicode), int).
+    '''
+    return _ExecuteAsync(Execute2, (command_line,), kwargs, callback)
+
+
+
+#===================================================================================================
+# GetSubprocessOutputAsync
+#===================================================================================================
+def GetSubprocessOutputAsync(command_line, callback=None, **kwargs):
+    '''
+    Same as ben10.execute.GetSubprocessOutput (accepting the same parameters), but returns
+    immediately.
+
+    :param callable callback:
+        Called with the result of GetSubprocessOutput when the execution finishes without errors.
+
+    :rtype: AsyncExecuteResult
+    :returns:
+        The result of GetSubprocessOutput: tuple(unicode|str, int).
+    '''
+    return _ExecuteAsync(GetSubprocessOutput, (command_line,), kwargs, callback)
+
+
+
+#===================================================================================================
+# WaitProcessAsync
+#===================================================================================================
+def WaitProcessAsync(popen, callback=None):
+    '''
+    Waits for a process (e.g. created by ben10.execute.ProcessOpen) without blocking.
+
+    .. note:: ProcessOpen itself doesn't wait for the process, this replaces only the calls to
+        popen.wait() and popen.communicate().
+
+    :param subprocess.Popen popen:
+
+    :param callable callback:
+        Called with the result when the process finishes.
+
+    :rtype: AsyncExecuteResult
+    :returns:
+        The result of popen.communicate(): tuple(str|None, str|None). The return code is available
+        in popen.returncode.
+    '''
+    return _ExecuteAsync(popen.communicate, (), {}, callback)
@@ -1,4 +1,7 @@
 from __future__ import unicode_literals
 from _filesystem import *
+from _filesystem_copy import (COPY_STRATEGY_BUFFERED, COPY_STRATEGY_COPY_FILE_RANGE,
+    COPY_STRATEGY_REFLINK, COPY_STRATEGY_SENDFILE, CopyFileContents)
 from _filesystem_exceptions import *
 from _fileutils import OpenReadOnlyFile
+from _hash_index import HashIndex
@@ -16,10 +16,12 @@ These functions abstract file location, most of them work for either local, ftp
 #===================================================================================================
 # FTP LIMITATIONS:
 #===================================================================================================
-    Right now, all functions that require a FTP connection are ALWAYS creating and closing a FTP
-    Host.
+    FTP connections are kept open and reused by the following operations on the same server (see
+    _filesystem_remote.FTPHostPool), and the results of IsFile, IsDir and ListFiles may be cached
+    for a few seconds (see _filesystem_remote.RemoteMetadataCache, disabled by default).
 
-    Keep in mind that this process can be slow if you perform many of such operations in sequence.
+    Still, each operation not answered by the cache is a round-trip to the server, so keep in mind
+    that this process can be slow if you perform many of such operations in sequence.
 '''
 
 
@@ -222,8 +224,12 @@ def CreateMD5(source_filename, target_filename=None):
         # If using a local file, we can give Md5Hex the filename
         md5_contents = Md5Hex(filename=source_filename)
     else:
-        # Md5Hex can't handle remote files, we open it and pray we won't run out of memory.
-        md5_contents = Md5Hex(contents=GetFileContents(source_filename, binary=True))
+        # Remote files are hashed while being read, without keeping the contents in memory.
+        stream = OpenFile(source_filename, binary=True)
+        try:
+            md5_contents = Md5Hex(stream=stream)
+        finally:
+            stream.close()
 
     # Write MD5 hash to a file
     CreateFile(target_filename, md5_contents)
@@ -234,7 +240,13 @@ MD5_SKIP = 'md5_skip'  # Returned to show that a file copy was skipped because i
 #===================================================================================================
 # CopyFile
 #===================================================================================================
-def CopyFile(source_filename, target_filename, override=True, md5_check=False, copy_symlink=True):
+def CopyFile(
+    source_filename,
+    target_filename,
+    override=True,
+    md5_check=False,
+    copy_symlink=True,
+    hash_index=None):
     '''
     Copy a file from source to target.
 
@@ -252,9 +264,18 @@ def CopyFile(source_filename, target_filename, override=True, md5_check=False, c
 
         If any file is missing (source, target or md5), the copy will always be made.
 
+        If `hash_index` is given and there is no source md5 file, local files are compared using
+        the digests from the index instead.
+
     :param  copy_symlink:
         @see _DoCopyFile
 
+    :param HashIndex hash_index:
+        Index used to obtain (and record) the md5 of local source and target files when md5_check
+        is True, so files whose stat didn't change are not read again.
+
+        When downloading a remote file the md5 of the target is calculated while downloading.
+
     :raises FileAlreadyExistsError:
         If target_filename already exists, and override is False
 
@@ -265,9 +286,10 @@ def CopyFile(source_filename, target_filename, override=True, md5_check=False, c
             source_filename: local, ftp, http
             target_filename: local, ftp
 
-    :rtype: None | MD5_SKIP
+    :rtype: unicode | None | MD5_SKIP
     :returns:
-        MD5_SKIP if the file was not copied because there was a matching .md5 file
+        MD5_SKIP if the file was not copied because there was a matching .md5 file, otherwise
+        @see _DoCopyFile
 
     .. seealso:: FTP LIMITATIONS at this module's doc for performance issues information
     '''
@@ -300,15 +322,37 @@ def CopyFile(source_filename, target_filename, override=True, md5_check=False, c
            Exists(target_filename):
             return MD5_SKIP
 
+    # Without md5 files, use the hash index to compare local files.
+    source_hash = None
+    hasher = None
+    if md5_check and hash_index is not None and source_md5_contents is None:
+        from urlparse import urlparse
+        if _UrlIsLocal(urlparse(target_filename)):
+            if _UrlIsLocal(urlparse(source_filename)):
+                source_hash = hash_index.GetMd5(source_filename)
+                if os.path.isfile(target_filename) and hash_index.GetMd5(target_filename) == source_hash:
+                    return MD5_SKIP
+            else:
+                import hashlib
+                hasher = hashlib.md5()
+
     # Copy source file
-    _DoCopyFile(source_filename, target_filename, copy_symlink=copy_symlink)
+    strategy = _DoCopyFile(source_filename, target_filename, copy_symlink=copy_symlink, hasher=hasher)
+
+    # The target now has the same contents as the source
+    if hasher is not None:
+        source_hash = unicode(hasher.hexdigest())
+    if source_hash is not None:
+        hash_index.SetMd5(target_filename, source_hash)
 
     # If we have a source_md5, but no target_md5, create the target_md5 file
     if md5_check and source_md5_contents is not None and source_md5_contents != target_md5_contents:
         CreateFile(target_md5_filename, source_md5_contents)
 
+    return strategy
 
-def _DoCopyFile(source_filename, target_filename, copy_symlink=True):
+
+def _DoCopyFile(source_filename, target_filename, copy_symlink=True, hasher=None):
     '''
     :param unicode source_filename:
         The source filename.
@@ -321,6 +365,15 @@ def _DoCopyFile(source_filename, target_filename, copy_symlink=True):
     :param  copy_symlink:
         @see _CopyFileLocal
 
+    :param hasher:
+        @see _filesystem_remote.DownloadUrlToFile
+        Only used when downloading remote files.
+
+    :rtype: unicode|None
+    :returns:
+        The strategy used to copy the contents of local files (see CopyFileContents), or None if a
+        symlink was created or a remote file was involved.
+
     :raises FileNotFoundError:
         If source_filename does not exist
     '''
@@ -336,7 +389,7 @@ def _DoCopyFile(source_filename, target_filename, copy_symlink=True):
 
         if _UrlIsLocal(target_url):
             # local to local
-            _CopyFileLocal(source_filename, target_filename, copy_symlink=copy_symlink)
+            return _CopyFileLocal(source_filename, target_filename, copy_symlink=copy_symlink)
         elif target_url.scheme in ['ftp']:
             # local to remote
             from _filesystem_remote import FTPUploadFileToUrl
@@ -349,7 +402,7 @@ def _DoCopyFile(source_filename, target_filename, copy_symlink=True):
         if _UrlIsLocal(target_url):
             # HTTP/FTP to local
             from _filesystem_remote import DownloadUrlToFile
-            DownloadUrlToFile(source_url, target_filename)
+            DownloadUrlToFile(source_url, target_filename, hasher=hasher)
         else:
             # HTTP/FTP to other ==> NotImplemented
             from ._filesystem_exceptions import NotImplementedProtocol
@@ -374,6 +427,11 @@ def _CopyFileLocal(source_filename, target_filename, copy_symlink=True):
         a symlink.
 
         If False, the file being linked will be copied instead.
+
+    :rtype: unicode|None
+    :returns:
+        The strategy used to copy the contents (see CopyFileContents), or None if a symlink was
+        created.
     '''
     import shutil
     try:
@@ -390,6 +448,7 @@ def _CopyFileLocal(source_filename, target_filename, copy_symlink=True):
             # >>> Obtain the relative path from link to source_filename (linkto)
             source_filename = ReadLink(source_filename)
             CreateLink(source_filename, target_filename)
+            return None
         else:
             # shutil can't copy links in Windows, so we must find the real file manually
             if sys.platform == 'win32':
@@ -400,8 +459,10 @@ def _CopyFileLocal(source_filename, target_filename, copy_symlink=True):
                     else:
                         source_filename = os.path.join(os.path.dirname(source_filename), link)
 
-            shutil.copyfile(source_filename, target_filename)
+            from ._filesystem_copy import CopyFileContents
+            strategy = CopyFileContents(source_filename, target_filename)
             shutil.copymode(source_filename, target_filename)
+            return strategy
     except Exception, e:
         Reraise(e, 'While executiong _filesystem._CopyFileLocal(%s, %s)' % (source_filename, target_filename))
 
@@ -410,7 +471,15 @@ def _CopyFileLocal(source_filename, target_filename, copy_symlink=True):
 #===================================================================================================
 # CopyFiles
 #===================================================================================================
-def CopyFiles(source_dir, target_dir, create_target_dir=False, md5_check=False):
+def CopyFiles(
+    source_dir,
+    target_dir,
+    create_target_dir=False,
+    md5_check=False,
+    workers=1,
+    use_processes=False,
+    max_in_flight=None,
+    hash_index=None):
     '''
     Copy files from the given source to the target.
 
@@ -435,6 +504,18 @@ def CopyFiles(source_dir, target_dir, create_target_dir=False, md5_check=False):
     :param bool md5_check:
         .. seealso:: CopyFile
 
+    :param HashIndex hash_index:
+        .. seealso:: CopyFile
+
+    :param int workers:
+        .. seealso:: CopyFilesX
+
+    :param bool use_processes:
+        .. seealso:: CopyFilesX
+
+    :param int max_in_flight:
+        .. seealso:: CopyFilesX
+
     :raises DirectoryNotFoundError:
         If target_dir does not exist, and create_target_dir is False
 
@@ -442,8 +523,6 @@ def CopyFiles(source_dir, target_dir, create_target_dir=False, md5_check=False):
 
     .. seealso:: FTP LIMITATIONS at this module's doc for performance issues information
     '''
-    import fnmatch
-
     # Check if we were given a directory or a directory with mask
     if IsDir(source_dir):
         # Yes, it's a directory, copy everything from it
@@ -468,6 +547,29 @@ def CopyFiles(source_dir, target_dir, create_target_dir=False, md5_check=False):
         return
 
     # Copy files
+    _CopyFileList(
+        _IterCopyFilesPlan(source_dir, target_dir, source_mask, filenames, md5_check),
+        md5_check=md5_check,
+        hash_index=hash_index,
+        workers=workers,
+        use_processes=use_processes,
+        max_in_flight=max_in_flight,
+    )
+
+
+def _IterCopyFilesPlan(source_dir, target_dir, source_mask, filenames, md5_check):
+    '''
+    Yields the (source, target) pairs of files that CopyFiles must copy, creating the target
+    directories as the source tree is traversed (each directory is created before any of its
+    files is yielded).
+
+    .. seealso:: CopyFiles
+        for param docs
+
+    :rtype: iter(tuple(unicode,unicode))
+    '''
+    import fnmatch
+
     for i_filename in filenames:
         if md5_check and i_filename.endswith('.md5'):
             continue  # md5 files will be copied by CopyFile when copying their associated files
@@ -478,16 +580,92 @@ def CopyFiles(source_dir, target_dir, create_target_dir=False, md5_check=False):
 
             if IsDir(source_path):
                 # If we found a directory, copy it recursively
-                CopyFiles(source_path, target_path, create_target_dir=True, md5_check=md5_check)
+                if not IsDir(target_path):
+                    CreateDirectory(target_path)
+                for i_pair in _IterCopyFilesPlan(
+                        source_path, target_path, '*', ListFiles(source_path), md5_check):
+                    yield i_pair
             else:
-                CopyFile(source_path, target_path, md5_check=md5_check)
+                yield source_path, target_path
+
+
+def _CopyFileList(
+    files,
+    md5_check=False,
+    hash_index=None,
+    workers=1,
+    use_processes=False,
+    max_in_flight=None):
+    '''
+    Copies each (source, target) pair in the given iterable using CopyFile, either serially or
+    through a pool of workers.
+
+    Target directories are expected to exist already.
+
+    :param iter(tuple(unicode,unicode)) files:
+        The files to copy.
+
+    :param bool md5_check:
+        .. seealso:: CopyFile
+
+    :param HashIndex hash_index:
+        .. seealso:: CopyFile
+
+    :param int workers:
+        .. seealso:: CopyFilesX
+
+    :param bool use_processes:
+        .. seealso:: CopyFilesX
+
+    :param int max_in_flight:
+        .. seealso:: CopyFilesX
+    '''
+    if workers <= 1:
+        for i_source_filename, i_target_filename in files:
+            CopyFile(i_source_filename, i_target_filename, md5_check=md5_check, hash_index=hash_index)
+        return
+
+    if use_processes and hash_index is not None:
+        raise ValueError('hash_index can only be shared with thread workers (use_processes=False)')
+
+    from collections import deque
+    from multiprocessing.pool import Pool, ThreadPool
+
+    if max_in_flight is None:
+        max_in_flight = workers * 4
+
+    pool = (Pool if use_processes else ThreadPool)(workers)
+    try:
+        # Keep at most max_in_flight copies queued in the pool: waiting for the oldest one also
+        # re-raises any error that happened while copying it.
+        pending = deque()
+        for i_source_filename, i_target_filename in files:
+            if len(pending) >= max_in_flight:
+                pending.popleft().get()
+            pending.append(
+                pool.apply_async(
+                    CopyFile,
+                    (i_source_filename, i_target_filename),
+                    dict(md5_check=md5_check, hash_index=hash_index)
+                )
+            )
+
+        while pending:
+            pending.popleft().get()
+    except:
+        pool.terminate()
+        raise
+    else:
+        pool.close()
+    finally:
+        pool.join()
 
 
 
 #===================================================================================================
 # CopyFilesX
 #===================================================================================================
-def CopyFilesX(file_mapping):
+def CopyFilesX(file_mapping, workers=1, use_processes=False, max_in_flight=None):
     '''
     Copies files into directories, according to a file mapping
 
@@ -495,24 +673,36 @@ def CopyFilesX(file_mapping):
         A list of mappings between the directory in the target and the source.
         For syntax, @see: ExtendedPathMask
 
+    :param int workers:
+        Number of workers used to copy files concurrently. With 1 (default) files are copied
+        serially in the calling thread.
+
+        Copying in parallel pays off when the copy is bound by per-file latency (many small files,
+        network shares) instead of disk throughput.
+
+    :param bool use_processes:
+        If True, uses a process pool instead of a thread pool. Only used when workers > 1.
+
+    :param int max_in_flight:
+        Maximum number of files queued for copying at any given time. Defaults to 4 * workers.
+
     :rtype: list(tuple(unicode,unicode))
     :returns:
         List of files copied. (source_filename, target_filename)
 
     .. seealso:: FTP LIMITATIONS at this module's doc for performance issues information
     '''
-    # List files that match the mapping
+    # List files that match the mapping. The whole listing is done before copying, since the
+    # target may be inside one of the source directories.
     files = []
     for i_target_path, i_source_path_mask in file_mapping:
         tree_recurse, flat_recurse, dirname, in_filters, out_filters = ExtendedPathMask.Split(i_source_path_mask)
 
         _AssertIsLocal(dirname)
 
-        filenames = FindFiles(dirname, in_filters, out_filters, tree_recurse)
+        # Do not copy dirs
+        filenames = IterFindFiles(dirname, in_filters, out_filters, tree_recurse, include_dirs=False)
         for i_source_filename in filenames:
-            if os.path.isdir(i_source_filename):
-                continue  # Do not copy dirs
-
             i_target_filename = i_source_filename[len(dirname) + 1:]
             if flat_recurse:
                 i_target_filename = os.path.basename(i_target_filename)
@@ -523,13 +713,21 @@ def CopyFilesX(file_mapping):
                 StandardizePath(i_target_filename)
             ))
 
-    # Copy files
-    for i_source_filename, i_target_filename in files:
-        # Create target dir if necessary
+    # Create target dirs (only once for each directory)
+    created_dirs = set()
+    for _i_source_filename, i_target_filename in files:
         target_dir = os.path.dirname(i_target_filename)
-        CreateDirectory(target_dir)
+        if target_dir not in created_dirs:
+            CreateDirectory(target_dir)
+            created_dirs.add(target_dir)
 
-        CopyFile(i_source_filename, i_target_filename)
+    # Copy files
+    _CopyFileList(
+        files,
+        workers=workers,
+        use_processes=use_processes,
+        max_in_flight=max_in_flight,
+    )
 
     return files
 
@@ -700,19 +898,25 @@ def CopyDirectory(source_dir, target_dir, override=False):
 #===================================================================================================
 def DeleteFile(target_filename):
     '''
-    Deletes the given local filename.
+    Deletes the given filename.
 
     .. note:: If file doesn't exist this method has no effect.
 
     :param unicode target_filename:
-        A local filename
+        A local or ftp filename
 
     :raises NotImplementedForRemotePathError:
-        If trying to delete a non-local path
+        If trying to delete a non-local, non-ftp path
 
     :raises FileOnlyActionError:
         Raised when filename refers to a directory.
     '''
+    from urlparse import urlparse
+    target_url = urlparse(target_filename)
+    if target_url.scheme == 'ftp':
+        from _filesystem_remote import FTPDeleteFile
+        return FTPDeleteFile(target_url)
+
     _AssertIsLocal(target_filename)
 
     try:
@@ -1734,6 +1938,9 @@ def MatchMasks(filename, masks):
     :param list(str) masks: The patterns to search in the filename.
     :return bool:
         True if the filename has matched with one pattern, False otherwise.
+
+    .. seealso:: _CompileMasks
+        To match many filenames against the same masks.
     '''
     import fnmatch
 
@@ -1747,6 +1954,35 @@ def MatchMasks(filename, masks):
 
 
 
+def _CompileMasks(masks):
+    '''
+    Compiles the given fnmatch patterns into a single regular expression.
+
+    :param list(str)|str masks:
+        The patterns to match.
+
+    :return callable:
+        A function that receives a filename and returns True if it matches any of the masks (with
+        the same semantics as fnmatch.fnmatch).
+    '''
+    import fnmatch
+
+    if not isinstance(masks, (list, tuple)):
+        masks = [masks]
+
+    if not masks:
+        return lambda filename: False
+
+    normcase = os.path.normcase
+    regex = re.compile('|'.join('(?:%s)' % fnmatch.translate(normcase(i)) for i in masks))
+
+    if normcase('A') == 'A':
+        # Case sensitive platforms: avoid calling normcase for every filename
+        return lambda filename: regex.match(filename) is not None
+    return lambda filename: regex.match(normcase(filename)) is not None
+
+
+
 #===================================================================================================
 # FindFiles
 #===================================================================================================
@@ -1762,6 +1998,42 @@ def FindFiles(dir_, in_filters=None, out_filters=None, recursive=True, include_r
     :param bool standard_paths: if True, always uses unix path separators "/"
     :return list(str):
         A list of strings with the files that matched (with the full path in the filesystem).
+
+    .. seealso:: IterFindFiles
+        To obtain the files while the directory tree is being traversed.
+    '''
+    return list(IterFindFiles(
+        dir_,
+        in_filters=in_filters,
+        out_filters=out_filters,
+        recursive=recursive,
+        include_root_dir=include_root_dir,
+        standard_paths=standard_paths,
+    ))
+
+
+
+def IterFindFiles(
+    dir_,
+    in_filters=None,
+    out_filters=None,
+    recursive=True,
+    include_root_dir=True,
+    standard_paths=False,
+    include_dirs=True):
+    '''
+    Iterator version of FindFiles: yields the matching paths as the directory tree is traversed
+    (in the same order as FindFiles).
+
+    Uses scandir (when available) so the type of each entry is obtained while listing the
+    directory, without an extra stat call per entry.
+
+    :param include_dirs:
+        If False, only files are yielded (directories are still traversed). This is cheaper than
+        checking os.path.isdir for each path found.
+
+    .. seealso:: FindFiles
+        for the other param docs
     '''
     # all files
     if in_filters is None:
@@ -1770,33 +2042,109 @@ def FindFiles(dir_, in_filters=None, out_filters=None, recursive=True, include_r
     if out_filters is None:
         out_filters = []
 
-    result = []
-
-    # maintain just files that don't have a pattern that match with out_filters
-    # walk through all directories based on dir
-    for dir_root, directories, filenames in os.walk(dir_):
+    match_in = _CompileMasks(in_filters)
+    match_out = _CompileMasks(out_filters)
 
-        for i_directory in directories[:]:
-            if MatchMasks(i_directory, out_filters):
-                directories.remove(i_directory)
-
-        for filename in directories + filenames:
-            if MatchMasks(filename, in_filters) and not MatchMasks(filename, out_filters):
-                result.append(os.path.join(dir_root, filename))
+    if include_root_dir:
+        strip_prefix = 0
+    else:
+        strip_prefix = len(dir_) + 1
+
+    pending_dirs = [dir_]
+    while pending_dirs:
+        dir_root = pending_dirs.pop()
+        entries = _ScanDir(dir_root)
+        if entries is None:
+            continue  # Same as os.walk: ignore directories that can't be listed
+
+        # maintain just files that don't have a pattern that match with out_filters
+        directories = []
+        filenames = []
+        for i_name, i_is_dir, i_is_link in entries:
+            if i_is_dir:
+                if not match_out(i_name):
+                    directories.append((i_name, i_is_link))
+            else:
+                filenames.append(i_name)
+
+        found = [(i_name, True) for i_name, _i_is_link in directories]
+        found += [(i_name, False) for i_name in filenames]
+        for i_name, i_is_dir in found:
+            if i_is_dir and not include_dirs:
+                continue
+            if match_in(i_name) and not match_out(i_name):
+                path = os.path.join(dir_root, i_name)[strip_prefix:]
+                if standard_paths:
+                    path = StandardizePath(path)
+                yield path
 
         if not recursive:
             break
 
-    if not include_root_dir:
-        # Remove root dir from all paths
-        dir_prefix = len(dir_) + 1
-        result = [file[dir_prefix:] for file in result]
+        # Same as os.walk: do not follow links to directories (reversed so they are visited in
+        # the listing order).
+        pending_dirs.extend(
+            os.path.join(dir_root, i_name)
+            for i_name, i_is_link in reversed(directories)
+            if not i_is_link
+        )
+
 
-    if standard_paths:
-        from ben10.filesystem import StandardizePath
-        result = map(StandardizePath, result)
 
-    return result
+def _ScanDir(directory):
+    '''
+    Lists a local directory.
+
+    :param unicode directory:
+
+    :rtype: list(tuple(unicode,bool,bool)) | None
+    :returns:
+        For each entry in the directory: its name, whether it is a directory (following links)
+        and whether it is a link.
+
+        Returns None if the directory can't be listed.
+    '''
+    scandir = _GetScanDir()
+    try:
+        if scandir is None:
+            return [
+                (
+                    i_name,
+                    os.path.isdir(os.path.join(directory, i_name)),
+                    os.path.islink(os.path.join(directory, i_name)),
+                )
+                for i_name in os.listdir(directory)
+            ]
+
+        result = []
+        for i_entry in scandir(directory):
+            try:
+                is_dir = i_entry.is_dir()
+            except OSError:
+                is_dir = False
+            result.append((i_entry.name, is_dir, i_entry.is_symlink()))
+        return result
+    except OSError:
+        return None
+
+
+
+_scandir = []
+def _GetScanDir():
+    '''
+    :return callable|None:
+        os.scandir or the function from the "scandir" backport (Python 2), or None if neither is
+        available.
+    '''
+    if not _scandir:
+        scandir = getattr(os, 'scandir', None)
+        if scandir is None:
+            try:
+                from scandir import scandir
+            except ImportError:
+                scandir = None
+        _scandir.append(scandir)
+    return _scandir[0]
 
 
 
@@ -0,0 +1,198 @@
+'''
+Copy of local file contents using the fastest mechanism available in the current platform.
+
+On Linux the contents are copied inside the kernel, without passing through Python buffers. These
+strategies are tried in order:
+
+    - reflink: the target shares the source blocks (copy-on-write), through the FICLONE ioctl.
+        Only supported by some filesystems (btrfs, xfs, ...).
+    - copy_file_range: in-kernel copy (may also be accelerated by the filesystem, such as NFS
+        server-side copies).
+    - sendfile: in-kernel copy, supported by older kernels.
+
+When none of them is available (or on other platforms) the contents are copied with buffered
+read/write calls (the same as shutil.copyfile). Files reporting a size of 0 (such as the files in
+/proc, whose contents are generated when read) are always copied with read/write calls.
+'''
+from __future__ import unicode_literals
+import errno
+import os
+import sys
+
+
+
+COPY_STRATEGY_REFLINK = 'reflink'
+COPY_STRATEGY_COPY_FILE_RANGE = 'copy_file_range'
+COPY_STRATEGY_SENDFILE = 'sendfile'
+COPY_STRATEGY_BUFFERED = 'buffered'
+
+# Errors meaning that a strategy is not supported for the given files (the next one is tried).
+_UNSUPPORTED_ERRNOS = set([
+    errno.EINVAL,
+    errno.ENOSYS,
+    errno.EXDEV,
+    errno.ENOTTY,
+    errno.EOPNOTSUPP,
+    getattr(errno, 'ENOTSUP', errno.EOPNOTSUPP),
+    errno.EBADF,
+])
+
+# Linux ioctl to clone a file (_IOW(0x94, 9, int))
+_FICLONE = 0x40049409
+
+# Maximum number of bytes requested from the kernel in a single call
+_MAX_CHUNK_SIZE = 2 ** 30
+
+# Chunk size used in the buffered copy
+_BUFFER_SIZE = 1024 * 1024
+
+
+
+#===================================================================================================
+# CopyFileContents
+#===================================================================================================
+def CopyFileContents(source_filename, target_filename):
+    '''
+    Copies the contents of a local file to another local file (which is created or truncated).
+
+    Only the contents are copied, use shutil.copymode/copystat to copy permissions and times.
+
+    :param unicode source_filename:
+
+    :param unicode target_filename:
+
+    :rtype: unicode
+    :returns:
+        The strategy used to copy the contents, one of the COPY_STRATEGY_XXX constants.
+
+    :raises shutil.Error:
+        If source and target are the same file.
+    '''
+    import shutil
+
+    if os.path.exists(target_filename) and os.path.samefile(source_filename, target_filename):
+        raise shutil.Error('`%s` and `%s` are the same file' % (source_filename, target_filename))
+
+    with open(source_filename, 'rb') as iss:
+        with open(target_filename, 'wb') as oss:
+            size = os.fstat(iss.fileno()).st_size
+
+            # The in-kernel strategies copy only `size` bytes
+            strategies = _GetCopyStrategies() if size > 0 else []
+            for strategy, copy_function in strategies:
+                try:
+                    copy_function(iss.fileno(), oss.fileno(), size)
+                    return strategy
+                except (IOError, OSError), e:
+                    if e.errno not in _UNSUPPORTED_ERRNOS:
+                        raise
+
+                # Discard anything a failed strategy may have written before trying the next one
+                iss.seek(0)
+                oss.seek(0)
+                oss.truncate()
+
+            shutil.copyfileobj(iss, oss, _BUFFER_SIZE)
+            return COPY_STRATEGY_BUFFERED
+
+
+
+def _GetCopyStrategies():
+    '''
+    :rtype: list(tuple(unicode,callable))
+    :returns:
+        The in-kernel copy strategies available in this platform, in order of preference, as pairs
+        (strategy, copy_function(source_fd, target_fd, size)).
+    '''
+    if not sys.platform.startswith('linux'):
+        return []
+
+    result = [(COPY_STRATEGY_REFLINK, _Reflink)]
+
+    libc = _GetLibC()
+    if libc is not None:
+        if hasattr(libc, 'copy_file_range'):
+            result.append((COPY_STRATEGY_COPY_FILE_RANGE, _CopyFileRange))
+        if hasattr(libc, 'sendfile'):
+            result.append((COPY_STRATEGY_SENDFILE, _SendFile))
+
+    return result
+
+
+
+_libc = []
+def _GetLibC():
+    '''
+    :return ctypes.CDLL|None:
+        The C library (with the argument types of the functions used here configured), or None if
+        it can't be loaded.
+    '''
+    if not _libc:
+        try:
+            import ctypes
+            libc = ctypes.CDLL(None, use_errno=True)
+        except (ImportError, OSError):
+            libc = None
+        else:
+            if hasattr(libc, 'copy_file_range'):
+                libc.copy_file_range.restype = ctypes.c_ssize_t
+                libc.copy_file_range.argtypes = [
+                    ctypes.c_int,
+                    ctypes.c_void_p,
+                    ctypes.c_int,
+                    ctypes.c_void_p,
+                    ctypes.c_size_t,
+                    ctypes.c_uint,
+                ]
+            if hasattr(libc, 'sendfile'):
+                libc.sendfile.restype = ctypes.c_ssize_t
+                libc.sendfile.argtypes = [
+                    ctypes.c_int,
+                    ctypes.c_int,
+                    ctypes.c_void_p,
+                    ctypes.c_size_t,
+                ]
+        _libc.append(libc)
+    return _libc[0]
+
+
+
+def _Reflink(source_fd, target_fd, size):
+    import fcntl
+    fcntl.ioctl(target_fd, _FICLONE, source_fd)
+
+
+def _CopyFileRange(source_fd, target_fd, size):
+    libc = _GetLibC()
+    _CopyWithSysCall(lambda count: libc.copy_file_range(source_fd, None, target_fd, None, count, 0), size)
+
+
+def _SendFile(source_fd, target_fd, size):
+    libc = _GetLibC()
+    _CopyWithSysCall(lambda count: libc.sendfile(target_fd, source_fd, None, count), size)
+
+
+def _CopyWithSysCall(sys_call, size):
+    '''
+    Calls a copy system call (that advances the file offsets) until `size` bytes are copied or the
+    end of the source file is reached.
+
+    :param callable sys_call:
+        Receives the number of bytes to copy, returns the number of bytes copied (-1 on errors).
+
+    :param int size:
+        The number of bytes to copy.
+    '''
+    import ctypes
+
+    copied = 0
+    while copied < size:
+        count = sys_call(min(size - copied, _MAX_CHUNK_SIZE))
+        if count < 0:
+            error = ctypes.get_errno()
+            if error == errno.EINTR:
+                continue
+            raise OSError(error, os.strerror(error))
+        if count == 0:
+            break  # Source file was truncated while copying
+        copied += count
@@ -104,6 +104,28 @@ class FileOnlyActionError(FileError):
         return 'Action performed over "%s" only possible with a file.' % filename
 
 
+#===================================================================================================
+# DownloadChecksumError
+#===================================================================================================
+class DownloadChecksumError(FileError):
+    '''
+    Raised when the digest of a downloaded file does not match the expected one.
+    '''
+
+    def __init__(self, filename, expected_digest, obtained_digest):
+        self.expected_digest = expected_digest
+        self.obtained_digest = obtained_digest
+        FileError.__init__(self, filename)
+
+    def GetMessage(self, filename):
+        return 'Checksum mismatch downloading "%s": expected %s, obtained %s.' % (
+            filename,
+            self.expected_digest,
+            self.obtained_digest,
+        )
+
+
+
 #===================================================================================================
 # MultipleFilesNotFound
 #===================================================================================================
@@ -1,8 +1,10 @@
 from __future__ import unicode_literals
-from contextlib import closing
+from contextlib import contextmanager
 from ftputil.error import FTPIOError, FTPOSError, PermanentError
+import atexit
 import ftplib
 import ftputil
+import os
 
 
 
@@ -45,6 +47,10 @@ class _MyPassiveFTP(_MyFTP):
         self.set_pasv(True)
 
 
+# Session factory (active or passive FTP) that worked for each (host, port, user), so the mode is
+# only negotiated once.
+_negotiated_session_factories = {}
+
 def FTPHost(url):
     '''
     Create an ftputil.FTPHost instance at the target url. Configure the host to correctly use the
@@ -67,9 +73,15 @@ def FTPHost(url):
     try:
         import sys
 
+        key = _GetFTPHostKey(url)
+        session_factory = _negotiated_session_factories.get(key)
+        if session_factory is not None:
+            return create_host(session_factory=session_factory)
+
         # In Windows, use Active FTP by default
         if sys.platform == 'win32':
-            host = create_host(session_factory=_MyFTP)
+            session_factory = _MyFTP
+            host = create_host(session_factory=session_factory)
 
             # Check if a simple operation fails in active ftp, if it does, switch to passive ftp
             try:
@@ -78,18 +90,22 @@ def FTPHost(url):
                 if e.errno in [425, 500]:
                     # 425 = Errno raised when trying to a server without active ftp
                     # 500 = Illegal PORT command. In this case we also want to try passive mode.
-                    host = create_host(session_factory=_MyPassiveFTP)
-
-            return host
+                    session_factory = _MyPassiveFTP
+                    host = create_host(session_factory=session_factory)
 
         # In Linux, use Passive FTP by default
         else:
             try:
-                return create_host(session_factory=_MyPassiveFTP)
+                session_factory = _MyPassiveFTP
+                host = create_host(session_factory=session_factory)
             except:
                 # If we cant use Passive FTP, fallback to Active (this can happen if the server does
                 # not accept PASV command).
-                return create_host(session_factory=_MyFTP)
+                session_factory = _MyFTP
+                host = create_host(session_factory=session_factory)
+
+        _negotiated_session_factories[key] = session_factory
+        return host
 
 
     except FTPOSError, e:
@@ -107,6 +123,341 @@ def FTPHost(url):
 
 
 
+def _GetFTPHostKey(url):
+    '''
+    :param ParseResult url:
+
+    :rtype: tuple(unicode,int,unicode)
+    :returns:
+        The (host, port, user) identifying the connections that can be shared for the given url.
+    '''
+    return (url.hostname, url.port, url.username)
+
+
+
+#===================================================================================================
+# FTPHostPool
+#===================================================================================================
+class FTPHostPool(object):
+    '''
+    Keeps FTP connections (ftputil.FTPHost) open after being used, so the following operations on
+    the same server (and user) don't have to connect and login again.
+
+    All functions in this module obtain their connections from the pool returned by
+    GetFTPHostPool.
+
+    :ivar int created:
+        Number of connections created by the pool.
+
+    :ivar int reused:
+        Number of times a connection was reused.
+    '''
+
+    def __init__(self, idle_timeout=60.0, health_check_interval=5.0, max_idle_per_key=4):
+        '''
+        :param float idle_timeout:
+            Connections idle for more than this number of seconds are closed instead of reused.
+
+        :param float health_check_interval:
+            Connections idle for more than this number of seconds are checked (with a NOOP-like
+            command) before being reused.
+
+        :param int max_idle_per_key:
+            Maximum number of idle connections kept for each (host, port, user).
+        '''
+        import threading
+
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.max_idle_per_key = max_idle_per_key
+
+        self.created = 0
+        self.reused = 0
+
+        self._idle_hosts = {}
+        self._lock = threading.Lock()
+
+
+    def Acquire(self, url):
+        '''
+        Obtains a connection for the given url, reusing an idle one if possible.
+
+        The connection must be given back with Release.
+
+        :param ParseResult url:
+            As returned by urlparse.urlparse
+
+        :rtype: ftputil.FTPHost
+        '''
+        import time
+
+        key = _GetFTPHostKey(url)
+        while True:
+            with self._lock:
+                idle_hosts = self._idle_hosts.get(key)
+                if not idle_hosts:
+                    break
+                host, released_at = idle_hosts.pop()
+
+            idle_time = time.time() - released_at
+            if idle_time > self.idle_timeout:
+                self._Close(host)
+                continue
+
+            if idle_time > self.health_check_interval:
+                try:
+                    host.keep_alive()
+                except Exception:
+                    self._Close(host)
+                    continue
+
+            # Behave like a new connection: do not trust stats cached while the host was idle.
+            host.stat_cache.clear()
+            with self._lock:
+                self.reused += 1
+            return host
+
+        host = FTPHost(url)
+        with self._lock:
+            self.created += 1
+        return host
+
+
+    def Release(self, url, host, discard=False):
+        '''
+        Gives back a connection obtained with Acquire.
+
+        :param ParseResult url:
+            The url used to acquire the connection.
+
+        :param ftputil.FTPHost host:
+
+        :param bool discard:
+            If True the connection is closed instead of kept in the pool (for instance, when an
+            error happened while using it).
+        '''
+        import time
+
+        if not discard:
+            with self._lock:
+                idle_hosts = self._idle_hosts.setdefault(_GetFTPHostKey(url), [])
+                if len(idle_hosts) < self.max_idle_per_key:
+                    idle_hosts.append((host, time.time()))
+                    return
+        self._Close(host)
+
+
+    @contextmanager
+    def Host(self, url):
+        '''
+        Context manager that acquires a connection and releases it at the end. The connection is
+        discarded if an exception is raised.
+
+        :param ParseResult url:
+            As returned by urlparse.urlparse
+        '''
+        host = self.Acquire(url)
+        try:
+            yield host
+        except:
+            self.Release(url, host, discard=True)
+            raise
+        else:
+            self.Release(url, host)
+
+
+    def Clear(self):
+        '''
+        Closes all idle connections.
+        '''
+        with self._lock:
+            idle_hosts = self._idle_hosts
+            self._idle_hosts = {}
+
+        for i_hosts in idle_hosts.itervalues():
+            for i_host, _released_at in i_hosts:
+                self._Close(i_host)
+
+
+    @classmethod
+    def _Close(cls, host):
+        try:
+            host.close()
+        except Exception:
+            pass  # The connection may already be broken
+
+
+
+_ftp_host_pool = FTPHostPool()
+atexit.register(_ftp_host_pool.Clear)
+
+def GetFTPHostPool():
+    '''
+    :rtype: FTPHostPool
+    :returns:
+        The connection pool used by the FTP operations.
+    '''
+    return _ftp_host_pool
+
+
+
+#===================================================================================================
+# RemoteMetadataCache
+#===================================================================================================
+class RemoteMetadataCache(object):
+    '''
+    Caches the metadata of remote paths (the results of FTPIsFile, FTPIsDir and FTPListFiles), so
+    checking the same paths again (as CopyFiles and DirCache do) doesn't need a round-trip to the
+    server.
+
+    Entries expire after `ttl` seconds: changes made by other clients (or directly through an
+    FTPHost) are only seen after that. Changes made through this module (FTPCreateFile,
+    FTPCreateDirectory, FTPDeleteFile, FTPMoveDirectory and FTPUploadFileToUrl) invalidate the
+    affected paths immediately.
+
+    The cache used by the FTP operations is disabled by default: applications that can live with
+    that delay enable it with:
+
+        GetRemoteMetadataCache().ttl = 10.0
+
+    :ivar int hits:
+        Number of results obtained from the cache.
+
+    :ivar int misses:
+        Number of results that had to be obtained from the server.
+    '''
+
+    def __init__(self, ttl=10.0, max_entries=10000):
+        '''
+        :param float ttl:
+            Number of seconds an entry is valid. If 0, nothing is cached.
+
+        :param int max_entries:
+            Maximum number of entries kept. The oldest entries are discarded first.
+        '''
+        from collections import OrderedDict
+        import threading
+
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+
+        # (host key, path, kind) -> (expiration time, value)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        # host key -> set of the keys of that host in _entries (so that invalidating a path doesn't
+        # check the entries of other hosts)
+        self._host_entries = {}
+
+        # Incremented on invalidations, so results obtained while invalidating are not stored
+        self._generation = 0
+
+
+    def Get(self, url, kind, compute):
+        '''
+        :param ParseResult url:
+            A remote path.
+
+        :param unicode kind:
+            The kind of metadata (such as "isdir"), different kinds are cached separately.
+
+        :param callable compute:
+            Called (without parameters) to obtain the value from the server when it is not cached.
+
+        :returns:
+            The cached (or computed) value.
+        '''
+        import time
+
+        if self.ttl <= 0:
+            return compute()
+
+        host_key = _GetFTPHostKey(url)
+        key = (host_key, _NormalizeRemotePath(url.path), kind)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.time():
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self._generation
+
+        value = compute()
+
+        with self._lock:
+            if generation == self._generation:
+                self._entries.pop(key, None)
+                self._entries[key] = (time.time() + self.ttl, value)
+                self._host_entries.setdefault(host_key, set()).add(key)
+                while len(self._entries) > self.max_entries:
+                    old_key, _old_entry = self._entries.popitem(last=False)
+                    self._RemoveHostEntry(old_key)
+        return value
+
+
+    def Invalidate(self, url):
+        '''
+        Discards the entries of a modified path, together with the entries of its ancestors (their
+        listings may have changed) and descendants (in case a directory was moved or removed).
+
+        :param ParseResult url:
+        '''
+        host_key = _GetFTPHostKey(url)
+        path = _NormalizeRemotePath(url.path)
+
+        def IsSubPath(path, parent):
+            return path == parent or path.startswith(parent.rstrip('/') + '/')
+
+        with self._lock:
+            self._generation += 1
+            for key in list(self._host_entries.get(host_key, ())):
+                if IsSubPath(key[1], path) or IsSubPath(path, key[1]):
+                    del self._entries[key]
+                    self._RemoveHostEntry(key)
+
+
+    def Clear(self):
+        '''
+        Discards all entries.
+        '''
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._host_entries.clear()
+
+
+    def _RemoveHostEntry(self, key):
+        '''
+        Removes a key (already removed from _entries) from _host_entries.
+        '''
+        host_keys = self._host_entries[key[0]]
+        host_keys.discard(key)
+        if not host_keys:
+            del self._host_entries[key[0]]
+
+
+
+def _NormalizeRemotePath(path):
+    import posixpath
+    return posixpath.normpath('/' + path.lstrip('/'))
+
+
+
+_remote_metadata_cache = RemoteMetadataCache(ttl=0)
+
+def GetRemoteMetadataCache():
+    '''
+    :rtype: RemoteMetadataCache
+    :returns:
+        The cache used by the FTP operations (disabled until its ttl is set).
+    '''
+    return _remote_metadata_cache
+
+
+
 #===================================================================================================
 # FTPUploadFileToUrl
 #===================================================================================================
@@ -122,15 +473,31 @@ def FTPUploadFileToUrl(source_filename, target_url):
 
         A parsed url as returned by urlparse.urlparse
     '''
-    with closing(FTPHost(target_url)) as ftp_host:
-        ftp_host.upload(source_filename, target_url.path)
+    try:
+        with _ftp_host_pool.Host(target_url) as ftp_host:
+            ftp_host.upload(source_filename, target_url.path)
+    finally:
+        _remote_metadata_cache.Invalidate(target_url)
 
 
 
 #===================================================================================================
 # DownloadUrlToFile
 #===================================================================================================
-def DownloadUrlToFile(source_url, target_filename):
+# Size of the blocks read from the network
+_DOWNLOAD_BLOCK_SIZE = 64 * 1024
+
+# Number of bytes a stream downloads between saves of the resume information
+_DOWNLOAD_PROGRESS_INTERVAL = 4 * 1024 * 1024
+
+def DownloadUrlToFile(
+        source_url,
+        target_filename,
+        hasher=None,
+        streams=1,
+        resume=False,
+        expected_digest=None,
+    ):
     '''
     Downloads file in source_url to target_filename
 
@@ -139,25 +506,535 @@ def DownloadUrlToFile(source_url, target_filename):
 
     :param unicode target_filename:
         A target filename
+
+    :param hasher:
+        A hashlib object (such as hashlib.md5()) updated with the contents while they are
+        downloaded, so the digest is obtained without reading the file again.
+
+        When more than one stream is used the ranges arrive out of order, so the hasher is updated
+        by reading the file once the download finishes.
+
+    :param int streams:
+        Number of connections used to download the file, each one downloading a range of the
+        file (HTTP "Range" requests, FTP "REST" command).
+
+        A single stream is used when the server does not report the file size or does not accept
+        range requests.
+
+    :param bool resume:
+        If True, the file is downloaded into "<target_filename>.partial", together with
+        "<target_filename>.partial.progress" recording how much of each range was downloaded. These
+        files are kept when the download fails, so calling this function again continues the
+        download from where it stopped (as long as the size of the remote file did not change).
+
+    :param unicode expected_digest:
+        If given, the hex digest of the downloaded contents (computed by `hasher`, md5 if no hasher
+        is given) must match this one.
+
+    :raises DownloadChecksumError:
+        If the digest does not match `expected_digest` (the target file is removed).
     '''
-    try:
-        if source_url.scheme == 'ftp':
-            return _FTPDownload(source_url, target_filename)
+    if expected_digest is not None and hasher is None:
+        import hashlib
+        hasher = hashlib.md5()
 
-        # Use shutil for other schemes
-        iss = OpenFile(source_url)
-        try:
-            with file(target_filename, 'wb') as oss:
-                import shutil
-                shutil.copyfileobj(iss, oss)
-        finally:
-            iss.close()
+    try:
+        if streams > 1 or resume:
+            _DownloadRanges(source_url, target_filename, hasher, streams, resume)
+        elif source_url.scheme == 'ftp':
+            _FTPDownload(source_url, target_filename, hasher=hasher)
+        else:
+            _HTTPDownload(source_url, target_filename, hasher=hasher)
     except FTPIOError, e:
         if e.errno == 550:
             from _filesystem_exceptions import FileNotFoundError
             raise FileNotFoundError(source_url.path)
         raise
 
+    if expected_digest is not None:
+        obtained_digest = unicode(hasher.hexdigest())
+        if obtained_digest != expected_digest.lower():
+            os.remove(target_filename)
+            from _filesystem_exceptions import DownloadChecksumError
+            raise DownloadChecksumError(source_url.geturl(), expected_digest, obtained_digest)
+
+
+def _HTTPDownload(source_url, target_filename, hasher=None):
+    '''
+    Downloads a file using urllib (any scheme other than FTP)
+
+    .. see:: DownloadUrlToFile
+        for param docs
+    '''
+    iss = OpenFile(source_url)
+    try:
+        with file(target_filename, 'wb') as oss:
+            if hasher is None:
+                import shutil
+                shutil.copyfileobj(iss, oss)
+            else:
+                while True:
+                    data = iss.read(_DOWNLOAD_BLOCK_SIZE)
+                    if not data:
+                        break
+                    hasher.update(data)
+                    oss.write(data)
+    finally:
+        iss.close()
+
+
+def _DownloadRanges(source_url, target_filename, hasher, streams, resume):
+    '''
+    Downloads a file splitting it in ranges, downloaded in parallel into a ".partial" file which is
+    renamed to the target when complete.
+
+    .. see:: DownloadUrlToFile
+        for param docs
+    '''
+    size = _GetRemoteSize(source_url)
+    if size is None:
+        # Can't download ranges: plain download (there is nothing that can be resumed)
+        if source_url.scheme == 'ftp':
+            _FTPDownload(source_url, target_filename, hasher=hasher)
+        else:
+            _HTTPDownload(source_url, target_filename, hasher=hasher)
+        return
+
+    partial_filename = target_filename + '.partial'
+    progress_filename = partial_filename + '.progress'
+
+    progress = None
+    if resume:
+        progress = _DownloadProgress.Load(progress_filename, partial_filename, size)
+    if progress is None:
+        progress = _DownloadProgress(
+            progress_filename if resume else None,
+            size,
+            _SplitRange(size, streams),
+        )
+        with open(partial_filename, 'wb') as oss:
+            oss.truncate(size)
+        progress.Save()
+
+    pending = progress.GetPending()
+
+    # The hasher can only be updated while downloading if the contents arrive in order
+    hash_while_downloading = hasher is not None and len(progress.ranges) == 1
+    if hash_while_downloading:
+        # Contents downloaded by a previous (resumed) call
+        _UpdateHasherFromFile(hasher, partial_filename, progress.ranges[0][2])
+
+    try:
+        if len(pending) == 1:
+            _DownloadRange(
+                source_url,
+                partial_filename,
+                progress,
+                pending[0],
+                hasher if hash_while_downloading else None,
+            )
+        elif len(pending) > 1:
+            from multiprocessing.pool import ThreadPool
+            pool = ThreadPool(len(pending))
+            try:
+                pool.map(
+                    lambda index: _DownloadRange(source_url, partial_filename, progress, index),
+                    pending,
+                )
+            finally:
+                pool.close()
+                pool.join()
+    except:
+        if not resume:
+            os.remove(partial_filename)
+        raise
+
+    if hasher is not None and not hash_while_downloading:
+        _UpdateHasherFromFile(hasher, partial_filename, size)
+
+    if resume:
+        os.remove(progress_filename)
+    if os.path.isfile(target_filename) and os.name == 'nt':
+        os.remove(target_filename)  # os.rename can't replace files on Windows
+    os.rename(partial_filename, target_filename)
+
+
+def _SplitRange(size, streams):
+    '''
+    :param int size:
+    :param int streams:
+
+    :rtype: list(list(int))
+    :returns:
+        Ranges [start, end, downloaded] (end exclusive) covering `size` bytes.
+    '''
+    streams = max(1, min(streams, size // _DOWNLOAD_BLOCK_SIZE or 1))
+    bounds = [size * i // streams for i in xrange(streams + 1)]
+    return [[bounds[i], bounds[i + 1], 0] for i in xrange(streams)]
+
+
+def _UpdateHasherFromFile(hasher, filename, size):
+    '''
+    Updates the hasher with the first `size` bytes of the given file.
+    '''
+    with open(filename, 'rb') as iss:
+        while size > 0:
+            data = iss.read(min(size, _DOWNLOAD_BLOCK_SIZE))
+            if not data:
+                break
+            hasher.update(data)
+            size -= len(data)
+
+
+def _DownloadRange(source_url, partial_filename, progress, index, hasher=None):
+    '''
+    Downloads the missing part of one of the ranges of `progress` into the partial file.
+
+    :param ParseResult source_url:
+    :param unicode partial_filename:
+    :param _DownloadProgress progress:
+    :param int index:
+        Index of the range in `progress.ranges`.
+    :param hasher:
+        Updated with the downloaded contents.
+    '''
+    start, end, downloaded = progress.ranges[index]
+
+    with open(partial_filename, 'r+b') as oss:
+        oss.seek(start + downloaded)
+        if source_url.scheme == 'ftp':
+            iss = _FTPRangeFile(source_url, start + downloaded)
+        else:
+            iss = _OpenHTTPRange(source_url, start + downloaded, end)
+        try:
+            unsaved = 0
+            while start + downloaded < end:
+                data = iss.read(min(end - start - downloaded, _DOWNLOAD_BLOCK_SIZE))
+                if not data:
+                    raise IOError(
+                        'Connection closed while downloading "%s" (%d of %d bytes received)' % (
+                            source_url.geturl(), downloaded, end - start)
+                    )
+                oss.write(data)
+                if hasher is not None:
+                    hasher.update(data)
+                downloaded += len(data)
+                unsaved += len(data)
+
+                if unsaved >= _DOWNLOAD_PROGRESS_INTERVAL:
+                    oss.flush()
+                    progress.Update(index, downloaded)
+                    unsaved = 0
+        finally:
+            iss.close()
+            oss.flush()
+            progress.Update(index, downloaded)
+
+
+def _GetRemoteSize(source_url):
+    '''
+    :param ParseResult source_url:
+
+    :rtype: int|None
+    :returns:
+        The size of the remote file, or None if unknown or if the server does not accept range
+        requests.
+    '''
+    if source_url.scheme == 'ftp':
+        with _ftp_host_pool.Host(source_url) as ftp_host:
+            return ftp_host.path.getsize(source_url.path)
+
+    import urllib2
+    request = urllib2.Request(source_url.geturl())
+    request.get_method = lambda: 'HEAD'
+    try:
+        response = urllib2.urlopen(request)
+    except urllib2.HTTPError:
+        return None  # The plain download reports the error
+    try:
+        headers = response.info()
+        if headers.get('Accept-Ranges', '').lower() != 'bytes':
+            return None
+        content_length = headers.get('Content-Length')
+        if not content_length:
+            return None
+        return int(content_length)
+    finally:
+        response.close()
+
+
+def _OpenHTTPRange(source_url, start, end):
+    '''
+    :rtype: file-like
+    :returns:
+        The response to a request of the bytes [start, end) of the given url.
+    '''
+    import urllib2
+    request = urllib2.Request(source_url.geturl())
+    request.add_header('Range', 'bytes=%d-%d' % (start, end - 1))
+    response = urllib2.urlopen(request)
+    if response.getcode() != 206:
+        response.close()
+        raise IOError('Server ignored the range request for "%s"' % source_url.geturl())
+    return response
+
+
+
+#===================================================================================================
+# _FTPRangeFile
+#===================================================================================================
+class _FTPRangeFile(object):
+    '''
+    Reads a remote file starting at the given offset (through the FTP "REST" command).
+
+    Uses a dedicated ftplib session (not shared with the connection pool), since the transfer is
+    usually aborted before reaching the end of the file, leaving the session in an unknown state.
+    '''
+
+    def __init__(self, url, offset):
+        session_factory = _negotiated_session_factories.get(_GetFTPHostKey(url), _MyPassiveFTP)
+        self._session = session_factory(
+            url.hostname,
+            url.username or '',
+            url.password or '',
+            port=url.port or ftplib.FTP.port,
+        )
+        try:
+            self._session.voidcmd('TYPE I')
+            self._connection = self._session.transfercmd('RETR ' + url.path, rest=offset)
+        except:
+            self._session.close()
+            raise
+
+
+    def read(self, size):
+        return self._connection.recv(size)
+
+
+    def close(self):
+        self._connection.close()
+        self._session.close()
+
+
+
+#===================================================================================================
+# _DownloadProgress
+#===================================================================================================
+class _DownloadProgress(object):
+    '''
+    Number of bytes downloaded in each range of a multi-stream download, persisted in a JSON file
+    so an interrupted download can be resumed.
+    '''
+
+    def __init__(self, filename, size, ranges):
+        '''
+        :param unicode|None filename:
+            File where the progress is saved. If None, it is not persisted.
+
+        :param int size:
+            Size of the file being downloaded.
+
+        :param list(list(int)) ranges:
+            Ranges [start, end, downloaded] (end exclusive) of the file.
+        '''
+        import threading
+        self.filename = filename
+        self.size = size
+        self.ranges = ranges
+        self._lock = threading.Lock()
+
+
+    @classmethod
+    def Load(cls, filename, partial_filename, size):
+        '''
+        :rtype: _DownloadProgress|None
+        :returns:
+            The progress saved in `filename`, or None if there is no progress to resume (files
+            missing, corrupted or referring to a file with another size).
+        '''
+        import json
+
+        if not os.path.isfile(filename) or not os.path.isfile(partial_filename):
+            return None
+        if os.path.getsize(partial_filename) != size:
+            return None
+
+        try:
+            with open(filename, 'rb') as iss:
+                contents = json.load(iss)
+            if contents['size'] != size:
+                return None
+            ranges = [
+                [int(start), int(end), int(downloaded)]
+                for start, end, downloaded in contents['ranges']
+            ]
+        except (ValueError, KeyError, TypeError):
+            return None
+
+        return cls(filename, size, ranges)
+
+
+    def GetPending(self):
+        '''
+        :rtype: list(int)
+        :returns:
+            The indexes of the ranges not downloaded yet.
+        '''
+        return [
+            index
+            for index, (start, end, downloaded) in enumerate(self.ranges)
+            if start + downloaded < end
+        ]
+
+
+    def Update(self, index, downloaded):
+        '''
+        Records the number of bytes downloaded in a range (which must already be flushed to the
+        partial file).
+        '''
+        with self._lock:
+            self.ranges[index][2] = downloaded
+            self.Save()
+
+
+    def Save(self):
+        if self.filename is None:
+            return
+
+        import json
+        with open(self.filename, 'wb') as oss:
+            json.dump({'size' : self.size, 'ranges' : self.ranges}, oss)
+
+
+
+#===================================================================================================
+# RemoteRangeFile
+#===================================================================================================
+# Forward seeks up to this number of bytes skip the data in the current request instead of starting
+# a new one
+_RANGE_FILE_SKIP_LIMIT = 256 * 1024
+
+class RemoteRangeFile(object):
+    '''
+    A read-only, seekable file object for a remote (http or ftp) file, reading the contents with
+    range requests (see DownloadUrlToFile).
+
+    Sequential reads share the same request, so reading the file from the start to the end costs
+    a single download; seeking starts a new request from the new position. This allows using
+    zipfile.ZipFile on a remote archive while it is downloaded: only reading the central directory
+    (at the end of the archive) needs additional requests.
+
+    :ivar int size:
+        Size of the remote file.
+
+    :ivar int requests:
+        Number of requests made to the server.
+    '''
+
+    def __init__(self, url):
+        '''
+        :param ParseResult url:
+            A parsed url as returned by urlparse.urlparse
+
+        :raises FileNotFoundError:
+            If the remote file does not exist (ftp only).
+
+        :raises IOError:
+            If the server does not report the file size or does not accept range requests.
+        '''
+        try:
+            size = _GetRemoteSize(url)
+        except PermanentError, e:
+            if e.errno == 550:
+                from _filesystem_exceptions import FileNotFoundError
+                raise FileNotFoundError(url.path)
+            raise
+        if size is None:
+            raise IOError('Server does not accept range requests for "%s"' % url.geturl())
+
+        self.url = url
+        self.name = url.geturl()
+        self.size = size
+        self.requests = 0
+
+        self._position = 0
+        self._stream = None
+        self._stream_position = 0
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *args):
+        self.close()
+
+
+    def tell(self):
+        return self._position
+
+
+    def seek(self, offset, whence=0):
+        if whence == 1:
+            offset += self._position
+        elif whence == 2:
+            offset += self.size
+        if offset < 0:
+            import errno
+            raise IOError(errno.EINVAL, 'Invalid seek position: %d' % offset)
+        self._position = offset
+
+
+    def read(self, size=-1):
+        end = self.size if size is None or size < 0 else min(self.size, self._position + size)
+        if self._position >= end:
+            return b''
+
+        stream = self._GetStream()
+        chunks = []
+        remaining = end - self._position
+        while remaining > 0:
+            data = stream.read(remaining)
+            if not data:
+                raise IOError('Connection closed while reading "%s"' % self.name)
+            chunks.append(data)
+            remaining -= len(data)
+
+        self._position = self._stream_position = end
+        return b''.join(chunks)
+
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+
+    def _GetStream(self):
+        '''
+        :returns:
+            A request reading the remote file from the current position.
+        '''
+        if self._stream is not None:
+            skip = self._position - self._stream_position
+            if 0 <= skip <= _RANGE_FILE_SKIP_LIMIT:
+                while skip > 0:
+                    data = self._stream.read(min(skip, _DOWNLOAD_BLOCK_SIZE))
+                    if not data:
+                        raise IOError('Connection closed while reading "%s"' % self.name)
+                    skip -= len(data)
+                self._stream_position = self._position
+                return self._stream
+            self.close()
+
+        if self.url.scheme == 'ftp':
+            self._stream = _FTPRangeFile(self.url, self._position)
+        else:
+            self._stream = _OpenHTTPRange(self.url, self._position, self.size)
+        self._stream_position = self._position
+        self.requests += 1
+        return self._stream
+
 
 
 #===================================================================================================
@@ -229,15 +1106,19 @@ def OpenFile(filename_url, binary=False, encoding=None):
 
 
 
-def _FTPDownload(source_url, target_filename):
+def _FTPDownload(source_url, target_filename, hasher=None):
     '''
     Downloads a file through FTP
 
     .. see:: DownloadUrlToFile
         for param docs
     '''
-    with closing(FTPHost(source_url)) as ftp_host:
-        ftp_host.download(source=source_url.path, target=target_filename)
+    with _ftp_host_pool.Host(source_url) as ftp_host:
+        if hasher is None:
+            ftp_host.download(source=source_url.path, target=target_filename)
+        else:
+            # ftputil calls the callback with each chunk received
+            ftp_host.download(source=source_url.path, target=target_filename, callback=hasher.update)
 
 
 def _FTPOpenFile(filename_url, binary=False, encoding=None):
@@ -247,7 +1128,7 @@ def _FTPOpenFile(filename_url, binary=False, encoding=None):
     .. see:: OpenFile
         for param docs
     '''
-    ftp_host = FTPHost(filename_url)
+    ftp_host = _ftp_host_pool.Acquire(filename_url)
     try:
         mode = 'r'
         if binary:
@@ -256,21 +1137,21 @@ def _FTPOpenFile(filename_url, binary=False, encoding=None):
 
         open_file = ftp_host.open(filename_url.path, mode, encoding=encoding)
 
-        # Set it up so when open_file is closed, ftp_host closes too
+        # Set it up so when open_file is closed, ftp_host is given back to the pool
         def FTPClose():
             # Before closing, remove callback to avoid recursion, since ftputil closes all files
             # it has
             from ben10.foundation.callback import Remove
             Remove(open_file.close, FTPClose)
 
-            ftp_host.close()
+            _ftp_host_pool.Release(filename_url, ftp_host)
 
         from ben10.foundation.callback import After
         After(open_file.close, FTPClose)
 
         return open_file
     except:
-        ftp_host.close()
+        _ftp_host_pool.Release(filename_url, ftp_host, discard=True)
         raise
 
 
@@ -296,9 +1177,12 @@ def FTPCreateFile(url, contents, binary=False, encoding=None):
         .. seealso:: ben10.filesystem.CreateFile
     '''
     mode = 'wb' if binary else 'w'
-    with closing(FTPHost(url)) as ftp_host:
-        with ftp_host.open(url.path, mode, encoding=encoding) as oss:
-            oss.write(contents)
+    try:
+        with _ftp_host_pool.Host(url) as ftp_host:
+            with ftp_host.open(url.path, mode, encoding=encoding) as oss:
+                oss.write(contents)
+    finally:
+        _remote_metadata_cache.Invalidate(url)
 
 
 #===================================================================================================
@@ -312,15 +1196,18 @@ def FTPIsFile(url):
     :returns bool:
         True if file exists.
     '''
-    with closing(FTPHost(url)) as ftp_host:
-        try:
-            return ftp_host.path.isfile(url.path)
-        except PermanentError, e:
-            if e.errno == 550:
-                # "No such file or directory"
-                return False
-            else:
-                raise
+    def IsFile():
+        with _ftp_host_pool.Host(url) as ftp_host:
+            try:
+                return ftp_host.path.isfile(url.path)
+            except PermanentError, e:
+                if e.errno == 550:
+                    # "No such file or directory"
+                    return False
+                else:
+                    raise
+
+    return _remote_metadata_cache.Get(url, 'isfile', IsFile)
 
 
 
@@ -334,8 +1221,39 @@ def FTPCreateDirectory(url):
 
         A parsed url as returned by urlparse.urlparse
     '''
-    with closing(FTPHost(url)) as ftp_host:
-        ftp_host.makedirs(url.path)
+    try:
+        with _ftp_host_pool.Host(url) as ftp_host:
+            ftp_host.makedirs(url.path)
+    finally:
+        _remote_metadata_cache.Invalidate(url)
+
+
+
+#===================================================================================================
+# FTPDeleteFile
+#===================================================================================================
+def FTPDeleteFile(url):
+    '''
+    Deletes a file in a ftp server.
+
+    .. note:: If file doesn't exist this method has no effect.
+
+    :param ParseResult url:
+        File to be deleted.
+        A parsed url as returned by urlparse.urlparse
+
+    :raises FileOnlyActionError:
+        Raised when url refers to a directory.
+    '''
+    try:
+        with _ftp_host_pool.Host(url) as ftp_host:
+            if ftp_host.path.isdir(url.path):
+                from _filesystem_exceptions import FileOnlyActionError
+                raise FileOnlyActionError(url.geturl())
+            if ftp_host.path.isfile(url.path):
+                ftp_host.remove(url.path)
+    finally:
+        _remote_metadata_cache.Invalidate(url)
 
 
 
@@ -349,8 +1267,12 @@ def FTPMoveDirectory(source_url, target_url):
 
         A parsed url as returned by urlparse.urlparse
     '''
-    with closing(FTPHost(source_url)) as ftp_host:
-        ftp_host.rename(source_url.path, target_url.path)
+    try:
+        with _ftp_host_pool.Host(source_url) as ftp_host:
+            ftp_host.rename(source_url.path, target_url.path)
+    finally:
+        _remote_metadata_cache.Invalidate(source_url)
+        _remote_metadata_cache.Invalidate(target_url)
 
 
 
@@ -370,18 +1292,22 @@ def FTPIsDir(url):
     :returns:
         True if url is an existing dir
     '''
-    with closing(FTPHost(url)) as ftp_host:
-        try:
-            # NOTE: Raising an error because ftputil enters a infinite loop if the path starts with
-            # two slashes.
-            assert not url.path.startswith('//'), "Invalid URL: Path starts with two slashes."
-            return ftp_host.path.isdir(url.path)
-        except PermanentError, e:
-            if e.errno == 550:
-                # "No such file or directory"
-                return False
-            else:
-                raise
+    # NOTE: Raising an error because ftputil enters a infinite loop if the path starts with
+    # two slashes.
+    assert not url.path.startswith('//'), "Invalid URL: Path starts with two slashes."
+
+    def IsDir():
+        with _ftp_host_pool.Host(url) as ftp_host:
+            try:
+                return ftp_host.path.isdir(url.path)
+            except PermanentError, e:
+                if e.errno == 550:
+                    # "No such file or directory"
+                    return False
+                else:
+                    raise
+
+    return _remote_metadata_cache.Get(url, 'isdir', IsDir)
 
 
 
@@ -401,15 +1327,23 @@ def FTPListFiles(url):
     :returns:
         List of files, or None if directory does not exist (error 550 CWD)
     '''
-    with closing(FTPHost(url)) as ftp_host:
-        try:
-            # NOTE: Raising an error because ftputil enters a infinite loop if the path starts with
-            # two slashes.
-            assert not url.path.startswith('//'), "Invalid URL: Path starts with two slashes."
-            return ftp_host.listdir(url.path)
-        except PermanentError, e:
-            if e.errno == 550:
-                # "No such file or directory"
-                return None
-            else:
-                raise
+    # NOTE: Raising an error because ftputil enters a infinite loop if the path starts with
+    # two slashes.
+    assert not url.path.startswith('//'), "Invalid URL: Path starts with two slashes."
+
+    def ListDir():
+        with _ftp_host_pool.Host(url) as ftp_host:
+            try:
+                return tuple(ftp_host.listdir(url.path))
+            except PermanentError, e:
+                if e.errno == 550:
+                    # "No such file or directory"
+                    return None
+                else:
+                    raise
+
+    # The cached listing is a tuple, so callers get their own list
+    result = _remote_metadata_cache.Get(url, 'listdir', ListDir)
+    if result is None:
+        return None
+    return list(result)
@@ -0,0 +1,180 @@
+'''
+This module contains a persistent index of file hashes, used to avoid rehashing (and copying) files
+that have not changed since the last time they were seen.
+'''
+from __future__ import unicode_literals
+import os
+import threading
+
+
+
+#===================================================================================================
+# HashIndex
+#===================================================================================================
+class HashIndex(object):
+    '''
+    A table mapping local files to their md5 digests (as computed by
+    ben10.foundation.hash.Md5Hex).
+
+    An entry is only trusted while the file stat (size, mtime and inode) matches the one recorded
+    when the digest was computed; otherwise the file is hashed again. This makes checking a tree
+    of unchanged files almost as cheap as a stat-only walk.
+
+    The index can be persisted to disk, so the digests are reused across runs:
+
+        with HashIndex('~/.cache/deploy.hash_index') as hash_index:
+            CopyFiles(source_dir, target_dir, md5_check=True, hash_index=hash_index)
+
+    .. note:: All methods are thread safe, so the same index can be shared by the workers of a
+        parallel copy (threads only).
+    '''
+
+    def __init__(self, filename=None):
+        '''
+        :param unicode|None filename:
+            File used to persist the index. If given and the file exists, the index is loaded from
+            it. If None, the index lives only in memory.
+        '''
+        self.filename = filename
+        self._entries = {}
+        self._lock = threading.Lock()
+
+        if filename is not None and os.path.isfile(filename):
+            self.Load()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *args):
+        if self.filename is not None:
+            self.Save()
+
+
+    def __len__(self):
+        return len(self._entries)
+
+
+    def Load(self):
+        '''
+        Loads the index from `self.filename`, discarding any entry in memory.
+
+        A corrupted or incompatible index file is ignored (the index starts empty).
+        '''
+        import json
+
+        try:
+            with open(self.filename, 'rb') as iss:
+                entries = json.load(iss)
+        except ValueError:
+            entries = {}
+
+        if not isinstance(entries, dict):
+            entries = {}
+
+        with self._lock:
+            self._entries = dict(
+                (path, tuple(entry))
+                for path, entry in entries.iteritems()
+                if isinstance(entry, list) and len(entry) == 4
+            )
+
+
+    def Save(self):
+        '''
+        Writes the index to `self.filename`.
+
+        The index is written into a temporary file which then replaces the original one, so
+        concurrent readers never see a partially written index.
+        '''
+        import json
+        import tempfile
+
+        with self._lock:
+            entries = dict(self._entries)
+
+        dirname = os.path.dirname(os.path.abspath(self.filename))
+        if not os.path.isdir(dirname):
+            os.makedirs(dirname)
+
+        fd, temp_filename = tempfile.mkstemp(dir=dirname, prefix='.hash_index')
+        try:
+            with os.fdopen(fd, 'wb') as oss:
+                json.dump(entries, oss)
+
+            if os.path.isfile(self.filename) and os.name == 'nt':
+                os.remove(self.filename)  # os.rename can't replace files on Windows
+            os.rename(temp_filename, self.filename)
+        except:
+            if os.path.isfile(temp_filename):
+                os.remove(temp_filename)
+            raise
+
+
+    def GetMd5(self, filename):
+        '''
+        :param unicode filename:
+            A local file.
+
+        :rtype: unicode
+        :returns:
+            The md5 hex digest of the file contents. The file is only read when its stat doesn't
+            match the one recorded in the index.
+        '''
+        key = self._GetKey(filename)
+        stat = self._GetStat(filename)
+
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry[:3] == stat:
+            return entry[3]
+
+        from ben10.foundation.hash import Md5Hex
+        md5 = Md5Hex(filename=filename)
+        with self._lock:
+            self._entries[key] = stat + (md5,)
+        return md5
+
+
+    def SetMd5(self, filename, md5):
+        '''
+        Records the digest of a file whose contents are known without hashing it (for instance,
+        right after copying a file whose digest was already computed).
+
+        :param unicode filename:
+            A local file.
+
+        :param unicode md5:
+            The md5 hex digest of the file contents.
+        '''
+        key = self._GetKey(filename)
+        stat = self._GetStat(filename)
+        with self._lock:
+            self._entries[key] = stat + (md5,)
+
+
+    def Discard(self, filename):
+        '''
+        Removes a file from the index (if present).
+
+        :param unicode filename:
+        '''
+        with self._lock:
+            self._entries.pop(self._GetKey(filename), None)
+
+
+    @classmethod
+    def _GetKey(cls, filename):
+        return os.path.normcase(os.path.abspath(filename))
+
+
+    @classmethod
+    def _GetStat(cls, filename):
+        '''
+        :rtype: tuple(int,float,int)
+        :returns:
+            The file size, mtime and inode.
+        '''
+        stat = os.stat(filename)
+        return (stat.st_size, stat.st_mtime, stat.st_ino)
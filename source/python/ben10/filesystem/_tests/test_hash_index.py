@@ -0,0 +1,67 @@
+from __future__ import unicode_literals
+from ben10.filesystem import CreateFile, HashIndex
+from ben10.foundation.hash import Md5Hex
+import os
+
+
+
+#===================================================================================================
+# Test
+#===================================================================================================
+class Test:
+
+    def testGetMd5(self, embed_data, monkeypatch):
+        filename = embed_data['file.txt']
+        CreateFile(filename, 'alpha')
+
+        hash_index = HashIndex()
+        assert hash_index.GetMd5(filename) == Md5Hex(contents=b'alpha')
+        assert len(hash_index) == 1
+
+        # While the file stat doesn't change, the file is not read again
+        from ben10.foundation import hash as hash_module
+        hashed = []
+        original_md5_hex = hash_module.Md5Hex
+        def Md5Hex_(*args, **kwargs):
+            hashed.append(kwargs['filename'])
+            return original_md5_hex(*args, **kwargs)
+        monkeypatch.setattr(hash_module, 'Md5Hex', Md5Hex_)
+
+        assert hash_index.GetMd5(filename) == Md5Hex(contents=b'alpha')
+        assert hashed == []
+
+        # Changing the contents (and size) invalidates the entry
+        CreateFile(filename, 'bravo!')
+        assert hash_index.GetMd5(filename) == Md5Hex(contents=b'bravo!')
+        assert hashed == [filename]
+
+        # SetMd5/Discard
+        hash_index.SetMd5(filename, 'known')
+        assert hash_index.GetMd5(filename) == 'known'
+        hash_index.Discard(filename)
+        assert len(hash_index) == 0
+
+
+    def testPersistence(self, embed_data):
+        filename = embed_data['file.txt']
+        index_filename = embed_data['index/hash_index.json']
+        CreateFile(filename, 'alpha')
+
+        with HashIndex(index_filename) as hash_index:
+            hash_index.SetMd5(filename, 'known')
+        assert os.path.isfile(index_filename)
+
+        hash_index = HashIndex(index_filename)
+        assert len(hash_index) == 1
+        assert hash_index.GetMd5(filename) == 'known'
+
+        # A corrupted index is discarded
+        CreateFile(index_filename, 'corrupted')
+        hash_index = HashIndex(index_filename)
+        assert len(hash_index) == 0
+        assert hash_index.GetMd5(filename) == Md5Hex(contents=b'alpha')
+
+        # Entries with unexpected values are discarded
+        CreateFile(index_filename, '{"a": 1, "b": null, "c": "abcd", "d": [1, 2, 3, 4]}')
+        hash_index = HashIndex(index_filename)
+        assert len(hash_index) == 1
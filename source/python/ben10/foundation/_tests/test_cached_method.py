@@ -125,6 +125,52 @@ class Test(object):
         _cached_obj.CheckCounts(cache, method=1, miss=1)
 
 
+    def testCacheMethodResults(self, _cached_obj):
+        from ben10.foundation.lru import LRU
+        from ben10.foundation.ttl_cache import TTLCache
+
+        cache = MyMethod = CachedMethod(_cached_obj.CachedMethod, results=LRU(2))
+
+        MyMethod(1)
+        MyMethod(2)
+        _cached_obj.CheckCounts(cache, method=2, miss=2)
+
+        MyMethod(1)
+        MyMethod(3)  # Removes 2
+        _cached_obj.CheckCounts(cache, method=1, miss=1, hit=1)
+
+        MyMethod(2)
+        _cached_obj.CheckCounts(cache, method=1, miss=1)
+
+        now = [0.0]
+        cache = MyMethod = CachedMethod(
+            _cached_obj.CachedMethod,
+            results=TTLCache(10, ttl=1.0, timer=lambda: now[0]),
+        )
+        cache.check_counts = dict(method=_cached_obj.method_count, miss=0, hit=0, call=0)
+
+        MyMethod(1)
+        MyMethod(1)
+        _cached_obj.CheckCounts(cache, method=1, miss=1, hit=1)
+
+        now[0] = 1.0
+        MyMethod(1)
+        _cached_obj.CheckCounts(cache, method=1, miss=1)
+
+        # The result is looked up only once, so it can't expire between checking and getting it
+        times = [2.0, 2.9, 3.1]
+        cache = MyMethod = CachedMethod(
+            _cached_obj.CachedMethod,
+            results=TTLCache(10, ttl=1.0, timer=lambda: times.pop(0)),
+        )
+        cache.check_counts = dict(method=_cached_obj.method_count, miss=0, hit=0, call=0)
+
+        MyMethod(1)  # Stored at 2.0
+        MyMethod(1)  # Found at 2.9 (would expire at 3.1, in a second lookup)
+        _cached_obj.CheckCounts(cache, method=1, miss=1, hit=1)
+        assert times == [3.1]
+
+
     def testCacheMethodAttributeBasedCachedMethod(self):
 
         class TestObject(object):
@@ -0,0 +1,157 @@
+from __future__ import unicode_literals
+from ben10.foundation.disk_cache import DiskCache
+import pytest
+
+
+
+#===================================================================================================
+# Test
+#===================================================================================================
+class Test:
+
+    def testDiskCache(self, embed_data):
+        filename = embed_data.GetDataFilename('cache/disk_cache.sqlite')
+        cache = DiskCache(filename)
+
+        cache['a'] = 1
+        cache[('b', 2)] = [1, 2, 3]
+        assert cache['a'] == 1
+        assert cache.get(('b', 2)) == [1, 2, 3]
+        assert 'a' in cache
+        assert 'z' not in cache
+        assert cache.get('z') is None
+        assert cache.get('z', 'default') == 'default'
+        with pytest.raises(KeyError):
+            cache['z']
+        assert len(cache) == 2
+
+        cache['a'] = 'A'
+        assert cache['a'] == 'A'
+        assert len(cache) == 2
+
+        # Items are kept by other instances (e.g. in other runs)
+        cache = DiskCache(filename)
+        assert cache['a'] == 'A'
+
+        # Namespaces are independent
+        other = cache.GetNamespace('other')
+        assert 'a' not in other
+        other['a'] = 'other'
+        assert cache['a'] == 'A'
+        other.clear()
+        assert len(other) == 0
+        assert cache['a'] == 'A'
+
+        # Items of other versions are not found (and replaced when set)
+        cache = DiskCache(filename, version=2)
+        assert 'a' not in cache
+        assert len(cache) == 0
+        cache['a'] = 'A2'
+        assert DiskCache(filename, version=2)['a'] == 'A2'
+        assert 'a' not in DiskCache(filename)
+
+        assert cache.pop('a') == 'A2'
+        assert cache.pop('a', None) is None
+        with pytest.raises(KeyError):
+            cache.pop('a')
+        with pytest.raises(KeyError):
+            del cache['a']
+
+        # Values that can't be unpickled are considered missing
+        cache['broken'] = 'value'
+        cache._GetConnection().execute('UPDATE entries SET value = ?', (b'broken',))
+        assert 'broken' not in cache
+
+
+    def testDiskCacheMaxSize(self, embed_data):
+        # Each pickled value has a little more than 1000 bytes
+        cache = DiskCache(embed_data.GetDataFilename('disk_cache.sqlite'), max_size=3500)
+
+        for i in xrange(5):
+            cache[i] = 'x' * 1000
+        assert len(cache) == 3
+        assert [i in cache for i in xrange(5)] == [False, False, True, True, True]
+
+        # Only the evictions from the namespace of the cache are reported
+        evicted = []
+        other = cache.GetNamespace('other', on_evict=evicted.append)
+        for i in xrange(3):
+            other[i] = 'x' * 1000
+        assert evicted == []
+        assert [i in cache for i in xrange(5)] == [False, False, False, False, False]
+
+        other[3] = 'x' * 1000
+        assert evicted == [DiskCache._GetKeyText(0)]
+
+
+    def testDiskCacheTotalSize(self, embed_data):
+        import sqlite3
+
+        filename = embed_data.GetDataFilename('disk_cache.sqlite')
+
+        def GetTotalSizes():
+            connection = sqlite3.connect(filename)
+            try:
+                return connection.execute(
+                    "SELECT (SELECT value FROM meta WHERE name = 'total_size'), TOTAL(size)"
+                    " FROM entries"
+                ).fetchone()
+            finally:
+                connection.close()
+
+        cache = DiskCache(filename, max_size=3500)
+        cache['a'] = 'x' * 1000
+        cache['b'] = 'x' * 500
+        cache['a'] = 'x' * 10  # Replaced
+        cache.GetNamespace('other')['a'] = 'x' * 1000
+        cache.pop('b')
+        total_size, expected = GetTotalSizes()
+        assert 1000 < total_size == expected < 1100
+
+        for i in xrange(5):
+            cache[i] = 'x' * 1000  # Evicts the oldest entries
+        total_size, expected = GetTotalSizes()
+        assert 3000 < total_size == expected <= 3500
+
+        cache.clear()
+        assert GetTotalSizes() == (0, 0)
+
+        # Databases created without the running total compute it when opened
+        DiskCache(filename)['a'] = 'x' * 1000
+        connection = sqlite3.connect(filename)
+        connection.executescript(
+            'DROP TABLE meta; DROP TRIGGER entries_insert; DROP TRIGGER entries_delete')
+        connection.close()
+        DiskCache(filename)['b'] = 'x' * 1000
+        total_size, expected = GetTotalSizes()
+        assert 2000 < total_size == expected < 2100
+
+
+    def testDiskCacheMultipleProcesses(self, embed_data):
+        import multiprocessing
+
+        filename = embed_data.GetDataFilename('disk_cache.sqlite')
+        DiskCache(filename)['main'] = 0  # Creates the database
+
+        processes = [
+            multiprocessing.Process(target=_WriteItems, args=(filename, name))
+            for name in ('p1', 'p2', 'p3')
+        ]
+        for process in processes:
+            process.start()
+        _WriteItems(filename, 'main')
+        for process in processes:
+            process.join()
+            assert process.exitcode == 0
+
+        cache = DiskCache(filename)
+        assert len(cache) == 1 + 4 * 50
+        for name in ('main', 'p1', 'p2', 'p3'):
+            assert [cache[(name, i)] for i in xrange(50)] == range(50)
+
+
+
+def _WriteItems(filename, name):
+    cache = DiskCache(filename)
+    for i in xrange(50):
+        cache[(name, i)] = i
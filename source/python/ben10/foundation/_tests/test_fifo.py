@@ -1,5 +1,5 @@
 from __future__ import unicode_literals
-from ben10.foundation.fifo import FIFO
+from ben10.foundation.fifo import FIFO, ThreadSafeFIFO
 
 
 
@@ -22,3 +22,51 @@ class Test:
 
         fifo[2] = 2
         assert fifo.keys() == [3, 2]
+
+
+    def testFifoOnEvict(self):
+        evicted = []
+        fifo = ThreadSafeFIFO(2, on_evict=evicted.append)
+        fifo[1] = 1
+        fifo[2] = 2
+        assert evicted == []
+
+        fifo[3] = 3
+        fifo[4] = 4
+        assert evicted == [1, 2]
+
+        del fifo[3]
+        fifo.clear()
+        assert evicted == [1, 2]
+
+
+    def testThreadSafeFIFO(self):
+        from random import Random
+        import threading
+
+        fifo = ThreadSafeFIFO(50)
+
+        errors = []
+        def Run(seed):
+            random = Random(seed)
+            try:
+                for _i in xrange(5000):
+                    key = random.randint(0, 100)
+                    if random.random() < 0.7:
+                        fifo[key] = key
+                    else:
+                        assert fifo.get(key, key) == key
+                    assert len(fifo) <= 50
+            except Exception, e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=Run, args=(i,)) for i in xrange(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        # Note: FIFO removes an item when full even if the key set is already in the cache
+        assert len(fifo.keys()) == len(fifo) <= 50
+        assert all(fifo[key] == key for key in fifo)
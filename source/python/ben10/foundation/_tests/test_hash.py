@@ -1,6 +1,7 @@
 from __future__ import unicode_literals
 from StringIO import StringIO
-from ben10.foundation.hash import DumpDirHashToStringIO, GetRandomHash, IterHashes, Md5Hex
+from ben10.foundation.hash import (DumpDirHashToStringIO, GetRandomHash, HashFiles, HexDigest,
+    IterHashes, Md5Hex)
 import pytest
 
 
@@ -84,3 +85,77 @@ class Test:
 
     def testMd5Hex(self):
         assert Md5Hex(contents='alpha, bravo') == '2c0d78abb6e32d1614a17c6d0e4391c0'
+
+        # Streams are read incrementally
+        import io
+        stream = io.BytesIO(b'alpha, bravo' * 100000)
+        assert Md5Hex(stream=stream) == Md5Hex(contents=b'alpha, bravo' * 100000)
+        assert not stream.closed
+
+
+    def testHexDigest(self, embed_data, monkeypatch):
+        import hashlib
+
+        assert HexDigest(contents='alpha, bravo') == '2c0d78abb6e32d1614a17c6d0e4391c0'
+        assert HexDigest(contents='alpha, bravo', algorithm='sha1') == \
+            hashlib.sha1('alpha, bravo').hexdigest()
+
+        filename = embed_data['file1.txt']
+        assert HexDigest(filename, algorithm='sha256') == \
+            hashlib.sha256(open(filename, 'rb').read()).hexdigest()
+
+        # Large files are hashed using mmap
+        from ben10.foundation import hash as hash_module
+        monkeypatch.setattr(hash_module, '_MMAP_MIN_SIZE', 1)
+        assert HexDigest(filename) == '4124bc0a9335c27f086f24ba207a4912'
+
+        with pytest.raises(ValueError):
+            HexDigest(contents='alpha', algorithm='unknown')
+
+
+    @pytest.mark.parametrize('workers', [None, 1, 4])
+    def testHashFiles(self, embed_data, workers):
+        filenames = [embed_data['file1.txt'], embed_data['file2.txt']] * 3
+        assert HashFiles(filenames, workers=workers) == [
+            '4124bc0a9335c27f086f24ba207a4912',
+            '633de4b0c14ca52ea2432a3c8a5c4c31',
+        ] * 3
+        assert HashFiles(filenames, algorithm='sha1', workers=workers) == map(
+            lambda filename: HexDigest(filename, algorithm='sha1'),
+            filenames
+        )
+        assert HashFiles([], workers=workers) == []
+
+        stringio = StringIO()
+        DumpDirHashToStringIO(embed_data.GetDataDirectory(), stringio, algorithm='sha1', workers=workers)
+        assert set(stringio.getvalue().splitlines()) == {
+            'file1.txt=%s' % HexDigest(embed_data['file1.txt'], algorithm='sha1'),
+            'file2.txt=%s' % HexDigest(embed_data['file2.txt'], algorithm='sha1'),
+        }
+
+
+    def testHashFilesPerformance__flaky(self, embed_data):
+        '''
+        Compares hashing a synthetic tree serially and with a pool of threads.
+        '''
+        import os
+        import time
+
+        os.makedirs(embed_data['synthetic'])
+        filenames = []
+        for i in xrange(64):
+            filename = embed_data['synthetic/file_%d.bin' % i]
+            with open(filename, 'wb') as oss:
+                oss.write(os.urandom(256 * 1024))
+            filenames.append(filename)
+
+        timing = {}
+        for workers in (1, 4):
+            start = time.time()
+            digests = HashFiles(filenames, workers=workers)
+            timing[workers] = time.time() - start
+            assert len(digests) == len(filenames)
+
+        PRINT_PERFORMANCE = False
+        if PRINT_PERFORMANCE:
+            print 'serial: %.3fs, 4 workers: %.3fs' % (timing[1], timing[4])
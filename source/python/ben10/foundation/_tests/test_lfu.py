@@ -0,0 +1,155 @@
+from __future__ import unicode_literals
+from ben10.foundation.lfu import LFU
+import pytest
+
+
+
+#===================================================================================================
+# Test
+#===================================================================================================
+class Test:
+
+    def testLFU(self):
+        lfu = LFU(3)
+        lfu[1] = 'a'
+        lfu[2] = 'b'
+        lfu[3] = 'c'
+        assert lfu.keys() == [1, 2, 3]
+
+        assert lfu[1] == 'a'
+        assert lfu[1] == 'a'
+        assert lfu.get(3) == 'c'
+        assert lfu.GetCount(1) == 3
+        assert lfu.GetCount(2) == 1
+        assert lfu.keys() == [2, 3, 1]
+
+        # 2 is the least frequently used
+        lfu[4] = 'd'
+        assert 2 not in lfu
+        assert lfu.keys() == [4, 3, 1]
+
+        # On ties, the least recently used is removed (3 and 5 have the same count)
+        lfu[4] = 'D'
+        lfu[5] = 'e'
+        assert lfu.keys() == [5, 4, 1]
+        assert lfu[4] == 'D'
+        assert len(lfu) == 3
+
+        # Checking a key doesn't count as an access
+        assert 5 in lfu
+        assert lfu.GetCount(5) == 1
+
+        assert lfu.get(999) is None
+        assert lfu.get(999, 'default') == 'default'
+        with pytest.raises(KeyError):
+            lfu[999]
+
+
+    def testLFURemove(self):
+        lfu = LFU(3)
+        lfu[1] = 'a'
+        lfu[2] = 'b'
+        lfu[2]
+        lfu[3] = 'c'
+        lfu[3]
+
+        assert lfu.pop(1) == 'a'
+        assert lfu.pop(1, None) is None
+        with pytest.raises(KeyError):
+            lfu.pop(1)
+
+        # The minimum count must be recomputed after removing the only key with count 1
+        lfu[4] = 'd'
+        lfu[5] = 'e'
+        assert lfu.keys() == [5, 2, 3]
+
+        del lfu[5]
+        lfu[6] = 'f'
+        lfu[7] = 'g'
+        assert lfu.keys() == [7, 2, 3]
+
+        # Removing the keys of the least count, when the next count is not the following number
+        for _i in xrange(3):
+            lfu[3]
+        del lfu[7]
+        del lfu[2]
+        assert lfu.keys() == [3]
+        lfu[8] = 'h'
+        assert lfu.keys() == [8, 3]
+        del lfu[8]
+        del lfu[3]
+        assert lfu.keys() == []
+
+        lfu.clear()
+        assert len(lfu) == 0
+        assert lfu.keys() == []
+        lfu[1] = 'a'
+        assert lfu.keys() == [1]
+
+        with pytest.raises(ValueError):
+            LFU(0)
+
+
+    def testLFURandom(self):
+        import random
+
+        # Compared with the keys sorted by (count, last access)
+        r = random.Random(1)
+        lfu = LFU(20)
+        accesses = {}
+        for i in xrange(5000):
+            key = r.randrange(40)
+            operation = r.randrange(3)
+            if operation == 0:
+                if len(lfu) == 20 and key not in lfu:
+                    del accesses[min(accesses, key=accesses.get)]
+                count = accesses[key][0] + 1 if key in accesses else 1
+                lfu[key] = i
+                accesses[key] = (count, i)
+            elif operation == 1:
+                if lfu.get(key) is not None:
+                    accesses[key] = (accesses[key][0] + 1, i)
+            else:
+                lfu.pop(key, None)
+                accesses.pop(key, None)
+            assert lfu.keys() == sorted(accesses, key=accesses.get)
+
+
+    def testLFUOnEvict(self):
+        evicted = []
+        lfu = LFU(2, on_evict=evicted.append)
+        lfu[1] = 'a'
+        lfu[1]
+        lfu[2] = 'b'
+        lfu[3] = 'c'
+        lfu[1] = 'd'
+        assert evicted == [2]
+
+        lfu.pop(3)
+        assert evicted == [2]
+
+
+    def testLFUKeepsFrequentlyUsed(self):
+        from ben10.foundation.lru import LRU
+
+        # A few keys used all the time, mixed with many keys used only once
+        def Accesses():
+            for i in xrange(5):
+                yield i
+                yield i
+            for i in xrange(1000):
+                yield i % 5
+                yield 'once %d' % i
+
+        def CountHits(cache):
+            hits = 0
+            for key in Accesses():
+                if key in cache:
+                    hits += 1
+                    cache[key]
+                else:
+                    cache[key] = key
+            return hits
+
+        assert CountHits(LFU(6)) == 1005
+        assert CountHits(LRU(6)) < 10
@@ -1,5 +1,5 @@
 from __future__ import unicode_literals
-from ben10.foundation.memoize import Memoize
+from ben10.foundation.memoize import CacheInfo, Memoize
 from ben10.foundation.weak_ref import GetWeakRef
 import pytest
 
@@ -170,6 +170,179 @@ class Test:
         assert counts['Double'] == 4
 
 
+    def testMemoizeLFU(self):
+        calls = []
+
+        @Memoize(3, Memoize.LFU)
+        def Double(x):
+            calls.append(x)
+            return x * 2
+
+        for _i in xrange(3):
+            assert Double(1) == 2
+        Double(2)
+        Double(3)
+        Double(4)  # Removes 2 (3 is more recent)
+        Double(1)
+        assert calls == [1, 2, 3, 4]
+
+        Double(3)
+        Double(2)
+        assert calls == [1, 2, 3, 4, 2]
+        assert Double.GetCacheInfo() == CacheInfo(4, 5, 2, 3, 3)
+
+
+    def testMemoizeTTL(self):
+        from ben10.foundation.ttl_cache import TTLCache
+
+        now = [0.0]
+        calls = []
+
+        class MyTTLCache(TTLCache):
+            def __init__(self, maxsize, ttl):
+                TTLCache.__init__(self, maxsize, ttl, timer=lambda: now[0])
+
+        @Memoize(2, lambda maxsize: MyTTLCache(maxsize, ttl=10.0))
+        def Double(x):
+            calls.append(x)
+            return x * 2
+
+        assert Double(1) == 2
+        now[0] = 5.0
+        assert Double(1) == 2
+        assert Double(2) == 4
+        assert calls == [1, 2]
+
+        now[0] = 10.0
+        assert Double(1) == 2  # Expired
+        assert Double(2) == 4
+        assert calls == [1, 2, 1]
+
+        @Memoize(2, Memoize.TTL, ttl=60.0)
+        def Triple(x):
+            calls.append(x)
+            return x * 3
+
+        assert Triple(1) == 3
+        assert Triple(1) == 3
+        assert Triple.GetCacheInfo() == CacheInfo(1, 1, 0, 2, 1)
+
+        with pytest.raises(ValueError):
+            Memoize(2, Memoize.TTL)
+
+        with pytest.raises(ValueError):
+            Memoize(2, Memoize.LRU, ttl=60.0)
+
+
+    def testMemoizeGetSize(self):
+        calls = []
+
+        @Memoize(10, Memoize.LRU, get_size=len)
+        def Read(name):
+            calls.append(name)
+            return name * 3
+
+        Read('a')
+        Read('bb')
+        assert Read.GetCacheInfo().currsize == 2
+
+        # The total size (3 + 6 + 9) exceeds 10, so the least recently used values are removed
+        Read('ccc')
+        assert Read.GetCacheInfo().currsize == 1
+        Read('ccc')
+        Read('a')
+        assert calls == ['a', 'bb', 'ccc', 'a']
+
+        with pytest.raises(ValueError):
+            Memoize(10, Memoize.FIFO, get_size=len)
+
+        with pytest.raises(ValueError):
+            Memoize(10, Memoize.LFU, thread_safe=True)
+
+        @Memoize(10, Memoize.LRU, get_size=len, thread_safe=True)
+        def ThreadSafeRead(name):
+            return name * 3
+
+        ThreadSafeRead('a')
+        ThreadSafeRead('bb')
+        ThreadSafeRead('ccc')
+        assert ThreadSafeRead.GetCacheInfo().currsize == 1
+
+
+    @pytest.mark.parametrize('thread_safe', [False, True])
+    def testMemoizeEvictions(self, thread_safe):
+        @Memoize(10, Memoize.LRU, get_size=len, thread_safe=thread_safe)
+        def Read(name):
+            return name * 3
+
+        Read('a')
+        Read('bb')
+        Read('ccc')  # Evicts 'a' and 'bb'
+        Read('dddd')  # Doesn't fit at all: evicts 'ccc' and itself
+        assert Read.GetCacheInfo() == CacheInfo(0, 4, 4, 10, 0)
+
+        @Memoize(2, Memoize.LFU)
+        def Double(x):
+            return x * 2
+
+        for x in (1, 1, 2, 3, 4, 1):
+            Double(x)
+        assert Double.GetCacheInfo() == CacheInfo(2, 4, 2, 2, 2)
+
+
+    def testMemoizeBackend(self, embed_data):
+        from ben10.foundation.disk_cache import DiskCache
+
+        filename = embed_data.GetDataFilename('memoize.sqlite')
+        calls = []
+
+        def CreateFunctions(backend):
+
+            @Memoize(backend=backend)
+            def Double(x):
+                calls.append(('Double', x))
+                return x * 2
+
+            @Memoize(backend=backend)
+            def Triple(x):
+                calls.append(('Triple', x))
+                return x * 3
+
+            return Double, Triple
+
+        Double, Triple = CreateFunctions(DiskCache(filename))
+        assert Double(1) == 2
+        assert Double(1) == 2
+        assert Triple(1) == 3
+        assert calls == [('Double', 1), ('Triple', 1)]
+        assert Double.GetCacheInfo()[:2] == (1, 1)
+
+        # Values are reused in later runs (unless the version changes)
+        Double, Triple = CreateFunctions(DiskCache(filename))
+        assert Double(1) == 2
+        assert Triple(1) == 3
+        assert calls == [('Double', 1), ('Triple', 1)]
+
+        Double, Triple = CreateFunctions(DiskCache(filename, version=2))
+        assert Double(1) == 2
+        assert calls == [('Double', 1), ('Triple', 1), ('Double', 1)]
+
+        Double.ClearCache()
+        assert Double(1) == 2
+        assert Triple(1) == 3
+        assert calls == [('Double', 1), ('Triple', 1), ('Double', 1), ('Double', 1), ('Triple', 1)]
+
+        with pytest.raises(TypeError):
+            class MyClass(object):
+
+                @Memoize(backend=DiskCache(filename))
+                def MyMethod(self):
+                    'Not called'
+
+        with pytest.raises(ValueError):
+            Memoize(backend=DiskCache(filename), ttl=10.0)
+
+
     def testMemoize(self):
         counts = {
             'Double' : 0,
@@ -313,8 +486,104 @@ class Test:
         assert message in unicode(exception_info.value)
 
 
+    def testCacheKeyBuilder(self):
+        '''
+        The cache key builder created for each function gives the same keys as _GetCacheKey.
+        '''
+        def Check(func, calls):
+            memoize = Memoize()
+            memoize(func)
+            for args, kwargs in calls:
+                expected = memoize._GetCacheKey(args, kwargs)
+                assert memoize._get_cache_key(args, kwargs) == expected
+
+        def Foo(a, b, c=3, d=4):
+            pass
+        Check(Foo, [
+            ((1, 2), {}),
+            ((1, 2, 5), {}),
+            ((1, 2, 5, 6), {}),
+            ((1,), {'b' : 2}),
+            ((1, 2), {'d' : 6}),
+            ((), {'a' : 1, 'b' : 2, 'c' : 5}),
+        ])
+
+        def Bar(a, b, *args):
+            pass
+        Check(Bar, [
+            ((1, 2), {}),
+            ((1, 2, 3, 4), {}),
+            ((1,), {'b' : 2}),
+        ])
+
+        def Baz(a=1, *args):
+            pass
+        Check(Baz, [
+            ((), {}),
+            ((2,), {}),
+            ((2, 3, 4), {}),
+            ((), {'a' : 2}),
+        ])
+
+        # Subclasses customizing the cache key are still used
+        class MyMemoize(Memoize):
+            def _GetCacheKey(self, args, kwargs):
+                return len(args)
+
+        calls = []
+        @MyMemoize
+        def Double(x):
+            calls.append(x)
+            return x * 2
+        assert Double(1) == 2
+        assert Double(2) == 2
+        assert calls == [1]
+
+
+    @pytest.mark.parametrize('thread_safe', [False, True])
+    def testGetCacheInfo(self, thread_safe):
+
+        @Memoize(maxsize=2, thread_safe=thread_safe)
+        def Double(x):
+            return x * 2
+
+        assert Double.GetCacheInfo() == CacheInfo(hits=0, misses=0, evictions=0, maxsize=2, currsize=0)
+        Double(1)
+        Double(1)
+        Double(2)
+        assert Double.GetCacheInfo() == CacheInfo(hits=1, misses=2, evictions=0, maxsize=2, currsize=2)
+        Double(3)
+        Double(3)
+        assert Double.GetCacheInfo() == CacheInfo(hits=2, misses=3, evictions=1, maxsize=2, currsize=2)
+
+        Double.ClearCache()
+        assert Double.GetCacheInfo() == CacheInfo(hits=2, misses=3, evictions=1, maxsize=2, currsize=0)
+
+        class Foo(object):
+            @Memoize(thread_safe=thread_safe)
+            def Double(self, x):
+                return x * 2
+
+        foo1, foo2 = Foo(), Foo()
+        assert Foo.Double.GetCacheInfo(foo1) == CacheInfo(hits=0, misses=0, evictions=0, maxsize=50, currsize=0)
+        foo1.Double(1)
+        foo1.Double(1)
+        foo2.Double(1)
+        foo2.Double(2)
+        assert Foo.Double.GetCacheInfo(foo1) == CacheInfo(hits=1, misses=3, evictions=0, maxsize=50, currsize=1)
+        assert Foo.Double.GetCacheInfo(foo2) == CacheInfo(hits=1, misses=3, evictions=0, maxsize=50, currsize=2)
+
+
     def testPerformance__flaky(self):
         '''
+        Results 2026-10-18 (cache keys built by a function created for each signature)
+        ---------------------------------------------------------
+        call_no_positional is 4.8 times slower than baseline.
+        call_with_defaults is 6.1 times slower than baseline.
+        call_passing_kwargs is 10.1 times slower than baseline.
+        ---------------------------------------------------------
+
+
         Results 2014-07-02 (support for defaults and passing kwargs)
         ---------------------------------------------------------
         call_no_positional is 6.1 times slower than baseline.
@@ -400,6 +669,113 @@ class Test:
         PrintPerformance(timing, 'call_passing_kwargs')
 
 
+    @pytest.mark.parametrize('prune_method', [Memoize.FIFO, Memoize.LRU])
+    def testMemoizeThreadSafe(self, prune_method):
+        '''
+        Concurrent calls missing the same key compute the value only once ("single-flight").
+        '''
+        import threading
+        import time
+
+        calls = []
+        @Memoize(maxsize=10, prune_method=prune_method, thread_safe=True)
+        def Slow(x):
+            calls.append(x)
+            time.sleep(0.1)
+            if x < 0:
+                raise ValueError(x)
+            return x * 2
+
+        class Foo(object):
+            @Memoize(thread_safe=True)
+            def Slow(self, x):
+                calls.append(x)
+                time.sleep(0.1)
+                return x * 3
+
+        def RunThreads(function, *args):
+            results = []
+            def Run():
+                try:
+                    results.append(function(*args))
+                except ValueError, e:
+                    results.append(e)
+            threads = [threading.Thread(target=Run) for _i in xrange(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            return results
+
+        assert RunThreads(Slow, 1) == [2] * 8
+        assert calls == [1]
+
+        # Errors are raised in all the waiting threads (and the value is not cached)
+        del calls[:]
+        results = RunThreads(Slow, -1)
+        assert calls == [-1]
+        assert [type(i) for i in results] == [ValueError] * 8
+        RunThreads(Slow, -1)
+        assert calls == [-1, -1]
+
+        # Instance methods: single-flight for each instance
+        del calls[:]
+        foo1, foo2 = Foo(), Foo()
+        assert RunThreads(foo1.Slow, 1) == [3] * 8
+        assert RunThreads(foo2.Slow, 1) == [3] * 8
+        assert calls == [1, 1]
+
+        Slow.ClearCache()
+        Foo.Slow.ClearCache(foo1)
+        del calls[:]
+        assert Slow(1) == 2
+        assert foo1.Slow(1) == 3
+        assert foo2.Slow(1) == 3
+        assert calls == [1, 1]
+
+
+    def testMemoizeThreadSafePerformance__flaky(self):
+        '''
+        Stress and throughput of a memoized function shared by many threads, with a key space larger
+        than the cache (so there are hits, misses and evictions all the time).
+        '''
+        from random import Random
+        import threading
+        import time
+
+        PRINT_PERFORMANCE = False
+        for prune_method in (Memoize.FIFO, Memoize.LRU):
+            computed = []
+
+            @Memoize(maxsize=100, prune_method=prune_method, thread_safe=True)
+            def Double(x):
+                computed.append(x)
+                return x * 2
+
+            errors = []
+            def Run(seed):
+                random = Random(seed)
+                try:
+                    for _i in xrange(20000):
+                        x = random.randint(0, 150)
+                        assert Double(x) == x * 2
+                except Exception, e:
+                    errors.append(e)
+
+            threads = [threading.Thread(target=Run, args=(i,)) for i in xrange(8)]
+            start = time.time()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.time() - start
+
+            assert errors == []
+            if PRINT_PERFORMANCE:
+                print '%s: %d calls/s (%d computed)' % (
+                    prune_method, 8 * 20000 / elapsed, len(computed))
+
+
     def profileMemoize(self):
         from ben10.debug.profiling import PrintProfileMultiple, ProfileMethod
 
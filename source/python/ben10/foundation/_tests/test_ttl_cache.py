@@ -0,0 +1,95 @@
+from __future__ import unicode_literals
+from ben10.foundation.ttl_cache import TTLCache
+import pytest
+
+
+
+#===================================================================================================
+# Test
+#===================================================================================================
+class Test:
+
+    def testTTLCache(self):
+        now = [0.0]
+        cache = TTLCache(3, ttl=10.0, timer=lambda: now[0])
+
+        cache['a'] = 1
+        now[0] = 5.0
+        cache['b'] = 2
+        assert cache['a'] == 1
+        assert cache.get('b') == 2
+        assert 'a' in cache
+        assert cache.keys() == ['a', 'b']
+
+        # 'a' expires
+        now[0] = 10.0
+        assert 'a' not in cache
+        assert cache.get('a') is None
+        assert cache.get('a', 'default') == 'default'
+        with pytest.raises(KeyError):
+            cache['a']
+        assert cache.keys() == ['b']
+
+        # Setting a key again restarts its time
+        cache['b'] = 3
+        now[0] = 19.0
+        assert cache['b'] == 3
+        now[0] = 20.0
+        assert 'b' not in cache
+        assert len(cache) == 0
+
+
+    def testTTLCacheMaxSize(self):
+        now = [0.0]
+        cache = TTLCache(2, ttl=10.0, timer=lambda: now[0])
+
+        cache['a'] = 1
+        cache['b'] = 2
+        cache['c'] = 3
+        assert cache.keys() == ['b', 'c']
+
+        cache['b'] = 4
+        assert cache.keys() == ['c', 'b']
+
+        # Expired items are removed when new items are added
+        now[0] = 10.0
+        cache['d'] = 5
+        assert len(cache) == 1
+        assert cache.keys() == ['d']
+
+        assert cache.pop('d') == 5
+        assert cache.pop('d', None) is None
+        with pytest.raises(KeyError):
+            cache.pop('d')
+
+        cache['e'] = 6
+        del cache['e']
+        cache['f'] = 7
+        cache.clear()
+        assert len(cache) == 0
+
+
+    def testTTLCacheOnEvict(self):
+        now = [0.0]
+        evicted = []
+        cache = TTLCache(2, ttl=10.0, timer=lambda: now[0], on_evict=evicted.append)
+
+        cache['a'] = 1
+        cache['b'] = 2
+        cache['b'] = 3
+        assert evicted == []
+        cache['c'] = 4
+        assert evicted == ['a']
+
+        # Expired items are evicted when accessed and when new items are added
+        now[0] = 10.0
+        assert cache.get('b') is None
+        assert evicted == ['a', 'b']
+        cache['d'] = 5
+        assert evicted == ['a', 'b', 'c']
+
+        cache.pop('d')
+        assert evicted == ['a', 'b', 'c']
+
+        with pytest.raises(ValueError):
+            TTLCache(0, ttl=10.0)
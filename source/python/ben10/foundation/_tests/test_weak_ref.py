@@ -442,3 +442,143 @@ class Test():
         assert s1 == weak_list[0]
         weak_list[0] = s2
         assert s2 == weak_list[0]
+
+
+    def testWeakSetRemovesDead(self):
+
+        class Item(object):
+            def Method(self):
+                pass
+
+        items = [Item() for _i in xrange(5)]
+        weak_set = WeakSet(items)
+        weak_set.add(items[0])
+        assert len(weak_set) == 5
+        assert items[1] in weak_set
+        assert 1 not in weak_set
+
+        # Dead references are removed immediately (without iterating)
+        del items[:2]
+        assert len(weak_set.data) == 3
+
+        weak_set.remove(items[0])
+        assert items[0] not in weak_set
+        assert set(weak_set) == set(items[1:])
+
+        # Methods
+        item = Item()
+        weak_set.add(item.Method)
+        weak_set.add(item.Method)
+        assert len(weak_set) == 3
+        assert item.Method in weak_set
+        del item
+        assert len(weak_set.data) == 2
+        assert weak_set._guards == {}
+
+        item = Item()
+        weak_set.add(item.Method)
+        weak_set.remove(item.Method)
+        assert weak_set._guards == {}
+        weak_set.add(item.Method)
+        weak_set.clear()
+        assert len(weak_set) == 0
+
+
+    def testWeakListRemove(self):
+
+        class Item(object):
+            def __init__(self, name):
+                self.name = name
+
+            def __eq__(self, other):
+                return self.name == other.name
+
+            def __repr__(self):
+                return self.name
+
+        a = Item('a')
+        b = Item('b')
+        b2 = Item('b')
+        c = Item('c')
+        weak_list = WeakList([a, b, c, b2, a])
+        assert len(weak_list) == 5
+
+        # The first occurrence of the object itself is removed
+        weak_list.remove(b2)
+        weak_list.remove(a)
+        assert list(weak_list) == [b, c, a]
+        assert weak_list[2] is a
+
+        # Not in the list: removes an equal object
+        weak_list.remove(Item('c'))
+        assert list(weak_list) == [b, a]
+        weak_list.remove(Item('z'))
+        assert list(weak_list) == [b, a]
+
+        assert a in weak_list
+        assert b2 in weak_list  # Equal to b
+        assert c not in weak_list
+
+        # Removing before adding the object again
+        weak_list.remove(a)
+        weak_list.append(a)
+        assert list(weak_list) == [b, a]
+
+        # Dead references are counted without iterating
+        del b
+        assert weak_list._dead_count == 1
+        assert len(weak_list) == 1
+        assert weak_list._dead_count == 0
+        assert weak_list._counts == {id(a): 1}
+
+        weak_list.remove(a)
+        weak_list.remove(a)
+        assert len(weak_list) == 0
+        assert weak_list._counts == {}
+        assert weak_list._removed == {}
+
+
+    def testWeakPerformance__flaky(self):
+        '''
+        Operations with 100k objects.
+
+        Results 2026-10-18 (weakref callbacks, WeakList with counts of the objects)
+        ---------------------------------------------------------
+        WeakSet: add 0.089s, iterate 0.006s, len 0.000s, remove 1000 0.001s, len after deaths 0.000s
+        WeakList: add 0.147s, iterate 0.004s, len 0.000s, remove 1000 0.000s, len after deaths 0.009s
+        ---------------------------------------------------------
+
+        Results < 2026-10-18 (dead references removed when iterating)
+        ---------------------------------------------------------
+        WeakSet: add 0.074s, iterate 0.009s, len 0.007s, remove 1000 0.001s, len after deaths 0.008s
+        WeakList: add 0.063s, iterate 0.004s, len 0.004s, remove 1000 4.373s, len after deaths 0.210s
+        ---------------------------------------------------------
+        '''
+        import time
+
+        class Item(object):
+            pass
+
+        def Time(func):
+            start = time.time()
+            func()
+            return time.time() - start
+
+        PRINT_PERFORMANCE = False
+        count = 100000
+        for cls in (WeakSet, WeakList):
+            items = [Item() for _i in xrange(count)]
+            weak_container = cls()
+            add = weak_container.add if cls is WeakSet else weak_container.append
+            timing = [
+                ('add', Time(lambda: [add(item) for item in items])),
+                ('iterate', Time(lambda: [item for item in weak_container])),
+                ('len', Time(lambda: len(weak_container))),
+                ('remove 1000', Time(lambda: [weak_container.remove(item) for item in items[-1000:]])),
+            ]
+            del items[:count // 2]
+            timing.append(('len after deaths', Time(lambda: len(weak_container))))
+            assert len(weak_container) == count // 2 - 1000
+
+            if PRINT_PERFORMANCE:
+                print '%s: %s' % (cls.__name__, ', '.join('%s %.3fs' % i for i in timing))
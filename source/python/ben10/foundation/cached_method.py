@@ -22,13 +22,19 @@ class AbstractCachedMethod(Method):
         self.ResetCounters()
 
 
+    _MISSING = []
+
     def __call__(self, *args, **kwargs):
         key = self.GetCacheKey(*args, **kwargs)
-        result = None
+        result = self._MISSING
+
+        if self.enabled:
+            # A single lookup: in caches whose results expire (e.g. TTLCache) the result could
+            # expire between checking that it exists and getting it.
+            result = self._GetCacheResult(key, self._MISSING)
 
-        if self.enabled and self._HasResult(key):
+        if result is not self._MISSING:
             self.hit_count += 1
-            result = self._GetCacheResult(key, result)
         else:
             self.miss_count += 1
             result = self._CallMethod(*args, **kwargs)
@@ -79,7 +85,11 @@ class AbstractCachedMethod(Method):
         self.miss_count = 0
 
 
-    def _GetCacheResult(self, key, result):
+    def _GetCacheResult(self, key, default):
+        '''
+        :returns:
+            The result cached for the given key, or `default` if it is not in the cache.
+        '''
         raise NotImplementedError()
 
 
@@ -89,12 +99,23 @@ class AbstractCachedMethod(Method):
 #===================================================================================================
 class CachedMethod(AbstractCachedMethod):
     '''
-        Stores ALL the different results and never delete them.
+        Stores ALL the different results and never delete them (unless a pruning cache is given
+        as results, such as LRU, LFU or TTLCache).
     '''
 
-    def __init__(self, cached_method=None):
+    def __init__(self, cached_method=None, results=None):
+        '''
+        :type cached_method: bound method to be cached
+        :param cached_method:
+        :type results: an optional dict-like object to keep the cache results (e.g. LRU(100) or
+            TTLCache(100, ttl=60.0) to prune the results)
+        :param results:
+        '''
         super(CachedMethod, self).__init__(cached_method)
-        self._results = {}
+        if results is None:
+            self._results = {}
+        else:
+            self._results = results
 
 
     def _HasResult(self, key):
@@ -109,8 +130,8 @@ class CachedMethod(AbstractCachedMethod):
         self._results.clear()
 
 
-    def _GetCacheResult(self, key, result):
-        return self._results[key]
+    def _GetCacheResult(self, key, default):
+        return self._results.get(key, default)
 
 
 
@@ -159,8 +180,10 @@ class LastResultCachedMethod(AbstractCachedMethod):
         self._result = None
 
 
-    def _GetCacheResult(self, key, result):
-        return self._result
+    def _GetCacheResult(self, key, default):
+        if self._key == key:
+            return self._result
+        return default
 
 
 #===================================================================================================
@@ -183,16 +206,14 @@ class AttributeBasedCachedMethod(CachedMethod):
         :type results: an optional ref. to an C{odict} for keep cache results
         :param results:
         '''
-        CachedMethod.__init__(self, cached_method)
+        if results is None:
+            results = odict()
+        CachedMethod.__init__(self, cached_method, results)
         if isinstance(attr_name_list, unicode):
             self._attr_name_list = attr_name_list.split()
         else:
             self._attr_name_list = attr_name_list
         self._cache_size = cache_size
-        if results is None:
-            self._results = odict()
-        else:
-            self._results = results
 
 
     def GetCacheKey(self, *args, **kwargs):
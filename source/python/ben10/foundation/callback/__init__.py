@@ -1,7 +1,9 @@
 from __future__ import unicode_literals
 from _callback import ErrorNotHandledInCallback, FunctionNotRegisteredError, HandleErrorOnCallback
+from _callback_executor import CallbackExecutor
 from _callback_wrapper import _CallbackWrapper
 from _callbacks import Callbacks
+from _defer import DeferCallbacks
 from _fast_callback import Callback
 from _priority_callback import PriorityCallback
 from _shortcuts import After, Before, Remove, WrapForCallback
@@ -0,0 +1,205 @@
+from __future__ import unicode_literals
+from collections import deque
+import threading
+
+
+
+#===================================================================================================
+# CallbackExecutor
+#===================================================================================================
+class CallbackExecutor(object):
+    '''
+    Delivers the calls of callbacks in worker threads, so that slow listeners (e.g. UI updates or
+    logging) don't stall the code emitting the callbacks:
+
+        executor = CallbackExecutor(workers=2)
+        on_progress = Callback(executor=executor)
+        on_progress.Register(UpdateProgressBar)
+
+        on_progress(10)  # Returns immediately: UpdateProgressBar is called in a worker thread
+
+    Guarantees:
+        - Each listener receives the calls in the order they were emitted, and never receives two
+          calls at the same time (different listeners may be called concurrently).
+        - When max_pending calls are waiting to be delivered, emitting blocks until one of them is
+          delivered (so fast emitters can't exhaust the memory with pending calls). Emissions from
+          listeners (in the worker threads) never block, since only the workers deliver the calls.
+        - Errors raised by the listeners can't stop the emitter: they are always reported through
+          HandleErrorOnCallback.
+
+    .. note:: Listeners of bound methods are kept alive until their pending calls are delivered
+        (the calls are never dropped because the object died after emitting them).
+    '''
+
+    def __init__(self, workers=1, max_pending=10000):
+        '''
+        :param int workers:
+            The number of worker threads.
+
+        :param int max_pending:
+            The maximum number of calls waiting to be delivered.
+        '''
+        self._workers = workers
+        self._pool = None
+        self._slots = threading.Semaphore(max_pending)
+
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending_count = 0
+
+        # listener key -> deque of the calls to deliver to the listener (only while it has calls)
+        self._mailboxes = {}
+
+        # `delivering` is True in the worker threads
+        self._local = threading.local()
+
+
+    def CreateSubmitter(self, callback, key, entry):
+        '''
+        :param Callback callback:
+            The callback with the listener.
+
+        :param object key:
+            Identifies the listener (calls to the same key are delivered in order).
+
+        :param tuple entry:
+            The dispatch entry (func_obj, func_func, func_class, extra_args) of the listener (see
+            Callback._CalculateDispatch).
+
+        :rtype: callable
+        :returns:
+            A function that schedules the listener call with the arguments it receives.
+        '''
+        import weakref
+
+        callback_ref = weakref.ref(callback)
+        key = (id(callback), key)
+
+        def Submit(*args, **kwargs):
+            func_obj = entry[0]
+            if func_obj is not None:
+                func_obj = func_obj()
+                if func_obj is None:
+                    return  # self is dead
+            # The call keeps a strong reference to the object until it is delivered
+            self._Submit(key, (callback_ref, func_obj, entry, args, kwargs))
+
+        return Submit
+
+
+    def WaitIdle(self):
+        '''
+        Waits until all the calls submitted are delivered.
+
+        :raises RuntimeError:
+            If called from a listener (the call being delivered would never finish).
+        '''
+        if getattr(self._local, 'delivering', False):
+            raise RuntimeError('CallbackExecutor.WaitIdle called from a listener would never return.')
+        with self._idle:
+            while self._pending_count:
+                self._idle.wait()
+
+
+    def Shutdown(self):
+        '''
+        Waits until all the calls submitted are delivered and stops the worker threads (they're
+        started again if new calls are submitted).
+        '''
+        self.WaitIdle()
+        with self._idle:
+            # Calls submitted after WaitIdle returned (the pool is only changed under the lock, so
+            # once it is taken here no call is submitted to it anymore)
+            while self._pending_count:
+                self._idle.wait()
+            pool = self._pool
+            self._pool = None
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+
+    def _Submit(self, key, call):
+        # Blocks when there are max_pending calls (backpressure), except in the worker threads: they
+        # are the ones releasing the slots, so blocking there could block forever.
+        uses_slot = not getattr(self._local, 'delivering', False)
+        if uses_slot:
+            self._slots.acquire()
+        call = (uses_slot,) + call
+
+        with self._lock:
+            mailbox = self._mailboxes.get(key)
+            if mailbox is not None:
+                # A worker is already delivering the calls of this listener
+                self._pending_count += 1
+                mailbox.append(call)
+                return
+
+            mailbox = deque([call])
+            try:
+                if self._pool is None:
+                    from multiprocessing.pool import ThreadPool
+                    self._pool = ThreadPool(self._workers)
+                # Under the lock: Shutdown can't close the pool in the meantime, and the worker
+                # only reads the mailbox after it is registered
+                self._pool.apply_async(self._DeliverMailbox, (key, mailbox))
+            except:
+                if uses_slot:
+                    self._slots.release()
+                raise
+            self._mailboxes[key] = mailbox
+            self._pending_count += 1
+
+
+    def _DeliverMailbox(self, key, mailbox):
+        '''
+        Delivers the calls of a listener (including the ones added while delivering them).
+        '''
+        self._local.delivering = True
+        try:
+            while mailbox:
+                with self._lock:
+                    call = mailbox.popleft()
+
+                uses_slot = call[0]
+                try:
+                    self._Deliver(*call[1:])
+                finally:
+                    with self._lock:
+                        self._pending_count -= 1
+                        # Dropped along with the last call (so that the executor is clean when idle):
+                        # new calls for the listener get a new mailbox
+                        if not mailbox:
+                            del self._mailboxes[key]
+                        if not self._pending_count:
+                            self._idle.notify_all()
+                    if uses_slot:
+                        self._slots.release()
+        except:
+            # Errors not handled by _Deliver (e.g. SystemExit, or errors in the error handler):
+            # the remaining calls of the listener are delivered by another task (the pool is still
+            # running since these calls are pending). The error is not raised again: the pool
+            # ignores the results of the tasks, and a SystemExit would stop the worker thread
+            # without finishing the task (so that closing the pool would never return).
+            with self._lock:
+                if mailbox:
+                    self._pool.apply_async(self._DeliverMailbox, (key, mailbox))
+
+
+    @classmethod
+    def _Deliver(cls, callback_ref, func_obj, entry, args, kwargs):
+        _func_obj_ref, func_func, func_class, extra_args = entry
+        try:
+            if func_obj is None:
+                func_func(*extra_args + args, **kwargs)
+            else:
+                func_func(func_obj, *extra_args + args, **kwargs)
+        except Exception:
+            callback = callback_ref()
+            if func_obj is None and callback is not None and callback._HandleDeadWrapper(func_func):
+                return
+
+            from _callback import HandleErrorOnCallback
+            from _fast_callback import Callback
+            func = Callback._GetCallable(func_obj, func_func, func_class)
+            HandleErrorOnCallback(func, *extra_args + args, **kwargs)
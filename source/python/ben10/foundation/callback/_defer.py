@@ -0,0 +1,141 @@
+from __future__ import unicode_literals
+from _fast_callback import Callback
+import thread
+import threading
+
+
+
+#===================================================================================================
+# DeferCallbacks
+#===================================================================================================
+class DeferCallbacks(object):
+    '''
+    Context manager that defers the calls of callbacks until the end of the block, so that bulk
+    updates notify the listeners only once for each different call:
+
+        with DeferCallbacks(curve.on_changed, After(curve.SetValue, OnValueChanged)):
+            for i, value in enumerate(values):
+                curve.SetValue(i, value)
+
+    Repeated calls (with the same arguments) are coalesced by default: only the first one is
+    delivered. When the calls can be combined in a single call, a merge function may be given to
+    deliver all of them as one batch call:
+
+        def MergeChanges(calls):
+            changed = set(args[0] for args, _kwargs in calls)
+            return (changed,), {}
+
+        with DeferCallbacks(model.on_changed, merge=MergeChanges):
+            ...
+
+    Blocks may be nested: the calls are delivered when the outermost block (deferring the callback)
+    exits (even when leaving with an exception).
+
+    Only the calls made by the thread executing the block are deferred: the calls made by other
+    threads are delivered immediately (or deferred by their own blocks).
+    '''
+
+    # Serializes the changes in Callback._deferred (blocks may be entered by many threads)
+    _lock = threading.Lock()
+
+    def __init__(self, *callbacks, **kwargs):
+        '''
+        :param Callback|_MethodWrapper|method callbacks:
+            The callbacks to defer. Methods wrapped by Before/After have their before and after
+            callbacks deferred.
+
+        :param bool coalesce:
+            If True, repeated calls (with the same arguments) are delivered only once (in the order
+            of their first call). Calls with unhashable arguments are never coalesced.
+
+        :param callable merge:
+            Receives the list of (args, kwargs) calls deferred for a callback and returns the
+            (args, kwargs) of a single call to deliver instead of them.
+        '''
+        self._coalesce = kwargs.pop('coalesce', True)
+        self._merge = kwargs.pop('merge', None)
+        if kwargs:
+            raise TypeError('Unexpected keyword arguments: %s' % ', '.join(sorted(kwargs)))
+
+        self._callbacks = []
+        for callback in callbacks:
+            self._callbacks.extend(self._GetCallbacks(callback))
+
+        # The callbacks deferred by this block (not by an outer block in the same thread).
+        self._deferring = []
+
+
+    @classmethod
+    def _GetCallbacks(cls, callback):
+        '''
+        :rtype: list(Callback)
+        :returns:
+            The Callback objects to defer for the given callback (or method with callbacks).
+        '''
+        if isinstance(callback, Callback):
+            return [callback]
+
+        from _shortcuts import _GetWrapped
+        wrapped = _GetWrapped(callback)
+        if wrapped is None:
+            raise TypeError('Expected a Callback or a method wrapped by Before/After: %r' % (callback,))
+        return [c for c in (wrapped._before, wrapped._after) if c is not None]
+
+
+    def __enter__(self):
+        ident = thread.get_ident()
+        with self._lock:
+            for callback in self._callbacks:
+                deferred = callback._deferred
+                if deferred is None:
+                    deferred = callback._deferred = {}
+                if ident not in deferred:
+                    deferred[ident] = []
+                    self._deferring.append(callback)
+        return self
+
+
+    def __exit__(self, *args):
+        deferring = self._deferring
+        self._deferring = []
+
+        ident = thread.get_ident()
+        calls_list = []
+        with self._lock:
+            for callback in deferring:
+                deferred = callback._deferred
+                calls_list.append(deferred.pop(ident))
+                if not deferred:
+                    callback._deferred = None
+
+        for callback, calls in zip(deferring, calls_list):
+            if self._coalesce:
+                calls = self._Coalesce(calls)
+            if self._merge is not None and calls:
+                calls = [self._merge(calls)]
+
+            for args, kwargs in calls:
+                callback(*args, **kwargs)
+
+
+    @classmethod
+    def _Coalesce(cls, calls):
+        '''
+        :param list(tuple(tuple,dict)) calls:
+
+        :rtype: list(tuple(tuple,dict))
+        :returns:
+            The calls without repetitions (keeping the first one).
+        '''
+        result = []
+        seen = set()
+        for args, kwargs in calls:
+            try:
+                key = (args, frozenset(kwargs.iteritems()))
+                if key in seen:
+                    continue
+                seen.add(key)
+            except TypeError:
+                pass  # Unhashable arguments
+            result.append((args, kwargs))
+        return result
@@ -5,6 +5,7 @@ from ben10.foundation.odict import odict
 from ben10.foundation.reraise import Reraise
 import inspect
 import new
+import thread
 import weakref
 
 
@@ -23,6 +24,10 @@ class Callback(object):
 
     .. note:: it only stores weakrefs to objects connected
 
+    .. note:: The list of functions to call is computed once and reused in all calls until a
+        function is registered or unregistered (or an object connected dies, which is notified by
+        the weakref callback).
+
     .. note:: __slots__ added, so, it cannot have weakrefs to it (but as it stores weakrefs
         internally, that shouldn't be a problem). If weakrefs are really needed,
         __weakref__ should be added to the slots.
@@ -30,6 +35,9 @@ class Callback(object):
 
     __slots__ = [
         '_callbacks',
+        '_deferred',
+        '_dispatch',
+        '_executor',
         '_handle_errors',
         '__weakref__'  # We need this to be able to add weak references to callback objects.
     ]
@@ -42,20 +50,33 @@ class Callback(object):
     INFO_POS_FUNC_FUNC = 1
     INFO_POS_FUNC_CLASS = 2
 
-    def __init__(self, handle_errors=None):
+    def __init__(self, handle_errors=None, executor=None):
         '''
         :param bool handle_errors:
             If True, any errors raised while calling the callbacks will not stop the execution
             flow of the application, but will call the system error handler so that error
             does not fail silently.
+
+        :param CallbackExecutor executor:
+            If given, the registered functions are called asynchronously by this executor (and
+            errors are always handled).
         '''
         if handle_errors is None:
             handle_errors = self.DEFAULT_HANDLE_ERRORS
         self._handle_errors = handle_errors
+        self._executor = executor
         # _callbacks is no longer lazily created: This makes the creation a bit slower, but
         # everything else is faster (as having to check for hasattr each time is slow).
         self._callbacks = odict()
 
+        # Tuple of (func_obj, func_func, func_class, extra_args), calculated from _callbacks when
+        # needed (None means it must be calculated again).
+        self._dispatch = None
+
+        # Thread id -> list with the (args, kwargs) of the calls deferred by DeferCallbacks in
+        # that thread (None when the calls are not being deferred in any thread).
+        self._deferred = None
+
 
     def _GetKey(self, func):
         '''
@@ -97,7 +118,11 @@ class Callback(object):
         try:
             if func.im_self is not None:
                 # bound method
-                return (weakref.ref(func.im_self), func.im_func, func.im_class)
+                return (
+                    weakref.ref(func.im_self, _CreateDispatchInvalidator(self)),
+                    func.im_func,
+                    func.im_class,
+                )
             else:
                 # unbound method
                 return (None, func.im_func, func.im_class)
@@ -111,52 +136,36 @@ class Callback(object):
         '''
         Calls every registered function with the given args and kwargs.
         '''
-        callbacks = self._callbacks
-        if not callbacks:
+        deferred = self._deferred
+        if deferred is not None:
+            calls = deferred.get(thread.get_ident())
+            if calls is not None:
+                calls.append((args, kwargs))
+                return
+
+        dispatch = self._dispatch
+        if dispatch is None:
+            dispatch = self._CalculateDispatch()
+        if not dispatch:
             return
 
-        #Note: There's a copy of this code in the _CalculateToCall method below. It's a copy
-        #because we don't want to had a function call overhead here.
-        to_call = []
-
-
-        for id, info_and_extra_args in callbacks.items(): #iterate in a copy
-
-            info = info_and_extra_args[0]
-            func_obj = info[self.INFO_POS_FUNC_OBJ]
-            if func_obj is not None:
-                #Ok, we have a self.
-                func_obj = func_obj()
-                if func_obj is None:
-                    #self is dead
-                    del callbacks[id]
-                else:
-                    func_func = info[self.INFO_POS_FUNC_FUNC]
-                    to_call.append(
-                        (
-                            new.instancemethod(func_func, func_obj, info[self.INFO_POS_FUNC_CLASS]),
-                            info_and_extra_args[1]
-                        )
-                    )
-            else:
-                func_func = info[self.INFO_POS_FUNC_FUNC]
-                if func_func.__class__ == _CallbackWrapper:
-                    #The instance of the _CallbackWrapper already died! (func_obj is None)
-                    original_method = func_func.OriginalMethod()
-                    if original_method is None:
-                        del callbacks[id]
-                        continue
-
-                #No self: either classmethod or just callable
-                to_call.append((func_func, info_and_extra_args[1]))
-
+        #Note: calls func_func(func_obj, ...) instead of creating a bound method for each call (the
+        #bound method is only created to report errors).
         #let's keep the 'if' outside of the iteration...
         if self._handle_errors:
-            for func, extra_args in to_call:
+            for func_obj, func_func, func_class, extra_args in dispatch:
                 try:
-                    func(*extra_args + args, **kwargs)
+                    if func_obj is None:
+                        func_func(*extra_args + args, **kwargs)
+                    else:
+                        func_obj = func_obj()
+                        if func_obj is not None:  # Otherwise, self is dead
+                            func_func(func_obj, *extra_args + args, **kwargs)
                 except Exception, e:
+                    if func_obj is None and self._HandleDeadWrapper(func_func):
+                        continue
                     from _callback import ErrorNotHandledInCallback
+                    func = self._GetCallable(func_obj, func_func, func_class)
                     #Note that if some error shouldn't really be handled here, clients can raise
                     #a subclass of ErrorNotHandledInCallback
                     if isinstance(e, ErrorNotHandledInCallback):
@@ -165,54 +174,111 @@ class Callback(object):
                         from _callback import HandleErrorOnCallback
                         HandleErrorOnCallback(func, *extra_args + args, **kwargs)
         else:
-            for func, extra_args in to_call:
+            for func_obj, func_func, func_class, extra_args in dispatch:
                 try:
-                    func(*extra_args + args, **kwargs)
+                    if func_obj is None:
+                        func_func(*extra_args + args, **kwargs)
+                    else:
+                        func_obj = func_obj()
+                        if func_obj is not None:  # Otherwise, self is dead
+                            func_func(func_obj, *extra_args + args, **kwargs)
                 except Exception, e:
+                    if func_obj is None and self._HandleDeadWrapper(func_func):
+                        continue
+                    func = self._GetCallable(func_obj, func_func, func_class)
                     Reraise(e, 'Error while trying to call %r' % func)
 
 
-    def _CalculateToCall(self):
+    @classmethod
+    def _GetCallable(cls, func_obj, func_func, func_class):
         '''
-        Copy of the code above so that subclasses can use it (we don't want the overhead in the
-        call above).
+        :rtype: object
+        :returns:
+            The function (or bound method) called for an entry of the dispatch list (func_obj is
+            the object already dereferenced).
         '''
-        callbacks = self._callbacks
-        if not callbacks:
-            return
+        if func_obj is None:
+            return func_func
+        return new.instancemethod(func_func, func_obj, func_class)
 
-        to_call = []
+
+    def _CalculateDispatch(self):
+        '''
+        Calculates the dispatch list (removing the callbacks of dead objects).
+
+        :rtype: tuple(tuple(weakref|None,object,type|None,tuple))
+        :returns:
+            The entries (func_obj, func_func, func_class, extra_args) of the functions to call.
+        '''
+        callbacks = self._callbacks
+        dispatch = []
 
         for id, info_and_extra_args in callbacks.items(): #iterate in a copy
 
             info = info_and_extra_args[0]
             func_obj = info[self.INFO_POS_FUNC_OBJ]
+            func_func = info[self.INFO_POS_FUNC_FUNC]
             if func_obj is not None:
-                #Ok, we have a self.
-                func_obj = func_obj()
-                if func_obj is None:
+                if func_obj() is None:
                     #self is dead
                     del callbacks[id]
-                else:
-                    func_func = info[self.INFO_POS_FUNC_FUNC]
-                    to_call.append(
-                        (
-                            new.instancemethod(func_func, func_obj, info[self.INFO_POS_FUNC_CLASS]),
-                            info_and_extra_args[1]
-                        )
-                    )
-            else:
-                func_func = info[self.INFO_POS_FUNC_FUNC]
-                if func_func.__class__ == _CallbackWrapper:
-                    #The instance of the _CallbackWrapper already died! (func_obj is None)
-                    original_method = func_func.OriginalMethod()
-                    if original_method is None:
-                        del callbacks[id]
-                        continue
+                    continue
+            elif func_func.__class__ == _CallbackWrapper:
+                #The instance of the _CallbackWrapper already died! (func_obj is None)
+                if func_func.OriginalMethod() is None:
+                    del callbacks[id]
+                    continue
+
+            entry = (func_obj, func_func, info[self.INFO_POS_FUNC_CLASS], info_and_extra_args[1])
+            if self._executor is not None:
+                # The function called just submits the call to the executor
+                entry = (None, self._executor.CreateSubmitter(self, id, entry), None, ())
+            dispatch.append(entry)
+
+        self._dispatch = dispatch = tuple(dispatch)
+        return dispatch
 
-                #No self: either classmethod or just callable
-                to_call.append((func_func, info_and_extra_args[1]))
 
+    def _HandleDeadWrapper(self, func_func):
+        '''
+        A _CallbackWrapper has no notification of its death: it raises an error when called, which
+        is checked here.
+
+        :rtype: bool
+        :returns:
+            True if func_func is a _CallbackWrapper whose instance already died (in which case the
+            dispatch list is invalidated, so that it's removed).
+        '''
+        if func_func.__class__ == _CallbackWrapper and func_func.OriginalMethod() is None:
+            self._dispatch = None
+            return True
+        return False
+
+
+    def _CalculateToCall(self):
+        '''
+        Calculates the functions to call (for subclasses).
+
+        :rtype: list(tuple(object,tuple))|None
+        :returns:
+            The functions to call with their extra args (None if there are no callbacks).
+        '''
+        dispatch = self._dispatch
+        if dispatch is None:
+            dispatch = self._CalculateDispatch()
+        if not dispatch:
+            return
+
+        to_call = []
+        for func_obj, func_func, func_class, extra_args in dispatch:
+            if func_obj is not None:
+                func_obj = func_obj()
+                if func_obj is None:
+                    #self is dead
+                    continue
+            elif self._HandleDeadWrapper(func_func):
+                continue
+            to_call.append((self._GetCallable(func_obj, func_func, func_class), extra_args))
         return to_call
 
 
@@ -241,6 +307,7 @@ class Callback(object):
         callbacks = self._callbacks
         callbacks.pop(key, None) #Remove if it exists
         callbacks[key] = (self._GetInfo(func), extra_args)
+        self._dispatch = None
 
 
     def Contains(self, func):
@@ -273,6 +340,7 @@ class Callback(object):
             if func_obj is None:
                 #self is dead
                 del callbacks[key]
+                self._dispatch = None
                 return False
             else:
                 return func == new.instancemethod(
@@ -283,6 +351,7 @@ class Callback(object):
                 original_method = func_func.OriginalMethod()
                 if original_method is None:
                     del callbacks[key]
+                    self._dispatch = None
                     return False
                 return original_method == func
 
@@ -316,6 +385,8 @@ class Callback(object):
             # Even when unregistering some function that isn't registered we shouldn't trigger an
             # exception, just do nothing
             pass
+        else:
+            self._dispatch = None
 
 
     def UnregisterAll(self):
@@ -323,9 +394,28 @@ class Callback(object):
         Unregisters all functions
         '''
         self._callbacks.clear()
+        self._dispatch = None
 
 
     def __len__(self):
         return len(self._callbacks)
 
 
+
+def _CreateDispatchInvalidator(callback):
+    '''
+    :param Callback callback:
+
+    :rtype: callable(weakref)
+    :returns:
+        A weakref callback that invalidates the dispatch list of the given callback (without
+        keeping it alive).
+    '''
+    callback_ref = weakref.ref(callback)
+
+    def InvalidateDispatch(_ref):
+        callback = callback_ref()
+        if callback is not None:
+            callback._dispatch = None
+
+    return InvalidateDispatch
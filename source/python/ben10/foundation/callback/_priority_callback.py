@@ -57,3 +57,4 @@ class PriorityCallback(Callback):
             i += 1
 
         callbacks.insert(i, key, (new_info, extra_args))
+        self._dispatch = None
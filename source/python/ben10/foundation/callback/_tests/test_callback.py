@@ -925,3 +925,454 @@ class Test(object):
         c.Unregister(magic_mock)
         c(30, name='Z')
         assert len(magic_mock.call_args_list) == 2
+
+
+    def testDispatchInvalidation(self):
+        called = []
+
+        class Listener(object):
+            def __init__(self, name):
+                self.name = name
+
+            def OnChanged(self, value):
+                called.append((self.name, value))
+
+        def OnChanged(extra, value):
+            called.append(('function', extra, value))
+
+        a = Listener('a')
+        b = Listener('b')
+        c = Callback()
+        c.Register(a.OnChanged)
+        c(1)
+        assert called == [('a', 1)]
+        assert c._dispatch is not None
+
+        c.Register(b.OnChanged)
+        c.Register(OnChanged, extra_args=[0])
+        assert c._dispatch is None
+        c(2)
+        assert called == [('a', 1), ('a', 2), ('b', 2), ('function', 0, 2)]
+
+        c.Unregister(OnChanged)
+        del called[:]
+        c(3)
+        assert called == [('a', 3), ('b', 3)]
+
+        # The dispatch list is invalidated (by the weakref callback) when a listener dies
+        del a
+        assert c._dispatch is None
+        assert len(c) == 2
+        del called[:]
+        c(4)
+        assert called == [('b', 4)]
+        assert len(c) == 1
+
+        c.UnregisterAll()
+        del called[:]
+        c(5)
+        assert called == []
+
+        # Dead _CallbackWrapper objects are only noticed when called
+        class Sender(object):
+            pass
+
+        class SenderListener(object):
+            def OnChanged(self, sender, value):
+                called.append((sender, value))
+
+        sender = Sender()
+        listener = SenderListener()
+        c = Callback()
+        c.Register(_CallbackWrapper(WeakMethodRef(listener.OnChanged)))
+        c(weakref.ref(sender), 6)
+        assert called == [(sender, 6)]
+
+        del listener
+        c(weakref.ref(sender), 7)
+        assert called == [(sender, 6)]
+        assert c._dispatch is None
+        assert len(c) == 1
+        c(weakref.ref(sender), 8)
+        assert len(c) == 0
+
+
+    def testCallbackPerformance__flaky(self):
+        '''
+        Time of each emission of a callback with listeners that are bound methods (and time of
+        calling the same methods directly).
+
+        Results 2026-10-18 (dispatch list computed only when the callback changes)
+        ---------------------------------------------------------
+          0 listeners:  0.12 us (direct:  0.05 us)
+          1 listeners:  0.26 us (direct:  0.08 us)
+         10 listeners:  1.14 us (direct:  0.36 us)
+        100 listeners:  9.85 us (direct:  2.84 us)
+        ---------------------------------------------------------
+
+        Results < 2026-10-18 (bound methods created in each call)
+        ---------------------------------------------------------
+          0 listeners:  0.11 us
+          1 listeners:  0.51 us
+         10 listeners:  2.72 us
+        100 listeners: 23.86 us
+        ---------------------------------------------------------
+        '''
+        import timeit
+
+        class Listener(object):
+            def OnChanged(self, value):
+                pass
+
+        PRINT_PERFORMANCE = False
+        for count in (0, 1, 10, 100):
+            listeners = [Listener() for _i in xrange(count)]
+            methods = [listener.OnChanged for listener in listeners]
+            callback = Callback()
+            for method in methods:
+                callback.Register(method)
+
+            def Direct():
+                for method in methods:
+                    method(1)
+
+            number = 100000 // max(count, 1)
+            callback_time = min(timeit.repeat(lambda: callback(1), repeat=7, number=number))
+            direct_time = min(timeit.repeat(Direct, repeat=7, number=number))
+            if PRINT_PERFORMANCE:
+                print '%3d listeners: %5.2f us (direct: %5.2f us)' % (
+                    count, callback_time / number * 1e6, direct_time / number * 1e6)
+
+
+    def testDeferCallbacks(self):
+        from ben10.foundation.callback import DeferCallbacks, PriorityCallback
+
+        called = []
+        def OnChanged(*args, **kwargs):
+            called.append((args, kwargs))
+
+        c = Callback()
+        c.Register(OnChanged)
+
+        with DeferCallbacks(c):
+            c(1)
+            c(2, name='a')
+            c(1)
+            c([3])  # Unhashable: never coalesced
+            c([3])
+            c(2, name='a')
+            assert called == []
+        assert called == [((1,), {}), ((2,), {'name': 'a'}), (([3],), {}), (([3],), {})]
+
+        del called[:]
+        with DeferCallbacks(c, coalesce=False):
+            c(1)
+            c(1)
+        assert called == [((1,), {}), ((1,), {})]
+
+        # Merging all the calls in a single call
+        del called[:]
+        def Merge(calls):
+            return (set(args[0] for args, _kwargs in calls),), {}
+
+        with DeferCallbacks(c, merge=Merge):
+            c(1)
+            c(2)
+            c(1)
+        assert called == [((set([1, 2]),), {})]
+
+        del called[:]
+        with DeferCallbacks(c, merge=Merge):
+            pass
+        assert called == []
+
+        # Nested blocks: the calls are delivered by the outermost one (even with errors)
+        del called[:]
+        with pytest.raises(RuntimeError):
+            with DeferCallbacks(c):
+                with DeferCallbacks(c):
+                    c(1)
+                assert called == []
+                c(2)
+                raise RuntimeError()
+        assert called == [((1,), {}), ((2,), {})]
+
+        # After the block, calls are immediate again
+        del called[:]
+        c(3)
+        assert called == [((3,), {})]
+
+        # PriorityCallback and methods wrapped by Before/After
+        priority_callback = PriorityCallback()
+        priority_callback.Register(OnChanged)
+
+        class Model(object):
+            def SetValue(self, value):
+                pass
+
+        model = Model()
+        After(model.SetValue, OnChanged)
+        del called[:]
+        with DeferCallbacks(priority_callback, model.SetValue):
+            priority_callback('p')
+            model.SetValue(1)
+            model.SetValue(1)
+            assert called == []
+        assert called == [(('p',), {}), ((1,), {})]
+
+        with pytest.raises(TypeError):
+            DeferCallbacks(OnChanged)
+
+        with pytest.raises(TypeError):
+            DeferCallbacks(c, unknown=True)
+
+
+    def testDeferCallbacksThreads(self):
+        from ben10.foundation.callback import DeferCallbacks
+        import threading
+
+        called = []
+        def OnChanged(*args):
+            called.append(args)
+
+        c = Callback()
+        c.Register(OnChanged)
+
+        def Emit(*args):
+            thread = threading.Thread(target=c, args=args)
+            thread.start()
+            thread.join()
+
+        # Calls from other threads are not deferred by the block
+        with DeferCallbacks(c):
+            c(1)
+            Emit(2)
+            assert called == [(2,)]
+        assert called == [(2,), (1,)]
+
+        # Each thread defers its own calls
+        del called[:]
+        entered = threading.Event()
+        release = threading.Event()
+        def Defer():
+            with DeferCallbacks(c):
+                c('thread')
+                entered.set()
+                release.wait()
+
+        thread = threading.Thread(target=Defer)
+        thread.start()
+        entered.wait()
+        with DeferCallbacks(c):
+            c('main')
+            release.set()
+            thread.join()
+            assert called == [('thread',)]
+        assert called == [('thread',), ('main',)]
+        assert c._deferred is None
+
+
+    def testCallbackExecutor(self, handled_exceptions):
+        from ben10.foundation.callback import CallbackExecutor, PriorityCallback
+        import threading
+
+        executor = CallbackExecutor(workers=4)
+        try:
+            # The calls are delivered in worker threads, in order for each listener
+            received = {'a': [], 'b': []}
+            threads = set()
+            release = threading.Event()
+
+            def ListenerA(value):
+                release.wait()
+                received['a'].append(value)
+                threads.add(threading.current_thread())
+
+            def ListenerB(value):
+                received['b'].append(value)
+
+            c = PriorityCallback(executor=executor)
+            c.Register(ListenerA)
+            c.Register(ListenerB)
+
+            for i in xrange(100):
+                c(i)
+
+            # The slow listener doesn't stall the emitter nor the other listener
+            assert received['a'] == []
+            release.set()
+            executor.WaitIdle()
+            assert received == {'a': range(100), 'b': range(100)}
+            assert threading.current_thread() not in threads
+
+            # Errors are reported through HandleErrorOnCallback
+            def Fail(value):
+                raise RuntimeError('test')
+
+            c = Callback(handle_errors=False, executor=executor)
+            c.Register(Fail)
+            c(1)
+            executor.WaitIdle()
+            assert handled_exceptions.GetHandledExceptionTypes() == [RuntimeError]
+            handled_exceptions.ClearHandledExceptions()
+
+            # Calls to dead listeners are ignored
+            class Listener(object):
+                def OnChanged(self, value):
+                    received['a'].append(value)
+
+            listener = Listener()
+            c = Callback(executor=executor)
+            c.Register(listener.OnChanged)
+            del listener
+            c(1)
+            executor.WaitIdle()
+            assert received['a'] == range(100)
+
+            # ... but listeners dying after the call is emitted still receive it
+            single_executor = CallbackExecutor(workers=1)
+            try:
+                release.clear()
+                c = Callback(executor=single_executor)
+                c.Register(ListenerA)  # Blocks the worker
+                listener = Listener()
+                c.Register(listener.OnChanged)
+                c(100)
+                del listener
+                release.set()
+                single_executor.WaitIdle()
+                assert received['a'] == range(100) + [100, 100]
+            finally:
+                single_executor.Shutdown()
+        finally:
+            executor.Shutdown()
+
+
+    def testCallbackExecutorMaxPending(self):
+        from ben10.foundation.callback import CallbackExecutor
+        import threading
+
+        executor = CallbackExecutor(workers=1, max_pending=2)
+        try:
+            received = []
+            release = threading.Event()
+
+            def Listener(value):
+                release.wait()
+                received.append(value)
+
+            c = Callback(executor=executor)
+            c.Register(Listener)
+            c(0)
+            c(1)
+
+            # The 3rd call blocks until a pending call is delivered
+            emitted = threading.Event()
+            def Emit():
+                c(2)
+                emitted.set()
+            thread = threading.Thread(target=Emit)
+            thread.start()
+            assert not emitted.wait(0.2)
+
+            release.set()
+            thread.join()
+            assert emitted.is_set()
+            executor.WaitIdle()
+            assert received == [0, 1, 2]
+        finally:
+            executor.Shutdown()
+
+
+    def testCallbackExecutorReentrant(self):
+        from ben10.foundation.callback import CallbackExecutor
+
+        executor = CallbackExecutor(workers=1, max_pending=2)
+        try:
+            received = []
+            errors = []
+
+            def Listener(value):
+                received.append(value)
+                if value < 10:
+                    # Emitting from a listener never blocks, even with max_pending calls
+                    c(value + 1)
+                    c(value + 1)
+
+                try:
+                    executor.WaitIdle()
+                except RuntimeError, e:
+                    errors.append(e)
+
+            c = Callback(executor=executor)
+            c.Register(Listener)
+            c(0)
+            executor.WaitIdle()
+
+            assert len(received) == 2 ** 11 - 1
+            assert len(errors) == len(received)
+        finally:
+            executor.Shutdown()
+
+
+    def testCallbackExecutorErrors(self):
+        from ben10.foundation.callback import CallbackExecutor
+
+        executor = CallbackExecutor(workers=1)
+        try:
+            received = []
+            def Listener(value):
+                if value == 'exit':
+                    raise SystemExit()  # Not handled by _Deliver
+                received.append(value)
+
+            c = Callback(executor=executor, handle_errors=False)
+            c.Register(Listener)
+
+            # The calls after the error are still delivered (in order)
+            for value in ('exit', 1, 2, 'exit', 3):
+                c(value)
+            executor.WaitIdle()
+            assert received == [1, 2, 3]
+            assert executor._mailboxes == {}
+
+            # Errors submitting the calls (e.g. the pool was closed) are raised to the emitter,
+            # without leaving pending calls
+            def ApplyAsync(*args, **kwargs):
+                raise ValueError('Pool not running')
+
+            original_apply_async = executor._pool.apply_async
+            executor._pool.apply_async = ApplyAsync
+            with pytest.raises(ValueError):
+                c(4)
+            executor._pool.apply_async = original_apply_async
+            assert executor._mailboxes == {}
+            executor.WaitIdle()
+
+            c(5)
+            executor.WaitIdle()
+            assert received == [1, 2, 3, 5]
+        finally:
+            executor.Shutdown()
+
+
+    def testCallbackExecutorShutdownWhileEmitting(self):
+        from ben10.foundation.callback import CallbackExecutor
+        import threading
+
+        executor = CallbackExecutor(workers=2)
+        received = []
+        c = Callback(executor=executor)
+        c.Register(received.append)
+
+        def Emit():
+            for i in xrange(2000):
+                c(i)
+
+        emitter = threading.Thread(target=Emit)
+        emitter.start()
+        while emitter.is_alive():
+            executor.Shutdown()
+        emitter.join()
+        executor.Shutdown()
+        assert received == range(2000)
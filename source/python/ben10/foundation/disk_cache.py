@@ -0,0 +1,338 @@
+from __future__ import unicode_literals
+'''
+Disk cache module.
+
+A cache stored in a sqlite database, so the cached values are reused by other processes and by
+later runs of the same application (e.g. the results of expensive parses in command line tools).
+'''
+
+import os
+import threading
+
+DEFAULT_DISK_CACHE_SIZE = 256 * 1024 * 1024
+
+
+
+#===================================================================================================
+# DiskCache
+#===================================================================================================
+class DiskCache(object):
+    '''
+    A cache with a dict interface whose items are stored in a sqlite database file.
+
+    Usage:
+        @Memoize(backend=DiskCache('~/.cache/my_app.cache'))
+        def Parse(filename, mtime):
+            ...
+
+    Keys and values must be pickleable, and the keys must have a stable repr (which is used to
+    identify them across processes): basic types and tuples of basic types are fine, objects using
+    the default repr (which contains the object address) are never found again.
+
+    Each write happens in a transaction, so the database is never left with a partially written
+    entry, and many processes (and threads) may use the same database at the same time.
+
+    When the total size of the stored values exceeds max_size, the oldest entries are removed.
+
+    Entries are versioned: only the entries stored with the same version are found, so changing
+    the version invalidates the entries written by previous versions of the cached code.
+
+    The same database may be shared by many caches, each one using a different namespace (see
+    GetNamespace).
+    '''
+
+    def __init__(
+            self,
+            filename,
+            max_size=DEFAULT_DISK_CACHE_SIZE,
+            version=0,
+            namespace='',
+            on_evict=None,
+        ):
+        '''
+        :param unicode filename:
+            The database file (created if it doesn't exist).
+
+        :param int max_size:
+            The maximum total size (in bytes) of the pickled values in the database.
+
+        :param object version:
+            The version of the entries (any object with a stable unicode representation).
+
+        :param unicode namespace:
+            Keys in different namespaces are independent.
+
+        :param callable on_evict:
+            Called with the key text (see _GetKeyText) of each entry of the namespace removed by
+            the writes of this object because max_size was exceeded (removals caused by other
+            processes or namespaces are not reported).
+        '''
+        self.filename = os.path.abspath(os.path.expanduser(filename))
+        self.max_size = max_size
+        self.version = unicode(version)
+        self.namespace = namespace
+        self.on_evict = on_evict
+
+        # Connections can't be shared between threads (nor between processes, after a fork)
+        self._local = threading.local()
+
+
+    def GetNamespace(self, namespace, on_evict=None):
+        '''
+        :param unicode namespace:
+
+        :param callable on_evict:
+            See __init__.
+
+        :rtype: DiskCache
+        :returns:
+            A cache using the same database (and connections) with another namespace.
+        '''
+        import copy
+        result = copy.copy(self)
+        result.namespace = namespace
+        result.on_evict = on_evict
+        return result
+
+
+    def _GetConnection(self):
+        '''
+        :rtype: sqlite3.Connection
+        :returns:
+            The connection to the database for the current thread (and process).
+        '''
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            import sqlite3
+
+            dirname = os.path.dirname(self.filename)
+            if not os.path.isdir(dirname):
+                try:
+                    os.makedirs(dirname)
+                except OSError:
+                    if not os.path.isdir(dirname):  # Created by another process
+                        raise
+
+            # isolation_level=None: transactions are started explicitly (see _Write)
+            connection = sqlite3.connect(self.filename, timeout=60.0, isolation_level=None)
+            connection.text_factory = unicode
+            try:
+                connection.execute('PRAGMA journal_mode=WAL')  # Readers don't block writers
+            except sqlite3.DatabaseError:
+                pass  # Not supported by the file system: keep the default journal
+            # The rows replaced by INSERT OR REPLACE must fire the delete trigger
+            connection.execute('PRAGMA recursive_triggers=ON')
+
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                self._CreateTables(connection)
+            except:
+                connection.execute('ROLLBACK')
+                raise
+            connection.execute('COMMIT')
+
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+
+    def _CreateTables(self, connection):
+        '''
+        Creates the tables (if they don't exist yet).
+
+        The total size of the entries is kept in the meta table (updated by triggers), so that
+        checking max_size doesn't need to read all the entries.
+        '''
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            '    namespace TEXT,'
+            '    key TEXT,'
+            '    version TEXT,'
+            '    value BLOB,'
+            '    size INTEGER,'
+            '    stored REAL,'
+            '    PRIMARY KEY (namespace, key)'
+            ')'
+        )
+        connection.execute('CREATE INDEX IF NOT EXISTS entries_stored ON entries (stored)')
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER)')
+
+        # Databases created before the meta table: the total is computed only once
+        if connection.execute("SELECT 1 FROM meta WHERE name = 'total_size'").fetchone() is None:
+            connection.execute(
+                "INSERT INTO meta SELECT 'total_size', CAST(TOTAL(size) AS INTEGER) FROM entries")
+
+        connection.execute(
+            'CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN'
+            "    UPDATE meta SET value = value + NEW.size WHERE name = 'total_size';"
+            ' END'
+        )
+        connection.execute(
+            'CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN'
+            "    UPDATE meta SET value = value - OLD.size WHERE name = 'total_size';"
+            ' END'
+        )
+
+
+    def _Write(self, sql, parameters):
+        '''
+        Executes a statement that changes the database (in a transaction that also removes the
+        oldest entries if max_size is exceeded).
+
+        :rtype: int
+        :returns:
+            The number of rows changed by the statement.
+        '''
+        connection = self._GetConnection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            rowcount = connection.execute(sql, parameters).rowcount
+            self._RemoveOldest(connection)
+        except:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return rowcount
+
+
+    def _RemoveOldest(self, connection):
+        '''
+        Removes the oldest entries while the total size exceeds max_size.
+        '''
+        (total_size,) = connection.execute(
+            "SELECT value FROM meta WHERE name = 'total_size'").fetchone()
+        if total_size <= self.max_size:
+            return
+
+        rowids = []
+        evicted_keys = []
+        for rowid, size, namespace, key in connection.execute(
+                'SELECT rowid, size, namespace, key FROM entries ORDER BY stored'):
+            rowids.append((rowid,))
+            if namespace == self.namespace:
+                evicted_keys.append(key)
+            total_size -= size
+            if total_size <= self.max_size:
+                break
+        connection.executemany('DELETE FROM entries WHERE rowid = ?', rowids)
+
+        if self.on_evict is not None:
+            for key in evicted_keys:
+                self.on_evict(key)
+
+
+    @classmethod
+    def _GetKeyText(cls, key):
+        '''
+        :rtype: unicode
+        :returns:
+            The text identifying the key in the database.
+        '''
+        import hashlib
+        return hashlib.sha1(repr(key)).hexdigest()
+
+
+    def clear(self):
+        '''
+        Removes all the items in the namespace (from all versions).
+        '''
+        self._Write('DELETE FROM entries WHERE namespace = ?', (self.namespace,))
+
+
+    def __len__(self):
+        '''
+        :rtype: int
+        :returns:
+            The number of entries in the namespace (with the current version). Counts the entries,
+            so avoid calling it often for big databases.
+        '''
+        (result,) = self._GetConnection().execute(
+            'SELECT COUNT(*) FROM entries WHERE namespace = ? AND version = ?',
+            (self.namespace, self.version),
+        ).fetchone()
+        return result
+
+
+    def __contains__(self, key):
+        return self.get(key, self._SENTINEL) is not self._SENTINEL
+
+
+    has_key = __contains__
+
+
+    def __setitem__(self, key, value):
+        '''
+        Stores an item (replacing any previous value of the key, from any version).
+
+        :param object key:
+
+        :param object value:
+        '''
+        import cPickle
+        import sqlite3
+        import time
+
+        data = cPickle.dumps(value, cPickle.HIGHEST_PROTOCOL)
+        self._Write(
+            'INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)',
+            (
+                self.namespace,
+                self._GetKeyText(key),
+                self.version,
+                sqlite3.Binary(data),
+                len(data),
+                time.time(),
+            ),
+        )
+
+
+    def __getitem__(self, key):
+        '''
+        :raises KeyError:
+            If the key is not available
+        '''
+        result = self.get(key, self._SENTINEL)
+        if result is self._SENTINEL:
+            raise KeyError(key)
+        return result
+
+
+    _SENTINEL = []
+
+    def get(self, key, default=None):
+        '''
+        Entries that can't be unpickled anymore (e.g. their classes were renamed) are considered
+        missing.
+        '''
+        import cPickle
+
+        row = self._GetConnection().execute(
+            'SELECT value FROM entries WHERE namespace = ? AND key = ? AND version = ?',
+            (self.namespace, self._GetKeyText(key), self.version),
+        ).fetchone()
+        if row is None:
+            return default
+
+        try:
+            return cPickle.loads(bytes(row[0]))
+        except Exception:
+            return default
+
+
+    def __delitem__(self, key):
+        self.pop(key)
+
+
+    def pop(self, key, default=_SENTINEL):
+        result = self.get(key, self._SENTINEL)
+        if result is self._SENTINEL:
+            if default is self._SENTINEL:
+                raise KeyError(key)
+            return default
+
+        self._Write(
+            'DELETE FROM entries WHERE namespace = ? AND key = ?',
+            (self.namespace, self._GetKeyText(key)),
+        )
+        return result
@@ -1,5 +1,7 @@
 from __future__ import unicode_literals
+from ben10.foundation.decorators import Override
 from ben10.foundation.odict import odict
+import threading
 
 
 
@@ -12,13 +14,17 @@ class FIFO(odict):
     is removed.
     '''
 
-    def __init__(self, maxsize):
+    def __init__(self, maxsize, on_evict=None):
         '''
         :param int maxsize:
             The maximum size of this cache.
+
+        :param callable on_evict:
+            Called with the key of each item removed because the maximum size was reached.
         '''
         odict.__init__(self)
         self._maxsize = maxsize
+        self._on_evict = on_evict
 
 
     def __setitem__(self, key, value):
@@ -38,7 +44,85 @@ class FIFO(odict):
         while l >= self._maxsize:
             l -= 1
             # Pop the first item created
-            self.popitem(0)
+            evicted_key, _value = self.popitem(0)
+            if self._on_evict is not None:
+                self._on_evict(evicted_key)
 
         odict.__setitem__(self, key, value)
 
+
+
+#===================================================================================================
+# ThreadSafeFIFO
+#===================================================================================================
+class ThreadSafeFIFO(FIFO):
+    '''
+    A FIFO that can be shared by many threads: the operations that change the cache (or depend on
+    its order) are serialized by a lock.
+
+    Iterating returns a snapshot of the cache, taken when the iteration starts.
+    '''
+
+    def __init__(self, maxsize, on_evict=None):
+        FIFO.__init__(self, maxsize, on_evict)
+        self._lock = threading.RLock()
+
+
+    @Override(FIFO.__setitem__)
+    def __setitem__(self, key, value):
+        with self._lock:
+            FIFO.__setitem__(self, key, value)
+
+
+    def __delitem__(self, key):
+        with self._lock:
+            FIFO.__delitem__(self, key)
+
+
+    def get(self, key, default=None):
+        with self._lock:
+            return FIFO.get(self, key, default)
+
+
+    def pop(self, *args):
+        with self._lock:
+            return FIFO.pop(self, *args)
+
+
+    def popitem(self, *args):
+        with self._lock:
+            return FIFO.popitem(self, *args)
+
+
+    def clear(self):
+        with self._lock:
+            FIFO.clear(self)
+
+
+    def keys(self):
+        with self._lock:
+            return FIFO.keys(self)
+
+
+    def values(self):
+        with self._lock:
+            return FIFO.values(self)
+
+
+    def items(self):
+        with self._lock:
+            return FIFO.items(self)
+
+
+    def __iter__(self):
+        return iter(self.keys())
+
+
+    iterkeys = __iter__
+
+    def itervalues(self):
+        return iter(self.values())
+
+
+    def iteritems(self):
+        return iter(self.items())
@@ -1,12 +1,20 @@
 from __future__ import unicode_literals
 import io
+import os
 
 
 
 #===================================================================================================
 # DumpDirHashToStringIO
 #===================================================================================================
-def DumpDirHashToStringIO(directory, stringio, base='', exclude=None, include=None):
+def DumpDirHashToStringIO(
+    directory,
+    stringio,
+    base='',
+    exclude=None,
+    include=None,
+    algorithm='md5',
+    workers=None):
     '''
     Helper to iterate over the files in a directory putting those in the passed StringIO in ini
     format.
@@ -25,33 +33,35 @@ def DumpDirHashToStringIO(directory, stringio, base='', exclude=None, include=No
 
     :param unicode include:
         Pattern to match files to include in the hashing. E.g.: *.zip
+
+    :param unicode algorithm:
+        .. seealso:: HexDigest
+
+    :param int workers:
+        .. seealso:: HashFiles
     '''
     import fnmatch
-    import os
 
     files = [(os.path.join(directory, i), i) for i in os.listdir(directory)]
     files = [i for i in files if os.path.isfile(i[0])]
-    for fullname, filename in files:
-        if include is not None:
-            if not fnmatch.fnmatch(fullname, include):
-                continue
-
-        if exclude is not None:
-            if fnmatch.fnmatch(fullname, exclude):
-                continue
+    if include is not None:
+        files = [i for i in files if fnmatch.fnmatch(i[0], include)]
+    if exclude is not None:
+        files = [i for i in files if not fnmatch.fnmatch(i[0], exclude)]
 
-        md5 = Md5Hex(fullname)
+    digests = HashFiles([fullname for fullname, _filename in files], algorithm=algorithm, workers=workers)
+    for (_fullname, filename), digest in zip(files, digests):
         if base:
-            stringio.write('%s/%s=%s\n' % (base, filename, md5))
+            stringio.write('%s/%s=%s\n' % (base, filename, digest))
         else:
-            stringio.write('%s=%s\n' % (filename, md5))
+            stringio.write('%s=%s\n' % (filename, digest))
 
 
 
 #===================================================================================================
 # Md5Hex
 #===================================================================================================
-def Md5Hex(filename=None, contents=None):
+def Md5Hex(filename=None, contents=None, stream=None):
     '''
     :param unicode filename:
         The file from which the md5 should be calculated. If the filename is given, the contents
@@ -61,28 +71,136 @@ def Md5Hex(filename=None, contents=None):
         The contents for which the md5 should be calculated. If the contents are given, the filename
         should NOT be given.
 
+    :param file stream:
+        A binary file-like object (anything with a `read(size)` method) from which the md5 should
+        be calculated. It is read incrementally until its end, so memory usage doesn't depend on
+        its size. The stream is not closed.
+
+    :rtype: unicode
+    :returns:
+        Returns a string with the hex digest of the stream.
+    '''
+    return HexDigest(filename=filename, contents=contents, algorithm='md5', stream=stream)
+
+
+
+#===================================================================================================
+# HexDigest
+#===================================================================================================
+# Files with at least this size are hashed through mmap instead of read() calls.
+_MMAP_MIN_SIZE = 16 * 1024 * 1024
+
+def HexDigest(filename=None, contents=None, algorithm='md5', stream=None):
+    '''
+    :param unicode filename:
+        The file from which the hash should be calculated. If the filename is given, the contents
+        should NOT be given.
+
+    :param unicode contents:
+        The contents for which the hash should be calculated. If the contents are given, the
+        filename should NOT be given.
+
+    :param unicode algorithm:
+        Name of the hash algorithm, any name accepted by hashlib.new (md5, sha1, sha256, ... and
+        blake2b/blake2s when supported by the Python version).
+
+    :param file stream:
+        .. seealso:: Md5Hex
+
     :rtype: unicode
     :returns:
         Returns a string with the hex digest of the stream.
+
+    :raises ValueError:
+        If the algorithm is not supported.
     '''
     import hashlib
-    md5 = hashlib.md5()
+    hasher = hashlib.new(algorithm)
 
     if filename:
         stream = io.open(filename, 'rb')
         try:
-            while True:
-                data = stream.read(md5.block_size * 128)
-                if not data:
-                    break
-                md5.update(data)
+            size = os.fstat(stream.fileno()).st_size
+            if size and size >= _MMAP_MIN_SIZE:
+                # Hash large files straight from the page cache, without copying into Python strings
+                import mmap
+                mapped = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+                try:
+                    hasher.update(mapped)
+                finally:
+                    mapped.close()
+            else:
+                _UpdateFromStream(hasher, stream)
         finally:
             stream.close()
 
+    elif stream is not None:
+        _UpdateFromStream(hasher, stream)
+
     else:
-        md5.update(contents)
+        hasher.update(contents)
+
+    return unicode(hasher.hexdigest())
+
+
+
+def _UpdateFromStream(hasher, stream):
+    '''
+    Updates the hasher with the contents read from the stream (until its end).
+    '''
+    while True:
+        data = stream.read(hasher.block_size * 128)
+        if not data:
+            break
+        hasher.update(data)
+
+
+
+#===================================================================================================
+# HashFiles
+#===================================================================================================
+def HashFiles(filenames, algorithm='md5', workers=None):
+    '''
+    Calculates the hash of many files concurrently, using a pool of threads (hashlib releases the
+    GIL while hashing, so the files are really hashed in parallel).
+
+    :param list(unicode) filenames:
+        The files to hash.
+
+    :param unicode algorithm:
+        .. seealso:: HexDigest
+
+    :param int workers:
+        Number of threads used. Defaults to the number of CPUs (limited by the number of files).
+        With 1 the files are hashed in the calling thread.
+
+    :rtype: list(unicode)
+    :returns:
+        The hex digest of each file, in the same order as `filenames`.
+    '''
+    import functools
+
+    hash_file = functools.partial(_HashFile, algorithm=algorithm)
+
+    if workers is None:
+        import multiprocessing
+        workers = multiprocessing.cpu_count()
+    workers = min(workers, len(filenames))
+
+    if workers <= 1:
+        return map(hash_file, filenames)
+
+    from multiprocessing.pool import ThreadPool
+    pool = ThreadPool(workers)
+    try:
+        return pool.map(hash_file, filenames)
+    finally:
+        pool.close()
+        pool.join()
+
 
-    return unicode(md5.hexdigest())
+def _HashFile(filename, algorithm):
+    return HexDigest(filename=filename, algorithm=algorithm)
 
 
 
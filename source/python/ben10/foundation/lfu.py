@@ -0,0 +1,203 @@
+from __future__ import unicode_literals
+'''
+LFU module.
+'''
+
+from ben10.foundation.odict import odict
+
+
+
+#===================================================================================================
+# LFU
+#===================================================================================================
+class LFU(object):
+    '''
+    Least Frequently Used (LFU) cache: when the maximum size is reached, the item accessed the
+    fewest times is removed (the least recently used among them, on ties).
+
+    Better than an LRU for caches where a few keys are used all the time while many others are
+    used only once (these would evict the frequently used keys from an LRU).
+
+    The keys are kept in buckets by access count (each bucket in access order), linked in count
+    order, so all operations are O(1).
+    '''
+
+    def __init__(self, maxsize, on_evict=None):
+        '''
+        :param int maxsize:
+            The maximum number of items in this cache.
+
+        :param callable on_evict:
+            Called with the key of each item removed because the maximum size was reached.
+        '''
+        if maxsize <= 0:
+            raise ValueError('Size must be > 0. Found: %s' % (maxsize,))
+
+        self._maxsize = maxsize
+        self._on_evict = on_evict
+
+        # key -> [value, count]
+        self._dict = {}
+
+        # count -> [odict(key -> None), previous count, next count] (the previous and next counts
+        # with keys, or None)
+        self._buckets = {}
+        self._min_count = None
+
+
+    def clear(self):
+        '''
+        Removes all items from the cache.
+        '''
+        self._dict.clear()
+        self._buckets.clear()
+        self._min_count = None
+
+
+    def __len__(self):
+        return len(self._dict)
+
+
+    def __contains__(self, key):
+        return key in self._dict
+
+
+    has_key = __contains__
+
+
+    def __setitem__(self, key, value):
+        '''
+        Sets an item in the cache (counts as an access to an existing key).
+
+        :param object key:
+
+        :param object value:
+        '''
+        entry = self._dict.get(key)
+        if entry is not None:
+            entry[0] = value
+            self._Touch(key, entry)
+            return
+
+        if len(self._dict) >= self._maxsize:
+            lfu_key = next(iter(self._buckets[self._min_count][0]))
+            self._RemoveFromBucket(lfu_key, self._min_count)
+            del self._dict[lfu_key]
+            if self._on_evict is not None:
+                self._on_evict(lfu_key)
+
+        self._dict[key] = [value, 1]
+        self._AddToBucket(key, 1, None)
+
+
+    def __getitem__(self, key):
+        '''
+        Gets an item from the cache (and increments its access count).
+
+        :raises KeyError:
+            If the key is not available
+        '''
+        entry = self._dict[key]  # Can throw error here
+        self._Touch(key, entry)
+        return entry[0]
+
+
+    def get(self, key, default=None):
+        entry = self._dict.get(key)
+        if entry is None:
+            return default
+        self._Touch(key, entry)
+        return entry[0]
+
+
+    def __delitem__(self, key):
+        self.pop(key)
+
+
+    _SENTINEL = []
+
+    def pop(self, key, default=_SENTINEL):
+        entry = self._dict.pop(key, None)
+        if entry is None:
+            if default is self._SENTINEL:
+                raise KeyError(key)
+            return default
+
+        self._RemoveFromBucket(key, entry[1])
+        return entry[0]
+
+
+    def keys(self):
+        '''
+        :rtype: list
+        :returns:
+            The keys, from the least to the most frequently used.
+        '''
+        result = []
+        count = self._min_count
+        while count is not None:
+            keys, _previous_count, count = self._buckets[count]
+            result.extend(keys)
+        return result
+
+
+    def __iter__(self):
+        return iter(self.keys())
+
+
+    def GetCount(self, key):
+        '''
+        :rtype: int
+        :returns:
+            The number of accesses of the given key (since it was added to the cache).
+        '''
+        return self._dict[key][1]
+
+
+    def _Touch(self, key, entry):
+        '''
+        Moves the key to the bucket of the next access count.
+        '''
+        count = entry[1]
+        entry[1] = count + 1
+        # Added before removing it from the current bucket, which is kept as the previous one
+        self._AddToBucket(key, count + 1, count)
+        self._RemoveFromBucket(key, count)
+
+
+    def _AddToBucket(self, key, count, previous_count):
+        '''
+        Adds the key to the bucket of the given count, creating it after the bucket of
+        previous_count (or as the first bucket, if None) when it doesn't exist.
+        '''
+        bucket = self._buckets.get(count)
+        if bucket is None:
+            if previous_count is None:
+                next_count = self._min_count
+                self._min_count = count
+            else:
+                next_count = self._buckets[previous_count][2]
+                self._buckets[previous_count][2] = count
+            if next_count is not None:
+                self._buckets[next_count][1] = count
+            bucket = self._buckets[count] = [odict(), previous_count, next_count]
+        bucket[0][key] = None
+
+
+    def _RemoveFromBucket(self, key, count):
+        '''
+        Removes the key from the bucket of the given count, unlinking the bucket if it is empty.
+        '''
+        bucket = self._buckets[count]
+        keys, previous_count, next_count = bucket
+        del keys[key]
+        if keys:
+            return
+
+        del self._buckets[count]
+        if previous_count is None:
+            self._min_count = next_count
+        else:
+            self._buckets[previous_count][2] = next_count
+        if next_count is not None:
+            self._buckets[next_count][1] = previous_count
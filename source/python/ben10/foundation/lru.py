@@ -1,11 +1,15 @@
 from __future__ import unicode_literals
 '''
-LRU module. Based around heapq.
+LRU module.
+
+LRU is based around a doubly linked list (all operations are O(1)). HeapLRU is the previous
+implementation, based around heapq (kept for comparison).
 '''
 
 from ben10.foundation.decorators import Override
 from heapq import heapify, heappop, heappush
 import itertools
+import threading
 
 DEFAULT_LRU_SIZE = 50
 
@@ -75,14 +79,18 @@ class _Node(object):
 
 
 #===================================================================================================
-# LRU
+# HeapLRU
 #===================================================================================================
-class LRU(object):
+class HeapLRU(object):
     '''
     Least Recently Used (LRU) cache.
 
     Based on heapq module (which is used to guarantee that the 1st item in _heap is
     always the item that has the lowest access time).
+
+    .. seealso:: LRU
+        Same interface, but O(1) for all operations (here, accessing items makes the next
+        eviction or iteration heapify/sort the heap).
     '''
 
     def __init__(self, size=DEFAULT_LRU_SIZE, internal_dict=None, get_size=lambda x:1):
@@ -391,6 +399,426 @@ class LRU(object):
         return list(self.itervalues())
 
 
+#===================================================================================================
+# _LinkedNode
+#===================================================================================================
+class _LinkedNode(object):
+    '''
+    Node of the doubly linked list used by LRU.
+    '''
+
+    __slots__ = 'prev next key obj size'.split()
+
+    def __init__(self, key, obj, size):
+        '''
+        :param object key:
+            The key this node is storing
+
+        :param object obj:
+            The object this node is storing
+
+        :param int size:
+            The size of this object
+        '''
+        self.prev = None
+        self.next = None
+        self.key = key
+        self.obj = obj
+        self.size = size
+
+
+    def __repr__(self):
+        '''
+        :rtype: unicode
+        :returns:
+            The representation of the item
+        '''
+        return '_LinkedNode(key=%r)' % (self.key,)
+
+
+#===================================================================================================
+# LRU
+#===================================================================================================
+class LRU(object):
+    '''
+    Least Recently Used (LRU) cache.
+
+    The nodes are kept in a circular doubly linked list in access order (the least recently used
+    right after the root node), so getting, setting and evicting items are O(1) operations.
+    '''
+
+    def __init__(
+            self,
+            size=DEFAULT_LRU_SIZE,
+            internal_dict=None,
+            get_size=lambda x:1,
+            on_evict=None,
+        ):
+        '''
+        :param int size:
+            The maximum size for this cache.
+
+        :param dict internal_dict:
+            If passed, this will be used as the internal dictionary in this LRU.
+
+        :param callable get_size:
+            Receives an object and returns its size (by default, all objects have size 1).
+
+        :param callable on_evict:
+            Called with the key of each item removed because the maximum size was reached
+            (including items too big to be kept in the cache at all).
+        '''
+        if size <= 0:
+            raise ValueError('Size must be > 0. Found: %s' % (size,))
+
+        if internal_dict is None:
+            self._dict = {}
+        else:
+            self._dict = internal_dict
+
+        self._root = root = _LinkedNode(None, None, 0)
+        root.prev = root.next = root
+
+        self._maxsize = size
+        self._currsize = 0
+        self._get_size = get_size
+        self._on_evict = on_evict
+
+        # For speed
+        self._dict_get = self._dict.get
+
+
+    def clear(self):
+        '''
+        Clears the LRU also reseting internal variables. The final state after a clear is the same
+        as if the LRU was recently created.
+        '''
+        root = self._root
+        root.prev = root.next = root
+        self._dict.clear()
+        self._currsize = 0
+
+
+    def __len__(self):
+        '''
+        :rtype: int
+        :returns:
+            The current size of the cache
+        '''
+        return len(self._dict)
+
+
+    def __contains__(self, key):
+        '''
+        :rtype: bool
+        :returns:
+            True if the key is in the cache and False otherwise.
+        '''
+        return key in self._dict
+
+
+    has_key = __contains__
+
+
+    def __setitem__(self, key, obj):
+        '''
+        Sets an item in the cache (as the most recently used)
+
+        :param object key:
+            The key to be set
+
+        :param object obj:
+            The value to be stored for the given key
+
+        :raises ValueError:
+            If the size of the object is not positive
+        '''
+        node = self._dict_get(key, None)
+        add_size = self._get_size(obj)
+        if add_size <= 0:
+            raise ValueError('Size for object may not be 0. Key: %s' % (key,))
+
+        root = self._root
+        maxsize = self._maxsize
+
+        if node is not None:
+            self._currsize += add_size - node.size
+            node.obj = obj
+            node.size = add_size
+
+            # Move to the most recently used position
+            node.prev.next = node.next
+            node.next.prev = node.prev
+            last = root.prev
+            node.prev = last
+            node.next = root
+            last.next = root.prev = node
+
+            # Make it smaller (the replaced item itself is removed if it can't fit).
+            if self._currsize > maxsize:
+                self._RemoveLeastRecentlyUsed(0)
+
+        else:
+            # Handle special case where we're inserting a value which can not fit in the LRU.
+            if add_size > maxsize:
+                on_evict = self._on_evict
+                if on_evict is not None:
+                    for evicted_key in self._dict.keys():
+                        on_evict(evicted_key)
+                    on_evict(key)
+                self.clear()
+                return
+
+            # Make it smaller before putting the new item.
+            if self._currsize + add_size > maxsize:
+                self._RemoveLeastRecentlyUsed(add_size)
+
+            node = _LinkedNode(key, obj, add_size)
+            last = root.prev
+            node.prev = last
+            node.next = root
+            last.next = root.prev = node
+            self._dict[key] = node
+            self._currsize += add_size
+
+
+    def _RemoveLeastRecentlyUsed(self, add_size):
+        '''
+        Removes the least recently used items until `add_size` more can fit in the cache.
+
+        :param int add_size:
+        '''
+        root = self._root
+        maxsize = self._maxsize
+        while self._currsize + add_size > maxsize:
+            lru = root.next
+            root.next = lru.next
+            lru.next.prev = root
+            node = self._dict.pop(lru.key)
+            self._currsize -= node.size
+            if self._on_evict is not None:
+                self._on_evict(node.key)
+
+
+    def __getitem__(self, key):
+        '''
+        Gets an item from the cache (and makes it the most recently used)
+
+        :param object key:
+            The key to be gotten
+
+        :rtype: object
+        :returns:
+            The value that was stored for the given item
+
+        :raises KeyError:
+            If the key is not available
+        '''
+        node = self._dict[key]  # Can throw error here
+
+        root = self._root
+        if node.next is not root:
+            node.prev.next = node.next
+            node.next.prev = node.prev
+            last = root.prev
+            node.prev = last
+            node.next = root
+            last.next = root.prev = node
+
+        return node.obj
+
+
+    def get(self, key, default=None):
+        '''
+        Gets an item from the cache (and makes it the most recently used if it exists)
+
+        :param object key:
+            The key to be gotten
+
+        :param object default:
+            This is the value to be returned if the key doesn't exist.
+
+        :rtype: object
+        :returns:
+            The value that was stored for the given item or the default value passed.
+        '''
+        if key in self._dict:
+            return self[key]
+
+        return default
+
+
+    def __delitem__(self, key):
+        '''
+        Deletes an item from the cache
+
+        :param object key:
+            The key to be removed
+
+        :rtype: object
+        :returns:
+            The value that was stored for the given item
+
+        :raises KeyError:
+            If the key is not available
+        '''
+        node = self._dict.pop(key)  # can throw KeyError here
+        self._currsize -= node.size
+
+        node.prev.next = node.next
+        node.next.prev = node.prev
+
+        return node.obj
+
+
+    _SENTINEL = []
+
+    def pop(self, key, default=_SENTINEL):
+        try:
+            return self.__delitem__(key)
+        except KeyError:
+            if default is not self._SENTINEL:
+                return default
+            raise
+
+
+    #--- Iterating
+    def iternodes(self):
+        '''
+        :rtype: iterator(_LinkedNode)
+        :returns:
+            Iterator that traverses nodes according to LRU
+            (the least recently used come before)
+        '''
+        root = self._root
+        node = root.next
+        while node is not root:
+            next_node = node.next
+            yield node
+            node = next_node
+
+
+    def __iter__(self):
+        '''
+        :rtype: iterator(key)
+        :returns:
+            Iterator that traverses keys according to LRU
+            (the least recently used come before)
+        '''
+        for node in self.iternodes():
+            yield node.key
+
+
+    iterkeys = __iter__
+
+    def iteritems(self):
+        '''
+        :rtype: iterator(key, value)
+        :returns:
+            Iterator that traverses (key, value) according to LRU
+            (the least recently used come before)
+        '''
+        for node in self.iternodes():
+            yield node.key, node.obj
+
+
+    def itervalues(self):
+        '''
+        :rtype: iterator(value)
+        :returns:
+            Iterator that passes values according to LRU
+            (the least recently used come before)
+        '''
+        for node in self.iternodes():
+            yield node.obj
+
+
+    #--- Getting keys or values
+    def keys(self):
+        '''
+        :rtype: list
+        :returns:
+            List of keys according to LRU
+            (the least recently used come before)
+        '''
+        return list(self.iterkeys())
+
+
+    def values(self):
+        '''
+        :rtype: list
+        :returns:
+            List of values according to LRU
+            (the least recently used come before)
+        '''
+        return list(self.itervalues())
+
+
+#===================================================================================================
+# ThreadSafeLRU
+#===================================================================================================
+class ThreadSafeLRU(LRU):
+    '''
+    An LRU that can be shared by many threads: all operations are serialized by a lock.
+
+    Iterating returns a snapshot of the cache, taken when the iteration starts.
+    '''
+
+    @Override(LRU.__init__)
+    def __init__(
+            self,
+            size=DEFAULT_LRU_SIZE,
+            internal_dict=None,
+            get_size=lambda x:1,
+            on_evict=None,
+        ):
+        LRU.__init__(self, size, internal_dict, get_size, on_evict)
+        # Reentrant: get() and pop() call the other (locked) methods
+        self._lock = threading.RLock()
+
+
+    @Override(LRU.clear)
+    def clear(self):
+        with self._lock:
+            LRU.clear(self)
+
+
+    @Override(LRU.__setitem__)
+    def __setitem__(self, key, obj):
+        with self._lock:
+            LRU.__setitem__(self, key, obj)
+
+
+    @Override(LRU.__getitem__)
+    def __getitem__(self, key):
+        with self._lock:
+            return LRU.__getitem__(self, key)
+
+
+    @Override(LRU.get)
+    def get(self, key, default=None):
+        with self._lock:
+            return LRU.get(self, key, default)
+
+
+    @Override(LRU.__delitem__)
+    def __delitem__(self, key):
+        with self._lock:
+            return LRU.__delitem__(self, key)
+
+
+    @Override(LRU.pop)
+    def pop(self, key, default=LRU._SENTINEL):
+        with self._lock:
+            return LRU.pop(self, key, default)
+
+
+    @Override(LRU.iternodes)
+    def iternodes(self):
+        with self._lock:
+            return iter(list(LRU.iternodes(self)))
+
+
 #===================================================================================================
 # _DictWithRemovalMemo
 #===================================================================================================
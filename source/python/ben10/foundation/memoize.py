@@ -1,4 +1,10 @@
 from __future__ import unicode_literals
+from collections import namedtuple
+
+
+
+# Statistics of a memoized function, as returned by GetCacheInfo.
+CacheInfo = namedtuple('CacheInfo', 'hits misses evictions maxsize currsize')
 
 
 
@@ -34,12 +40,47 @@ class Memoize(object):
 
     Note that non-declared keyword arguments (`**kwargs`) are forbidden. Offer proper support for it may cause a
     prohibitive overhead.
+
+    The decorated function also has a GetCacheInfo() method, returning the number of hits, misses and
+    evictions of its cache (see CacheInfo). For instance methods, the statistics are shared by all
+    instances and GetCacheInfo (as ClearCache) receives the instance whose cache size is reported.
+
+    By default the cache is not thread safe. To share a memoized function among threads, use
+    thread_safe=True: the cache operations are serialized and concurrent calls missing the same key
+    wait for a single computation of the value ("single-flight"):
+
+        @Memoize(thread_safe=True)
+        def Parse(filename):
+            ...
+
+    Besides FIFO and LRU, the cache may also prune the least frequently used entries (LFU) or
+    expire the entries after some time (TTL):
+
+        @Memoize(1000, Memoize.TTL, ttl=60.0)
+        def GetRemoteStatus(url):
+            ...
+
+    With LRU, the cache may also be bounded by the total size of the cached values (e.g. in bytes)
+    instead of their number, passing the get_size function used to compute each value size:
+
+        @Memoize(64 * 1024 * 1024, Memoize.LRU, get_size=len)
+        def ReadContents(filename):
+            ...
+
+    Functions (not instance methods) may also keep their cache on disk, so the values are reused
+    by other processes and in later runs (see ben10.foundation.disk_cache.DiskCache):
+
+        @Memoize(backend=DiskCache('~/.cache/my_app.cache', version=2))
+        def ParseFile(filename, mtime):
+            ...
     '''
 
     # This should be the simplest (and fastest) way of caching things: what gets in first
     # is removed first.
     FIFO = 'FIFO'
     LRU = 'LRU'
+    LFU = 'LFU'
+    TTL = 'TTL'
 
     MEMO_INSTANCE_METHOD = 'instance_method'
     MEMO_FUNCTION = 'function'
@@ -69,15 +110,24 @@ class Memoize(object):
         return ret
 
 
-    def __init__(self, maxsize=50, prune_method=FIFO, memo_target=MEMO_FROM_ARGSPEC):
+    def __init__(
+            self,
+            maxsize=50,
+            prune_method=FIFO,
+            memo_target=MEMO_FROM_ARGSPEC,
+            thread_safe=False,
+            ttl=None,
+            get_size=None,
+            backend=None,
+        ):
         '''
         :param int maxsize:
             The maximum size of the internal cache (default is 50).
 
-        :param unicode prune_method:
-            This is according to the way used to prune entries. Right now only
-            pruning the oldest entry is supported (FIFO), but different ways could be
-            available (e.g.: pruning LRU seems a natural addition)
+        :param unicode|callable prune_method:
+            This is according to the way used to prune entries: one of the constants FIFO, LRU,
+            LFU or TTL. May also be a callable receiving the maxsize and returning the cache object
+            (with a dict interface): its evictions are not counted in GetCacheInfo.
 
         :param unicode memo_target:
             One of the constants MEMO_INSTANCE_METHOD or MEMO_FUNCTION or MEMO_FROM_ARGSPEC.
@@ -85,11 +135,43 @@ class Memoize(object):
             it'll fall to using the MEMO_INSTANCE_METHOD (otherwise the MEMO_FUNCTION is used)
             If the signature of the function is 'special' and doesn't follow the conventions,
             the memo_target MUST be specified.
+
+        :param bool thread_safe:
+            If True, the memoized function can be called from many threads at the same time (see
+            class docs). Only supported with the FIFO and LRU prune methods.
+
+        :param float ttl:
+            The number of seconds the entries are kept (required with the TTL prune method).
+
+        :param callable get_size:
+            Only for the LRU prune method: receives a cached value and returns its size, so that
+            maxsize bounds the total size of the cached values.
+
+        :param DiskCache backend:
+            If given, the values are cached in this disk cache (using a namespace with the name of
+            the decorated function) instead of in memory, and maxsize and prune_method are ignored.
         '''
+        if (prune_method == self.TTL) != (ttl is not None):
+            raise ValueError('The ttl parameter must be given (only) with the TTL prune method.')
+
+        if get_size is not None and prune_method != self.LRU:
+            raise ValueError('The get_size parameter is only supported by the LRU prune method.')
+
+        if backend is not None and (ttl is not None or get_size is not None):
+            raise ValueError('The ttl and get_size parameters are not supported with a backend.')
+
+        if thread_safe and prune_method not in (self.FIFO, self.LRU):
+            raise ValueError(
+                'Thread safe caches are only supported by the FIFO and LRU prune methods.')
 
         self._prune_method = prune_method
         self._maxsize = maxsize
         self._memo_target = memo_target
+        self._thread_safe = thread_safe
+        self._ttl = ttl
+        self._get_size = get_size
+        self._backend = backend
+        self._backend_namespace = None
 
 
     def _GetCacheKey(self, args, kwargs):
@@ -178,6 +260,59 @@ class Memoize(object):
         return has_defaults, named_arguments
 
 
+    def _CreateCacheKeyBuilder(self, argspec):
+        '''
+        Creates the function used to obtain cache keys, with the same results as _GetCacheKey but
+        precomputing everything that depends only on the signature of the decorated function.
+
+        :param inspect.ArgSpec argspec:
+            The argspec of the decorated function.
+
+        :rtype: callable(tuple,dict)
+        :returns:
+            Receives the arguments and keyword arguments of a call and returns its cache key.
+
+            When a subclass customizes the cache keys (overriding _GetCacheKey or
+            _GetArgspecObject), self._GetCacheKey is returned.
+        '''
+        if (
+                type(self)._GetCacheKey.im_func is not Memoize._GetCacheKey.im_func or
+                type(self)._GetArgspecObject.im_func is not Memoize._GetArgspecObject.im_func
+            ):
+            return self._GetCacheKey
+
+        has_defaults, named_arguments = self._argspec
+
+        # Values for the arguments not passed in a call (a placeholder for required ones)
+        defaults = tuple(named_arguments.values())
+        indexes = dict((name, i) for i, name in enumerate(named_arguments.keys()))
+
+        def GetKeyWithKwargs(args, kwargs):
+            count = len(args)
+            values = list(args + defaults[count:])
+            try:
+                for name, value in kwargs.iteritems():
+                    index = indexes[name]
+                    if index >= count:
+                        values[index] = value
+            except KeyError:
+                raise ValueError('Can\'t use non-declared keyword arguments.')
+            return tuple(values)
+
+        if has_defaults:
+            def GetKey(args, kwargs):
+                if kwargs:
+                    return GetKeyWithKwargs(args, kwargs)
+                return args + defaults[len(args):]
+        else:
+            def GetKey(args, kwargs):
+                if kwargs:
+                    return GetKeyWithKwargs(args, kwargs)
+                return args
+
+        return GetKey
+
+
     def __call__(self, func):
         '''
         :param function func:
@@ -209,8 +344,15 @@ class Memoize(object):
                     # be used as a part of the cache key, so, all should work properly).
                     self._memo_target = self.MEMO_FUNCTION
 
+        if self._backend is not None:
+            if self._memo_target == self.MEMO_INSTANCE_METHOD:
+                raise TypeError('Memoize backends are only supported for functions.')
+            self._backend_namespace = '%s.%s' % (func.__module__, func.__name__)
+
         # Register argspec details, these are used to normalize cache keys
-        self._argspec = self._GetArgspecObject(*inspect.getargspec(func))
+        argspec = inspect.getargspec(func)
+        self._argspec = self._GetArgspecObject(*argspec)
+        self._get_cache_key = self._CreateCacheKeyBuilder(argspec)
 
         # Create call wrapper, and make it look like the real function
         call = self._CreateCallWrapper(func)
@@ -220,23 +362,49 @@ class Memoize(object):
         return call
 
 
-    def _CreateCacheObject(self):
+    def _CreateCacheObject(self, on_evict):
         '''
         Creates the cache object we want.
 
+        :param callable on_evict:
+            Called by the cache with the key of each item it evicts.
+
         :returns object:
             The object to be used as the cache (will prune items after the maximum size
             is reached).
 
             This object has a dict interface.
         '''
+        if self._backend is not None:
+            return self._backend.GetNamespace(self._backend_namespace, on_evict=on_evict)
+
         if self._prune_method == self.FIFO:
+            if self._thread_safe:
+                from ben10.foundation.fifo import ThreadSafeFIFO
+                return ThreadSafeFIFO(self._maxsize, on_evict)
             from ben10.foundation.fifo import FIFO
-            return FIFO(self._maxsize)
+            return FIFO(self._maxsize, on_evict)
 
         elif self._prune_method == self.LRU:
+            kwargs = {'on_evict' : on_evict}
+            if self._get_size is not None:
+                kwargs['get_size'] = self._get_size
+            if self._thread_safe:
+                from ben10.foundation.lru import ThreadSafeLRU
+                return ThreadSafeLRU(self._maxsize, **kwargs)
             from ben10.foundation.lru import LRU
-            return LRU(self._maxsize)
+            return LRU(self._maxsize, **kwargs)
+
+        elif self._prune_method == self.LFU:
+            from ben10.foundation.lfu import LFU
+            return LFU(self._maxsize, on_evict)
+
+        elif self._prune_method == self.TTL:
+            from ben10.foundation.ttl_cache import TTLCache
+            return TTLCache(self._maxsize, self._ttl, on_evict=on_evict)
+
+        elif callable(self._prune_method):
+            return self._prune_method(self._maxsize)
 
         else:
             raise AssertionError('Memoize prune method not supported: %s' % self._prune_method)
@@ -250,6 +418,17 @@ class Memoize(object):
             This is the function that is being cached.
         '''
         SENTINEL = []
+        if self._thread_safe:
+            return self._CreateThreadSafeCallWrapper(func)
+
+        get_cache_key = self._get_cache_key
+
+        # hits, misses and evictions
+        stats = [0, 0, 0]
+
+        def OnEvict(key):
+            stats[2] += 1
+
         if self._memo_target == self.MEMO_INSTANCE_METHOD:
 
             outer_self = self
@@ -258,15 +437,18 @@ class Memoize(object):
             def Call(self, *args, **kwargs):
                 cache = getattr(self, cache_name, None)
                 if cache is None:
-                    cache = outer_self._CreateCacheObject()
+                    cache = outer_self._CreateCacheObject(OnEvict)
                     setattr(self, cache_name, cache)
 
                 #--- GetFromCacheOrCreate: inlined for speed
-                key = outer_self._GetCacheKey(args, kwargs)
+                key = get_cache_key(args, kwargs)
                 res = cache.get(key, SENTINEL)
                 if res is SENTINEL:
                     res = func(self, *args, **kwargs)
                     cache[key] = res
+                    stats[1] += 1
+                else:
+                    stats[0] += 1
                 return res
 
             def ClearCache(self):
@@ -277,26 +459,225 @@ class Memoize(object):
                 if cache is not None:
                     cache.clear()
 
+            def GetCacheInfo(self):
+                '''
+                :rtype: CacheInfo
+                :returns:
+                    The statistics of the method (currsize is the number of items cached for the
+                    given instance).
+                '''
+                cache = getattr(self, cache_name, None)
+                return outer_self._GetCacheInfo(stats, cache)
+
             Call.ClearCache = ClearCache
+            Call.GetCacheInfo = GetCacheInfo
             return Call
 
         elif self._memo_target == self.MEMO_FUNCTION:
 
             # When it's a function, we can use the same cache the whole time (i.e.: it's global)
-            cache = self._CreateCacheObject()
+            cache = self._CreateCacheObject(OnEvict)
             def Call(*args, **kwargs):
                 #--- GetFromCacheOrCreate: inlined for speed
-                key = self._GetCacheKey(args, kwargs)
+                key = get_cache_key(args, kwargs)
                 res = cache.get(key, SENTINEL)
                 if res is SENTINEL:
                     res = func(*args, **kwargs)
                     cache[key] = res
+                    stats[1] += 1
+                else:
+                    stats[0] += 1
                 return res
 
             Call.ClearCache = cache.clear
+            Call.GetCacheInfo = lambda: self._GetCacheInfo(stats, cache)
+            return Call
+
+        else:
+            raise AssertionError("Don't know how to deal with memo target: %s" % self._memo_target)
+
+
+    def _GetCacheInfo(self, stats, cache):
+        '''
+        :param list(int) stats:
+            The hits, misses and evictions of a decorated function.
+
+        :param cache:
+            The cache object (or None if not created yet).
+
+        :rtype: CacheInfo
+        '''
+        hits, misses, evictions = stats
+        currsize = 0 if cache is None else len(cache)
+        return CacheInfo(hits, misses, evictions, self._maxsize, currsize)
+
+
+    def _CreateThreadSafeCallWrapper(self, func):
+        '''
+        Same as _CreateCallWrapper, but the calls may happen in many threads at the same time.
+
+        :param object func:
+            This is the function that is being cached.
+        '''
+        single_flight = _SingleFlight()
+        get_cache_key = self._get_cache_key
+
+        if self._memo_target == self.MEMO_INSTANCE_METHOD:
+
+            outer_self = self
+            cache_name = '__%s_cache__' % func.__name__
+
+            def GetCache(self):
+                cache = getattr(self, cache_name, None)
+                if cache is None:
+                    with single_flight.lock:
+                        cache = getattr(self, cache_name, None)
+                        if cache is None:
+                            cache = outer_self._CreateCacheObject(single_flight.OnEvict)
+                            setattr(self, cache_name, cache)
+                return cache
+
+            def Call(self, *args, **kwargs):
+                key = get_cache_key(args, kwargs)
+                return single_flight.Get(
+                    GetCache(self),
+                    key,
+                    lambda: func(self, *args, **kwargs),
+                )
+
+            def ClearCache(self):
+                '''
+                Clears the cache for a given instance (note that self must be passed as a parameter).
+                '''
+                cache = getattr(self, cache_name, None)
+                if cache is not None:
+                    cache.clear()
+
+            def GetCacheInfo(self):
+                '''
+                .. seealso:: _CreateCallWrapper
+                '''
+                cache = getattr(self, cache_name, None)
+                return outer_self._GetCacheInfo(single_flight.stats, cache)
+
+            Call.ClearCache = ClearCache
+            Call.GetCacheInfo = GetCacheInfo
+            return Call
+
+        elif self._memo_target == self.MEMO_FUNCTION:
+
+            cache = self._CreateCacheObject(single_flight.OnEvict)
+            def Call(*args, **kwargs):
+                key = get_cache_key(args, kwargs)
+                return single_flight.Get(cache, key, lambda: func(*args, **kwargs))
+
+            Call.ClearCache = cache.clear
+            Call.GetCacheInfo = lambda: self._GetCacheInfo(single_flight.stats, cache)
             return Call
 
         else:
             raise AssertionError("Don't know how to deal with memo target: %s" % self._memo_target)
 
 
+
+#===================================================================================================
+# _SingleFlight
+#===================================================================================================
+class _SingleFlight(object):
+    '''
+    Obtains values from thread safe caches making sure that concurrent misses of the same key
+    compute the value only once: the first thread computes it while the others wait for its result
+    (or its exception).
+
+    :ivar list(int) stats:
+        The number of hits, misses and evictions (hits are counted without locking, so they may be
+        slightly undercounted when many threads hit the cache at the same time).
+    '''
+
+    _SENTINEL = []
+
+    def __init__(self):
+        import threading
+        self.lock = threading.Lock()
+        self.stats = [0, 0, 0]
+
+        # (id(cache), key) -> _Flight of the computations in progress
+        self._flights = {}
+
+
+    def OnEvict(self, key):
+        '''
+        Counts an eviction (called by the caches, in Get, while holding the lock).
+        '''
+        self.stats[2] += 1
+
+
+    def Get(self, cache, key, compute):
+        '''
+        :param cache:
+            A thread safe cache (with a dict interface).
+
+        :param object key:
+
+        :param callable compute:
+            Called (without parameters) to obtain the value of a missing key.
+
+        :returns object:
+            The cached (or computed) value.
+        '''
+        stats = self.stats
+        res = cache.get(key, self._SENTINEL)
+        if res is not self._SENTINEL:
+            stats[0] += 1
+            return res
+
+        flight_key = (id(cache), key)
+        with self.lock:
+            res = cache.get(key, self._SENTINEL)
+            if res is not self._SENTINEL:
+                stats[0] += 1
+                return res
+
+            flight = self._flights.get(flight_key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[flight_key] = _Flight()
+
+        if not leader:
+            return flight.Wait()
+
+        try:
+            res = compute()
+            with self.lock:
+                cache[key] = res
+                stats[1] += 1
+            flight.result = res
+        except:
+            import sys
+            flight.exc_info = sys.exc_info()
+            raise
+        finally:
+            with self.lock:
+                del self._flights[flight_key]
+            flight.done.set()
+        return res
+
+
+
+class _Flight(object):
+    '''
+    A computation in progress in _SingleFlight.
+    '''
+
+    def __init__(self):
+        import threading
+        self.done = threading.Event()
+        self.result = None
+        self.exc_info = None
+
+
+    def Wait(self):
+        self.done.wait()
+        if self.exc_info is not None:
+            raise self.exc_info[0], self.exc_info[1], self.exc_info[2]
+        return self.result
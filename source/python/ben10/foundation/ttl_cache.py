@@ -0,0 +1,154 @@
+from __future__ import unicode_literals
+'''
+Time-to-live cache module.
+'''
+
+from collections import OrderedDict
+import time
+
+
+
+#===================================================================================================
+# TTLCache
+#===================================================================================================
+class TTLCache(object):
+    '''
+    A cache whose items expire after a given number of seconds. When the maximum size is reached,
+    the item that would expire first (the oldest one) is removed.
+
+    Expired items are removed when accessed and when new items are added, so a long-running
+    process keeps only the recently computed items in memory.
+    '''
+
+    def __init__(self, maxsize, ttl, timer=time.time, on_evict=None):
+        '''
+        :param int maxsize:
+            The maximum number of items in this cache.
+
+        :param float ttl:
+            Number of seconds an item is kept.
+
+        :param callable timer:
+            Returns the current time (in seconds).
+
+        :param callable on_evict:
+            Called with the key of each item removed because it expired or because the maximum
+            size was reached.
+        '''
+        if maxsize <= 0:
+            raise ValueError('Size must be > 0. Found: %s' % (maxsize,))
+
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._timer = timer
+        self._on_evict = on_evict
+
+        # key -> (expiration time, value), in expiration order
+        self._dict = OrderedDict()
+
+
+    def clear(self):
+        '''
+        Removes all items from the cache.
+        '''
+        self._dict.clear()
+
+
+    def __len__(self):
+        '''
+        :rtype: int
+        :returns:
+            The number of items in the cache (including expired items not removed yet).
+        '''
+        return len(self._dict)
+
+
+    def __contains__(self, key):
+        return self.get(key, self._SENTINEL) is not self._SENTINEL
+
+
+    has_key = __contains__
+
+
+    def __setitem__(self, key, value):
+        '''
+        Sets an item in the cache, which expires `ttl` seconds from now.
+
+        :param object key:
+
+        :param object value:
+        '''
+        now = self._timer()
+        self._dict.pop(key, None)
+        self._RemoveExpired(now)
+        while len(self._dict) >= self._maxsize:
+            evicted_key, _entry = self._dict.popitem(last=False)
+            if self._on_evict is not None:
+                self._on_evict(evicted_key)
+        self._dict[key] = (now + self._ttl, value)
+
+
+    def __getitem__(self, key):
+        '''
+        :raises KeyError:
+            If the key is not available (or expired)
+        '''
+        result = self.get(key, self._SENTINEL)
+        if result is self._SENTINEL:
+            raise KeyError(key)
+        return result
+
+
+    _SENTINEL = []
+
+    def get(self, key, default=None):
+        entry = self._dict.get(key)
+        if entry is None:
+            return default
+        if entry[0] <= self._timer():
+            del self._dict[key]
+            if self._on_evict is not None:
+                self._on_evict(key)
+            return default
+        return entry[1]
+
+
+    def __delitem__(self, key):
+        del self._dict[key]
+
+
+    def pop(self, key, default=_SENTINEL):
+        result = self.get(key, self._SENTINEL)
+        if result is self._SENTINEL:
+            if default is self._SENTINEL:
+                raise KeyError(key)
+            return default
+        del self._dict[key]
+        return result
+
+
+    def keys(self):
+        '''
+        :rtype: list
+        :returns:
+            The keys not expired, from the oldest to the newest.
+        '''
+        now = self._timer()
+        return [key for key, (expiration, _value) in self._dict.iteritems() if expiration > now]
+
+
+    def __iter__(self):
+        return iter(self.keys())
+
+
+    def _RemoveExpired(self, now):
+        '''
+        Removes the expired items (they're the first ones, since all items have the same ttl).
+        '''
+        while self._dict:
+            key, (expiration, _value) = next(self._dict.iteritems())
+            if expiration > now:
+                break
+            del self._dict[key]
+            if self._on_evict is not None:
+                self._on_evict(key)
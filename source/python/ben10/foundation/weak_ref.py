@@ -16,20 +16,130 @@ class WeakList(object):
 
     When iterating the actual objects are used, but internally, only weakrefs are kept.
 
+    The death of the objects is notified by weakref callbacks, and the list keeps the number of
+    references to each object, so that removing (and checking if it contains) an object in the
+    list is O(1): the dead references and the removed ones are discarded in bulk, before any
+    operation that depends on the positions of the items (or when most of the references are
+    dead). Note that the indexes (used in __getitem__, __setitem__, etc) are the positions in the
+    internal list, which may contain dead references.
+
     It does not contain the whole list interface (but can be extended as needed).
     '''
 
     def __init__(self, initlist=None):
         self.data = []
 
+        # id(obj) -> number of references to obj in data (not removed)
+        self._counts = {}
+
+        # id(obj) -> number of references to obj to remove from data
+        self._removed = {}
+
+        # Number of dead references in data (only a hint of when to discard them)
+        self._dead_count = 0
+
+        # id(WeakMethodRef) -> weakref to the method object (notifying its death)
+        self._guards = {}
+
+        self._on_dead = _CreateWeakCallback(self, WeakList._OnDead)
+
         if initlist is not None:
             for x in initlist:
                 self.append(x)
 
 
+    def _OnDead(self, ref):
+        self._dead_count += 1
+
+        key = getattr(ref, 'key', None)
+        if key is not None:
+            # The object is dead, so its references are discarded as dead ones (and its id may be
+            # reused by new objects)
+            self._counts.pop(key, None)
+            self._removed.pop(key, None)
+
+
+    def _CreateRef(self, item):
+        '''
+        :rtype: weakref|WeakMethodRef
+        :returns:
+            A weak reference to the item whose death is notified to _OnDead (the key of the
+            references to objects is the id of the object).
+        '''
+        if item is None:
+            self._dead_count += 1
+            return GetWeakRef(item)
+
+        if IsWeakObj(item) or inspect.ismethod(item):
+            ref = GetWeakRef(item)
+            if ref.__class__ is WeakMethodRef and ref._obj is not None:
+                self._guards[id(ref)] = weakref.ref(ref._obj(), self._on_dead)
+            return ref
+
+        key = id(item)
+        ref = weakref.KeyedRef(item, self._on_dead, key)
+        self._counts[key] = self._counts.get(key, 0) + 1
+        return ref
+
+
+    def _ReleaseRefs(self, refs):
+        '''
+        Must be called with the (not removed) references removed from the list.
+        '''
+        counts = self._counts
+        guards = self._guards
+        for ref in refs:
+            key = getattr(ref, 'key', None)
+            if key is not None:
+                if ref() is not None:
+                    count = counts[key] - 1
+                    if count:
+                        counts[key] = count
+                    else:
+                        del counts[key]
+            elif guards:
+                guards.pop(id(ref), None)
+
+
+    def _Discard(self):
+        '''
+        Discards the references removed from the list (and the dead ones).
+        '''
+        removed = self._removed
+        if not removed and not self._dead_count:
+            return
+
+        # Reset before (objects may die while discarding)
+        self._dead_count = 0
+
+        data = []
+        discarded = []
+        for ref in self.data:
+            d = ref()
+            if d is None:
+                discarded.append(ref)
+            else:
+                key = getattr(ref, 'key', None)
+                if key is not None and key in removed:
+                    count = removed[key] - 1
+                    if count:
+                        removed[key] = count
+                    else:
+                        del removed[key]
+                    continue
+                data.append(ref)
+
+        self.data[:] = data
+        if self._guards:
+            for ref in discarded:
+                self._guards.pop(id(ref), None)
+
+
     @Implements(list.append)
     def append(self, item):
-        self.data.append(GetWeakRef(item))
+        if self._dead_count * 2 > len(self.data):
+            self._Discard()
+        self.data.append(self._CreateRef(item))
 
 
     @Implements(list.extend)
@@ -39,15 +149,26 @@ class WeakList(object):
 
 
     def __iter__(self):
+        if self._removed or self._dead_count * 2 > len(self.data):
+            self._Discard()
+
         # iterate in a copy
         for ref in self.data[:]:
             d = ref()
-            if d is None:
-                self.data.remove(ref)
-            else:
+            if d is not None:
                 yield d
 
 
+    def __contains__(self, item):
+        if id(item) in self._counts:
+            return True
+
+        for d in self:
+            if d == item:
+                return True
+        return False
+
+
     def remove(self, item):
         '''
         Remove first occurrence of a value.
@@ -55,30 +176,44 @@ class WeakList(object):
         It differs from the normal version because it will not raise an exception if the
         item is not found (because it may be garbage-collected already).
 
+        .. note:: If the object itself is in the list its first occurrence is removed (even if an
+            equal object appears before it).
+
         :param object item:
             The object to be removed.
         '''
-        # iterate in a copy
-        for ref in self.data[:]:
-            d = ref()
-
-            if d is None:
-                self.data.remove(ref)
+        key = id(item)
+        count = self._counts.get(key)
+        if count is not None:
+            if count == 1:
+                del self._counts[key]
+            else:
+                self._counts[key] = count - 1
+            self._removed[key] = self._removed.get(key, 0) + 1
+            return
 
-            elif d == item:
-                self.data.remove(ref)
+        # Not in the list (or a method): look for an equal item
+        self._Discard()
+        for i, ref in enumerate(self.data):
+            d = ref()
+            if d is not None and d == item:
+                self._ReleaseRefs([self.data.pop(i)])
                 break
 
+
     def __len__(self):
-        i = 0
-        for _k in self:  # we make an iteration to remove dead references...
-            i += 1
-        return i
+        self._Discard()
+        return len(self.data)
 
     def __delitem__(self, i):
+        if self._removed:
+            self._Discard()
+        self._ReleaseRefs([self.data[i]])
         del self.data[i]
 
     def __getitem__(self, i):
+        if self._removed:
+            self._Discard()
         return self.data[i]()
 
     def __getslice__(self, i, j):
@@ -88,6 +223,8 @@ class WeakList(object):
             A new WeakList with the given slice (note that the actual size may not be what the user
             initially requested, as object may be garbage collected during that process).
         '''
+        if self._removed:
+            self._Discard()
         i = max(i, 0)
         j = max(j, 0)
 
@@ -101,9 +238,12 @@ class WeakList(object):
         return WeakList(slice)
 
     def __delslice__(self, i, j):
+        if self._removed:
+            self._Discard()
         i = max(i, 0)
         j = max(j, 0)
 
+        self._ReleaseRefs(self.data[i:j])
         del self.data[i:j]
 
 
@@ -111,7 +251,11 @@ class WeakList(object):
         '''
         Set a weakref of item on the ith position
         '''
-        self.data[i] = GetWeakRef(item)
+        if self._removed:
+            self._Discard()
+        ref = self._CreateRef(item)
+        self._ReleaseRefs([self.data[i]])
+        self.data[i] = ref
 
     def __str__(self):
         return '\n'.join(unicode(x) for x in self)
@@ -262,31 +406,62 @@ class WeakSet(object):
 
     When iterating the actual objects are used, but internally, only weakrefs are kept.
 
+    The references are removed as soon as their objects die (by weakref callbacks), so all
+    operations (but iterating) are O(1).
+
     It does not contain the whole set interface (but can be extended as needed).
     '''
 
     def __init__(self, initlist=None):
         self.data = set()
 
+        # WeakMethodRef -> weakref to the method object (removing the WeakMethodRef on its death)
+        self._guards = {}
+
+        self._on_dead = _CreateWeakCallback(self, WeakSet._OnDead)
+
+        if initlist is not None:
+            for x in initlist:
+                self.add(x)
+
+
+    def _OnDead(self, ref):
+        self.data.discard(ref)
+        if self._guards:
+            self._guards.pop(ref, None)
+
 
     def add(self, item):
-        self.data.add(GetWeakRef(item))
+        ref = _CreateNotifyingWeakRef(item, self._on_dead)
+        if ref in self.data:
+            return
+
+        if ref.__class__ is WeakMethodRef and ref._obj is not None:
+            on_dead = self._on_dead
+            self._guards[ref] = weakref.ref(ref._obj(), lambda _guard: on_dead(ref))
+        self.data.add(ref)
 
 
     def clear(self):
         self.data.clear()
+        self._guards.clear()
 
 
     def __iter__(self):
         # iterate in a copy
-        for ref in self.data.copy():
+        for ref in list(self.data):
             d = ref()
-            if d is None:
-                self.data.remove(ref)
-            else:
+            if d is not None:
                 yield d
 
 
+    def __contains__(self, item):
+        try:
+            return GetWeakRef(item) in self.data
+        except TypeError:
+            return False  # Can't have weak references
+
+
     def remove(self, item):
         '''
         Remove an item from the available data.
@@ -294,7 +469,9 @@ class WeakSet(object):
         :param object item:
             The object to be removed.
         '''
-        self.data.remove(GetWeakRef(item))
+        ref = GetWeakRef(item)
+        self.data.remove(ref)
+        self._guards.pop(ref, None)
 
 
     def discard(self, item):
@@ -304,10 +481,7 @@ class WeakSet(object):
             pass
 
     def __len__(self):
-        i = 0
-        for _k in self:  # we make an iteration to remove dead references...
-            i += 1
-        return i
+        return len(self.data)
 
 
     def __str__(self):
@@ -424,6 +598,39 @@ def GetWeakRef(obj):
     return obj
 
 
+def _CreateNotifyingWeakRef(obj, callback):
+    '''
+    Like GetWeakRef, but the death of the object (if it's not a method) is notified to the given
+    callback.
+    '''
+    if obj is None or IsWeakObj(obj) or inspect.ismethod(obj):
+        return GetWeakRef(obj)
+    return weakref.ref(obj, callback)
+
+
+
+def _CreateWeakCallback(obj, method):
+    '''
+    :param object obj:
+
+    :param function method:
+        An unbound method of obj, receiving the weak reference whose object died.
+
+    :rtype: callable(weakref)
+    :returns:
+        A weakref callback that calls the method of the given object (without keeping it alive).
+    '''
+    obj_ref = weakref.ref(obj)
+
+    def Callback(ref):
+        obj = obj_ref()
+        if obj is not None:
+            method(obj, ref)
+
+    return Callback
+
+
+
 #===================================================================================================
 # IsSame
 #===================================================================================================
@@ -19,7 +19,8 @@ from __future__ import unicode_literals
 from _adaptable_interface import IAdaptable
 from _interface import (AssertDeclaresInterface, AssertImplements, AssertImplementsFullChecking,
     Attribute, BadImplementationError, CacheInterfaceAttrs, DeclareClassImplements,
-    GetImplementedInterfaces, ImplementsInterface, Interface, InterfaceError,
+    EnableInterfaceCheckStats, GetImplementedInterfaces, GetInterfaceCheckStats,
+    ImplementsInterface, Interface, InterfaceError,
     InterfaceImplementationMetaClass, InterfaceImplementorStub, IsImplementation,
     IsImplementationOfAny, ReadOnlyAttribute)
 
@@ -30,7 +31,9 @@ __all__ = [
     'Attribute',
     'BadImplementationError',
     'CacheInterfaceAttrs',
+    'EnableInterfaceCheckStats',
     'GetImplementedInterfaces',
+    'GetInterfaceCheckStats',
     'IAdaptable',
     'Interface',
     'InterfaceError',
@@ -43,6 +43,7 @@ from ben10.foundation.types_ import Method
 from new import classobj
 import inspect
 import sys
+import threading
 import warnings
 
 
@@ -73,6 +74,9 @@ class InterfaceImplementationMetaClass(type):
             for I in dct.get('__implements__', []):
                 # Will do full checking this first time, and also cache the results
                 AssertImplements(C, I)
+
+            # Also check the base interfaces now, so that IsImplementation is always a bit test
+            _FreezeImplementedInterfaces(C)
         return C
 
 
@@ -195,7 +199,21 @@ def IsImplementation(class_or_instance, interface):
     :rtype: bool
 
     :see: :py:func:`.AssertImplements`
+
+    .. note:: Performance
+        After the first check of a class, this is just a test in the bitset of the class (see
+        _FreezeImplementedInterfaces).
     '''
+    if _check_stats is not None:
+        _CountCheck(class_or_instance, interface)
+
+    bit = _interface_bits.get(interface)
+    if bit is not None:
+        # Fast path: `interface` was already validated when its bit was assigned
+        class_bits = _class_bits.get(_GetClassForInterfaceChecking(class_or_instance))
+        if class_bits is not None and class_bits[0] & bit:
+            return bool(class_bits[1] & bit)
+
     try:
         is_interface = issubclass(interface, Interface)
     except TypeError, e:
@@ -268,6 +286,9 @@ def AssertImplements(class_or_instance, interface):
         implementation checking (after the first check), because what is really being tested is the
         class.
     '''
+    if _check_stats is not None:
+        _CountCheck(class_or_instance, interface)
+
     class_ = _GetClassForInterfaceChecking(class_or_instance)
 
     is_implementation, reason = _CheckIfClassImplements(class_, interface)
@@ -311,6 +332,107 @@ class __ImplementedInterfacesCache(__ResultsCache, Singleton):
 
 
 
+#===================================================================================================
+# Implementation bitsets
+#===================================================================================================
+# Each interface checked receives a bit, and each class checked a pair of bitsets:
+# (interfaces checked, interfaces implemented). This makes the checks of a class already checked
+# a dict lookup and a bit test, instead of going through the results cache.
+
+# interface -> bit
+_interface_bits = {}
+
+# class -> (checked bits, implemented bits)
+_class_bits = {}
+
+# Serializes the changes in the bitsets (readers don't lock: they only see complete values)
+_bits_lock = threading.Lock()
+
+
+def _GetInterfaceBit(interface):
+    '''
+    :param Interface interface:
+
+    :rtype: int
+    :returns:
+        The bit of the interface (assigned in the first call).
+    '''
+    bit = _interface_bits.get(interface)
+    if bit is None:
+        with _bits_lock:
+            bit = _interface_bits.get(interface)
+            if bit is None:
+                bit = _interface_bits[interface] = 1 << len(_interface_bits)
+    return bit
+
+
+def _SetClassBit(class_, interface, is_implementation):
+    '''
+    Stores the result of checking if the class implements the interface in the class bitsets.
+    '''
+    if not isinstance(interface, type) or not issubclass(interface, Interface):
+        return  # Only interfaces (validated here) may use the fast path of IsImplementation
+
+    bit = _GetInterfaceBit(interface)
+    with _bits_lock:
+        checked, implemented = _class_bits.get(class_, (0, 0))
+        if is_implementation:
+            implemented |= bit
+        _class_bits[class_] = (checked | bit, implemented)
+
+
+def _FreezeImplementedInterfaces(class_):
+    '''
+    Checks the class against all the interfaces it declares (including their base interfaces), so
+    that later calls to IsImplementation with these interfaces are just a bit test.
+
+    :type class_: type or classobj
+    '''
+    for interface in GetImplementedInterfaces(class_):
+        if issubclass(interface, Interface):
+            _CheckIfClassImplements(class_, interface)
+
+
+
+#===================================================================================================
+# Interface check stats
+#===================================================================================================
+# (class, interface) -> number of checks, or None when not counting
+_check_stats = None
+
+
+def EnableInterfaceCheckStats(enabled=True):
+    '''
+    Starts (or stops) counting the calls to IsImplementation and AssertImplements, to find the
+    checks done in tight loops.
+
+    :param bool enabled:
+        If True, the counts are reset and counting starts. If False, counting stops.
+
+    :see: :py:func:`.GetInterfaceCheckStats`
+    '''
+    global _check_stats
+    _check_stats = {} if enabled else None
+
+
+def GetInterfaceCheckStats():
+    '''
+    :rtype: dict((type, Interface), int)
+    :returns:
+        The number of checks of each class against each interface since counting started (empty
+        when not counting).
+
+    :see: :py:func:`.EnableInterfaceCheckStats`
+    '''
+    return dict(_check_stats or {})
+
+
+def _CountCheck(class_or_instance, interface):
+    key = (_GetClassForInterfaceChecking(class_or_instance), interface)
+    _check_stats[key] = _check_stats.get(key, 0) + 1
+
+
+
 #===================================================================================================
 # _CheckIfClassImplements
 #===================================================================================================
@@ -361,6 +483,7 @@ def _CheckIfClassImplements(class_, interface):
 
     result = (is_implementation, reason)
     cache.SetResult((class_, interface), result)
+    _SetClassBit(class_, interface, is_implementation)
     return result
 
 
@@ -807,6 +930,8 @@ def DeclareClassImplements(class_, *interfaces):
             # Forget any previous checks
             __ImplementsCache().GetSingleton().ForgetResult((class_, interface))
             __ImplementedInterfacesCache.GetSingleton().ForgetResult(class_)
+            with _bits_lock:
+                _class_bits.pop(class_, None)
 
             AssertImplements(class_, interface)
     except:
@@ -1,8 +1,9 @@
 from __future__ import unicode_literals
 from ben10.foundation.types_ import Method, Null
 from ben10.interface import (AssertImplements, Attribute, BadImplementationError,
-    DeclareClassImplements, GetImplementedInterfaces, IAdaptable, ImplementsInterface, Interface,
-    InterfaceError, InterfaceImplementorStub, IsImplementation, ReadOnlyAttribute)
+    DeclareClassImplements, EnableInterfaceCheckStats, GetImplementedInterfaces,
+    GetInterfaceCheckStats, IAdaptable, ImplementsInterface, Interface, InterfaceError,
+    InterfaceImplementorStub, IsImplementation, ReadOnlyAttribute)
 import pytest
 import sys
 
@@ -796,3 +797,172 @@ class Test:
         with pytest.raises(RuntimeError):
             if ImplementsInterface(obj, I1):
                 pytest.fail('Managed to test "if ImplementsInterface(obj, I1):"')
+
+
+    def testImplementationBits(self):
+        from ben10.interface._interface import _class_bits, _interface_bits
+
+        class I1(Interface):
+            def M1(self):
+                ''
+
+        class I2(I1):
+            def M2(self):
+                ''
+
+        class I3(Interface):
+            def M3(self):
+                ''
+
+        class C2(object):
+            ImplementsInterface(I2)
+
+            def M1(self):
+                ''
+
+            def M2(self):
+                ''
+
+            def M3(self):
+                ''
+
+        # Frozen when the class is created: the declared interfaces and their bases
+        checked, implemented = _class_bits[C2]
+        assert checked == implemented == _interface_bits[I1] | _interface_bits[I2]
+
+        assert IsImplementation(C2(), I2) == True
+        assert IsImplementation(C2, I1) == True
+        assert IsImplementation(C2(), I3) == False  # Not declared
+        checked, implemented = _class_bits[C2]
+        assert checked & _interface_bits[I3]
+        assert not implemented & _interface_bits[I3]
+
+        # Stubs are checked through the wrapped object
+        assert IsImplementation(I2(C2()), I1) == True
+
+        # Declaring an interface later forgets the previous results
+        DeclareClassImplements(C2, I3)
+        assert IsImplementation(C2(), I3) == True
+        assert IsImplementation(C2(), I2) == True
+
+        # Classes that are not interfaces never use the bits
+        with pytest.raises(InterfaceError):
+            IsImplementation(C2(), C2)
+
+
+    def testImplementationBitsThreads(self, monkeypatch):
+        from ben10.interface import _interface
+        import threading
+        import time
+
+        I1 = type(str('I1'), (Interface,), {})
+        I2 = type(str('I2'), (Interface,), {})
+
+        # Two threads meeting new interfaces at the same time: counting the assigned bits is slow,
+        # so both threads would count them before any of them assigns a bit
+        class InterfaceBits(dict):
+            def __len__(self):
+                result = dict.__len__(self)
+                time.sleep(0.1)
+                return result
+
+        monkeypatch.setattr(_interface, '_interface_bits', InterfaceBits(_interface._interface_bits))
+
+        bits = {}
+        def Run(interface):
+            bits[interface] = _interface._GetInterfaceBit(interface)
+
+        threads = [threading.Thread(target=Run, args=(i,)) for i in (I1, I2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert bits[I1] != bits[I2]
+        assert bits == {I1: _interface._GetInterfaceBit(I1), I2: _interface._GetInterfaceBit(I2)}
+
+
+    def testInterfaceCheckStats(self):
+        class I1(Interface):
+            def M1(self):
+                ''
+
+        class C1(object):
+            ImplementsInterface(I1)
+
+            def M1(self):
+                ''
+
+        IsImplementation(C1(), I1)
+        assert GetInterfaceCheckStats() == {}  # Not counting
+
+        EnableInterfaceCheckStats()
+        try:
+            for _i in xrange(3):
+                IsImplementation(C1(), I1)
+            IsImplementation(C1, _InterfM1)
+            AssertImplements(C1(), I1)
+            assert GetInterfaceCheckStats() == {(C1, I1) : 4, (C1, _InterfM1) : 1}
+
+            # Enabling again resets the counts
+            EnableInterfaceCheckStats()
+            assert GetInterfaceCheckStats() == {}
+        finally:
+            EnableInterfaceCheckStats(False)
+
+        IsImplementation(C1(), I1)
+        assert GetInterfaceCheckStats() == {}
+
+
+    def testIsImplementationPerformance__flaky(self):
+        '''
+        Time per call of IsImplementation (already checked classes).
+
+        Results 2026-10-18 (bitsets of the implemented interfaces)
+        ---------------------------------------------------------
+        instance implements: 0.50us
+        instance not implements: 0.50us
+        class implements: 0.36us
+        ---------------------------------------------------------
+
+        Results < 2026-10-18 (results cache)
+        ---------------------------------------------------------
+        instance implements: 0.94us
+        instance not implements: 0.93us
+        class implements: 0.86us
+        ---------------------------------------------------------
+        '''
+        import time
+
+        class I1(Interface):
+            def M1(self):
+                ''
+
+        class I2(Interface):
+            def M2(self):
+                ''
+
+        class C1(object):
+            ImplementsInterface(I1)
+
+            def M1(self):
+                ''
+
+        def Time(func, *args):
+            start = time.time()
+            for _i in xrange(count):
+                func(*args)
+            return (time.time() - start) / count
+
+        PRINT_PERFORMANCE = False
+        count = 100000
+        obj = C1()
+        timing = [
+            ('instance implements', Time(IsImplementation, obj, I1)),
+            ('instance not implements', Time(IsImplementation, obj, I2)),
+            ('class implements', Time(IsImplementation, C1, I1)),
+        ]
+
+        if PRINT_PERFORMANCE:
+            for name, seconds in timing:
+                print '%s: %.2fus' % (name, seconds * 1e6)
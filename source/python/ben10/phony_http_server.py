@@ -60,24 +60,66 @@ class PhonyHttpHandler(SimpleHTTPRequestHandler):
         '''
         Handle all GET requests with the same output containing the path and all headers
         information.
+
+        Supports "Range" requests (a single range, "bytes=<start>-[<end>]").
         '''
-        self.send_response(200)
-        self.send_header('Content-type', 'text/html')
+        contents = self._GetContents()
+        contents = self._SendHeaders(contents)
+
+        # Write the contents
+        self.wfile.write(contents)
+
 
-        # Obtain the contents
+    def do_HEAD(self):
+        '''
+        Handle HEAD requests with the same headers as the GET request.
+        '''
+        self._SendHeaders(self._GetContents())
+
+
+    def _GetContents(self):
+        '''
+        :rtype: str
+        :returns:
+            The contents of the requested path.
+        '''
         if callable(self.server.http_get_callback):
-            contents = self.server.http_get_callback(self.path)
+            return self.server.http_get_callback(self.path)
+
+        contents = 'path = %s\n' % self.path
+        for i_name, i_value in sorted(self.headers.dict.iteritems()):
+            contents += '%s = %s\n' % (i_name, i_value)
+        return contents
+
+
+    def _SendHeaders(self, contents):
+        '''
+        Sends the response code and headers for the given contents.
+
+        :rtype: str
+        :returns:
+            The part of the contents that must be sent (the requested range).
+        '''
+        import re
+
+        range_match = re.match(r'bytes=(\d+)-(\d*)$', self.headers.get('Range', ''))
+        if range_match is None:
+            self.send_response(200)
         else:
-            contents = 'path = %s\n' % self.path
-            for i_name, i_value in sorted(self.headers.dict.iteritems()):
-                contents += '%s = %s\n' % (i_name, i_value)
+            start = int(range_match.group(1))
+            end = int(range_match.group(2) or len(contents) - 1)
+            end = min(end, len(contents) - 1)
+            self.send_response(206)
+            self.send_header('Content-Range', 'bytes %d-%d/%d' % (start, end, len(contents)))
+            contents = contents[start:end + 1]
+
+        self.send_header('Content-type', 'text/html')
+        self.send_header('Accept-Ranges', 'bytes')
 
         # Add content-length to the header
         self.send_header('content-length', str(len(contents)))
         self.end_headers()
-
-        # Write the contents
-        self.wfile.write(contents)
+        return contents
 
 
     def do_QUIT (self):
@@ -0,0 +1,250 @@
+from __future__ import unicode_literals
+'''
+Execution of many processes in parallel.
+'''
+from ben10.execute import (DEFAULT_ENCODING, DEFAULT_ENCODING_ERRORS, ProcessOpen,
+    _IterOutputChunks)
+import threading
+
+
+
+#===================================================================================================
+# ProcessPool
+#===================================================================================================
+class ProcessPool(object):
+    '''
+    Executes many command lines, running up to `max_processes` of them at the same time:
+
+        pool = ProcessPool(max_processes=8, timeout=60)
+        for output, retcode in pool.Execute([['git', 'fetch'], ['git', 'gc'], ...], cwd=repo_dir):
+            ...
+
+    The output of the running processes is read by one thread per process and delivered to the
+    thread calling Execute, so the callbacks are always called in that thread (one at a time), in
+    the order the lines are generated by each process.
+
+    Execute may be stopped by calling Cancel (from a callback or from another thread): the running
+    processes are killed and the ones not started yet are never started.
+
+    Many threads may call Execute at the same time (each call running up to `max_processes`).
+    '''
+
+    def __init__(self, max_processes=None, timeout=None):
+        '''
+        :param int max_processes:
+            The maximum number of processes running at the same time (defaults to the number of
+            cpus).
+
+        :param float timeout:
+            The maximum number of seconds each process may run, after which it is killed.
+        '''
+        if max_processes is None:
+            import multiprocessing
+            max_processes = multiprocessing.cpu_count()
+
+        self.max_processes = max_processes
+        self.timeout = timeout
+
+        # The queues of the calls to Execute in progress
+        self._queues = set()
+        self._queues_lock = threading.Lock()
+
+
+    def Execute(
+            self,
+            command_lines,
+            cwd=None,
+            environ=None,
+            extra_environ=None,
+            output_callback=None,
+            output_encoding=None,
+            output_encoding_errors=None,
+            return_code_callback=None,
+            shell=False,
+            ignore_auto_quote=False,
+            clean_eol=True,
+            max_output_lines=None,
+        ):
+        '''
+        Executes the given command lines, returning when all of them are finished (or when the
+        execution is cancelled).
+
+        Use the same parameters as ben10.execute.Execute, except:
+
+        :param list(list(unicode)|unicode) command_lines:
+            The command lines to execute (started in this order).
+
+        :param callback(int,unicode) output_callback:
+            Called with the index of the command line and each line of its output.
+
+        :param callback(int,int|None) return_code_callback:
+            Called with the index of the command line and its return code, when the process
+            finishes. The return code is None when the process is killed because of the timeout
+            (or Cancel). The output of a process is considered finished when the timeout expires
+            even if it is kept open by a child process left running (e.g. `sh -c 'server &'`).
+
+        :rtype: list(tuple(list(unicode),int|None))
+        :returns:
+            The output and return code of each command line, in the same order. The return code is
+            None for processes killed (timeout or Cancel) and processes never started (Cancel).
+        '''
+        from Queue import Queue
+        from collections import deque
+
+        results = [([], None) for _i in xrange(len(command_lines))]
+        pending = deque(enumerate(command_lines))
+        running = {}
+
+        queue = Queue()
+        with self._queues_lock:
+            self._queues.add(queue)
+        try:
+            while pending or running:
+                while pending and len(running) < self.max_processes:
+                    index, command_line = pending.popleft()
+                    popen = ProcessOpen(
+                        command_line,
+                        cwd=cwd,
+                        environ=environ,
+                        extra_environ=extra_environ,
+                        shell=shell,
+                        ignore_auto_quote=ignore_auto_quote,
+                        pipe_stdout=True,
+                    )
+                    running[index] = _RunningProcess(
+                        index,
+                        popen,
+                        queue,
+                        output_encoding or DEFAULT_ENCODING,
+                        output_encoding_errors or DEFAULT_ENCODING_ERRORS,
+                        clean_eol,
+                        self.timeout,
+                    )
+                    if max_output_lines is not None:
+                        results[index] = (deque(maxlen=max_output_lines), None)
+
+                index, lines = queue.get()
+                if index is None:  # Cancelled
+                    pending.clear()
+                    break
+
+                if index not in running:
+                    continue  # Output of a process already finished by Kill
+
+                if lines is not None:
+                    output = results[index][0]
+                    for line in lines:
+                        if output_callback is not None:
+                            output_callback(index, line)
+                        output.append(line)
+                    continue
+
+                # Output finished
+                returncode = running.pop(index).Finish()
+                results[index] = (list(results[index][0]), returncode)
+                if return_code_callback is not None:
+                    return_code_callback(index, returncode)
+
+        finally:
+            with self._queues_lock:
+                self._queues.discard(queue)
+            # Cancelled (or an error happened)
+            for process in running.itervalues():
+                process.Kill()
+                process.Finish()
+
+        return [(list(output), returncode) for output, returncode in results]
+
+
+    def Cancel(self):
+        '''
+        Stops the current calls to Execute (if any), killing the running processes.
+        '''
+        with self._queues_lock:
+            for queue in self._queues:
+                queue.put((None, None))
+
+
+
+#===================================================================================================
+# _RunningProcess
+#===================================================================================================
+class _RunningProcess(object):
+    '''
+    A process started by ProcessPool, whose output is read by a thread that puts
+    (index, lines) in the Execute queue for each chunk read, and (index, None) when it finishes.
+
+    Kill also puts (index, None) in the queue: the reader thread may be blocked until all the
+    children of the process (which inherit its output) finish, so Execute doesn't wait for it.
+    '''
+
+    def __init__(self, index, popen, queue, encoding, encoding_errors, clean_eol, timeout):
+        self._index = index
+        self._popen = popen
+        self._queue = queue
+        self._lock = threading.Lock()
+        self._finished = False
+        self._killed = False
+        self._output_finished = False
+
+        popen.stdin.close()
+
+        reader = threading.Thread(
+            target=self._Read,
+            args=(index, queue, encoding, encoding_errors, clean_eol),
+        )
+        reader.daemon = True
+        reader.start()
+
+        self._timer = None
+        if timeout is not None:
+            self._timer = threading.Timer(timeout, self.Kill)
+            self._timer.daemon = True
+            self._timer.start()
+
+
+    def _Read(self, index, queue, encoding, encoding_errors, clean_eol):
+        try:
+            for lines in _IterOutputChunks(self._popen.stdout, encoding, encoding_errors, clean_eol):
+                queue.put((index, lines))
+        finally:
+            self._popen.stdout.close()
+            with self._lock:
+                self._output_finished = True
+            queue.put((index, None))
+
+
+    def Kill(self):
+        '''
+        Kills the process (if it is still running) and stops waiting for its output.
+        '''
+        with self._lock:
+            # Never kill after Finish: the process id may be reused by another process
+            if self._finished or self._killed:
+                return
+            if self._popen.poll() is None:
+                self._popen.kill()
+            elif self._output_finished:
+                return
+            # Note: also when the process finished but its output is kept open by its children
+            self._killed = True
+        self._queue.put((self._index, None))
+
+
+    def Finish(self):
+        '''
+        Waits for the process (which already closed its output or was killed).
+
+        :rtype: int|None
+        :returns:
+            The process return code (None if it was killed).
+        '''
+        with self._lock:
+            self._finished = True
+            if self._timer is not None:
+                self._timer.cancel()
+
+        returncode = self._popen.wait()
+        if self._killed:
+            return None
+        return returncode